@@ -0,0 +1,302 @@
+""" Export the collected bills and votes of a year to typed, column per file NumPy arrays, for analysis
+    across whole years without reloading the nested JSON.
+
+    data/columns_<year>/bills/<column>.npy has one row per bill: bill type, number, status category,
+    sponsor party, policy area, introduced and latest action dates and cosponsor counts by party.
+    data/columns_<year>/votes/<column>.npy has one row per House or Senate roll call: chamber, number,
+    date, question, result and the [yea, nay, present, not voting] totals of each party. Text columns
+    are stored as integer codes, and the code tables are in data/columns_<year>/vocabulary.json.
+
+    load_columns memory-maps the arrays of one or several years (the text codes of several years are
+    mapped onto one code table, see load_vocabulary), and bill_tallies and bipartisan_percent
+    compute the bill_counts tallies and the vote bipartisan scores of ProcessCongressVotes on them as
+    whole-array operations.
+
+    Example: python analytics_export.py 2019 2020 """
+
+import os
+import re
+import sys
+import json
+import numpy as np
+from datetime import datetime as dt
+from bill_store import collected_types
+from bill_stats import classify, CATEGORIES, BillStats
+from legislators import LegislatorTable, party_name
+from process_congress_votes import house_party_votes, senate_party_votes, house_bipartisan_percent, \
+    senate_bipartisan_percent
+
+PARTIES = ['D', 'R', 'I']
+SPONSOR_PARTIES = ['Democratic', 'Republican', 'Independent']
+HOUSE = 0
+SENATE = 1
+_date = re.compile(r'(\d{2})/(\d{2})/(\d{4})')
+
+
+def bill_date(text):
+    """ The first mm/dd/yyyy date in text as a datetime64, or NaT. """
+    found = _date.search(text or '')
+    if found is None:
+        return np.datetime64('NaT')
+    return np.datetime64('{}-{}-{}'.format(found.group(3), found.group(1), found.group(2)))
+
+
+def dt_from_house(action_date):
+    """ '3-Jan-2019' to '2019-01-03' """
+    return dt.strptime(action_date, '%d-%b-%Y').strftime('%Y-%m-%d')
+
+
+def dt_from_senate(vote_date):
+    """ 'January 3, 2019, 12:34 PM' to '2019-01-03' """
+    s = vote_date.split(' ')
+    return dt.strptime('{}-{}-{}'.format(s[1].strip(','), s[0][0:3], s[2].strip(',')), '%d-%b-%Y').strftime('%Y-%m-%d')
+
+
+class Vocabulary:
+    """ Integer codes for the distinct values of a text column, -1 for a missing value. """
+    def __init__(self, values=None):
+        self.values = list(values) if values is not None else []
+        self.codes = dict((value, code) for code, value in enumerate(self.values))
+
+    def code(self, value):
+        if value is None:
+            return -1
+        if value not in self.codes:
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+        return self.codes[value]
+
+
+class ColumnExport:
+    def __init__(self, year, columns_dir=None):
+        self.year = year
+        self.columns_dir = columns_dir if columns_dir is not None else 'data/columns_{}'.format(year)
+        self.bills_dir = 'data/congress_bills_{}'.format(year)
+        self.house_vote_dir = 'data/house_votes_{}'.format(year)
+        self.senate_vote_dir = 'data/senate_votes_{}'.format(year)
+        self.vocabulary = {}
+
+    def vocabulary_for(self, column):
+        return self.vocabulary.setdefault(column, Vocabulary())
+
+    def save(self, table, columns):
+        table_dir = '{}/{}'.format(self.columns_dir, table)
+        if not os.path.isdir(table_dir):
+            os.makedirs(table_dir)
+        for name, values in columns.items():
+            np.save('{}/{}.npy'.format(table_dir, name), values)
+
+    def export_bills(self):
+        legislators = LegislatorTable()
+        rows = {'bill_type': [], 'number': [], 'status': [], 'nomination_category': [], 'party': [],
+                'policy_area': [], 'introduced': [], 'latest_action': [], 'cosponsors': []}
+        bill_types = self.vocabulary_for('bill_type')
+        policy_areas = self.vocabulary_for('policy_area')
+        for name, bills in collected_types(self.bills_dir):
+            type_code = bill_types.code(name.replace('_{}'.format(self.year), ''))
+            for bill in bills:
+                categories = classify(bill)
+                rows['bill_type'].append(type_code)
+                rows['number'].append(bill['number'])
+                rows['status'].append(CATEGORIES.index(categories[0]) if len(categories) > 0 else -1)
+                rows['nomination_category'].append(CATEGORIES.index(categories[1]) if len(categories) > 1 else -1)
+                if 'sponsor_id' in bill.keys():
+                    party = party_name(legislators.member(bill['sponsor_id'])['party'])
+                else:
+                    party = bill.get('party')
+                rows['party'].append(SPONSOR_PARTIES.index(party) if party in SPONSOR_PARTIES else -1)
+                rows['policy_area'].append(policy_areas.code(bill.get('policy_area')))
+                rows['introduced'].append(bill_date(bill.get('introduced', bill.get('date_received'))))
+                rows['latest_action'].append(bill_date(bill.get('latest_action')))
+                if 'cosponsor_ids' in bill.keys():
+                    cosponsor_parties = legislators.party_counts(bill['cosponsor_ids'])
+                else:
+                    cosponsor_parties = {}
+                    for cosponsor in bill.get('cosponsors_list') or []:
+                        cosponsor_parties[cosponsor[2]] = cosponsor_parties.get(cosponsor[2], 0) + 1
+                rows['cosponsors'].append([cosponsor_parties.get(party, 0) for party in PARTIES])
+        columns = {'bill_type': np.array(rows['bill_type'], dtype=np.int8),
+                   'number': np.array(rows['number'], dtype=np.int32),
+                   'status': np.array(rows['status'], dtype=np.int8),
+                   'nomination_category': np.array(rows['nomination_category'], dtype=np.int8),
+                   'party': np.array(rows['party'], dtype=np.int8),
+                   'policy_area': np.array(rows['policy_area'], dtype=np.int16),
+                   'introduced': np.array(rows['introduced'], dtype='datetime64[D]'),
+                   'latest_action': np.array(rows['latest_action'], dtype='datetime64[D]'),
+                   'cosponsors': np.array(rows['cosponsors'], dtype=np.int16).reshape(-1, len(PARTIES))}
+        self.save('bills', columns)
+        return len(rows['number'])
+
+    def load_votes(self, vote_dir, prefix):
+        if not os.path.isdir(vote_dir):
+            return
+        for vote_file in sorted(os.listdir(vote_dir)):
+            if vote_file.startswith(prefix) and vote_file.endswith('.json'):
+                with open('{}/{}'.format(vote_dir, vote_file), 'r') as f:
+                    yield int(vote_file.replace(prefix, '').replace('.json', '')), json.load(f)
+
+    def export_votes(self):
+        rows = {'chamber': [], 'number': [], 'date': [], 'question': [], 'result': [], 'party_totals': []}
+        questions = self.vocabulary_for('question')
+        results = self.vocabulary_for('result')
+        for number, vote in self.load_votes(self.house_vote_dir, 'roll'):
+            try:
+                meta = vote['rollcall-vote']['vote-metadata']
+                date = np.datetime64(dt_from_house(meta['action-date']))
+            except (KeyError, TypeError, ValueError):
+                continue
+            try:
+                party_totals = house_party_votes(meta)
+            except (KeyError, IndexError, TypeError, ValueError):
+                # e.g. the election of the Speaker, which has totals by candidate instead of by party
+                party_totals = [[0, 0, 0, 0]] * 3
+            rows['chamber'].append(HOUSE)
+            rows['number'].append(number)
+            rows['date'].append(date)
+            rows['question'].append(questions.code(meta.get('vote-question')))
+            rows['result'].append(results.code(meta.get('vote-result')))
+            rows['party_totals'].append(party_totals)
+        for number, vote in self.load_votes(self.senate_vote_dir, 'vote'):
+            try:
+                meta = vote['roll_call_vote']
+                date = np.datetime64(dt_from_senate(meta['vote_date']))
+                party_votes = senate_party_votes(meta)
+            except (KeyError, IndexError, TypeError, ValueError):
+                continue
+            rows['chamber'].append(SENATE)
+            rows['number'].append(number)
+            rows['date'].append(date)
+            rows['question'].append(questions.code(meta.get('vote_question_text')))
+            rows['result'].append(results.code(meta.get('vote_result_text')))
+            rows['party_totals'].append([party_votes[party] for party in PARTIES])
+        columns = {'chamber': np.array(rows['chamber'], dtype=np.int8),
+                   'number': np.array(rows['number'], dtype=np.int32),
+                   'date': np.array(rows['date'], dtype='datetime64[D]'),
+                   'question': np.array(rows['question'], dtype=np.int32),
+                   'result': np.array(rows['result'], dtype=np.int32),
+                   'party_totals': np.array(rows['party_totals'], dtype=np.int16).reshape(-1, len(PARTIES), 4)}
+        self.save('votes', columns)
+        return len(rows['number'])
+
+    def export(self):
+        """ Write the bill and vote columns and the vocabulary. Returns the number of bills and votes. """
+        bills = self.export_bills()
+        votes = self.export_votes()
+        with open('{}/vocabulary.json'.format(self.columns_dir), 'w') as f:
+            json.dump(dict((column, vocabulary.values) for column, vocabulary in self.vocabulary.items()), f)
+        return bills, votes
+
+
+def year_vocabulary(year):
+    """ Return the code tables saved with a year's columns, column name to list of values. """
+    with open('data/columns_{}/vocabulary.json'.format(year), 'r') as f:
+        return json.load(f)
+
+
+def load_vocabulary(years):
+    """ Return the code tables of the years merged into one, column name to Vocabulary: the codes of the
+        first year are kept, and values first seen in a later year get the next free codes. These are
+        the codes load_columns gives the text columns of the years. """
+    merged = {}
+    for year in years:
+        for column, values in year_vocabulary(year).items():
+            vocabulary = merged.setdefault(column, Vocabulary())
+            for value in values:
+                vocabulary.code(value)
+    return merged
+
+
+def load_columns(years, table):
+    """ Return a dictionary of column name to array for the 'bills' or 'votes' table of the years, with
+        the years' rows one after the other. A single year's columns are memory-mapped. With several
+        years, the codes of each year's text columns are mapped onto the merged code table of
+        load_vocabulary(years) before the years are put together, so a code means the same value in
+        every year. """
+    per_year = []
+    for year in years:
+        table_dir = 'data/columns_{}/{}'.format(year, table)
+        columns = dict((name[:-len('.npy')], np.load('{}/{}'.format(table_dir, name), mmap_mode='r'))
+                       for name in os.listdir(table_dir) if name.endswith('.npy'))
+        columns['year'] = np.full(len(columns['number']), year, dtype=np.int16)
+        per_year.append(columns)
+    if len(per_year) == 1:
+        return per_year[0]
+    merged = load_vocabulary(years)
+    for year, columns in zip(years, per_year):
+        for column, values in year_vocabulary(year).items():
+            if column not in columns.keys():
+                # A column of the other table
+                continue
+            # The year's code to the merged code, with -1 (missing) indexing the -1 at the end
+            codes = np.array([merged[column].code(value) for value in values] + [-1], dtype=columns[column].dtype)
+            columns[column] = codes[columns[column]]
+    return dict((name, np.concatenate([columns[name] for columns in per_year])) for name in per_year[0].keys())
+
+
+def bill_tallies(bills):
+    """ Return the bill_counts category counts (see bill_stats.CATEGORIES) of the bill columns. """
+    counts = np.bincount(bills['status'][bills['status'] >= 0], minlength=len(CATEGORIES))
+    counts += np.bincount(bills['nomination_category'][bills['nomination_category'] >= 0],
+                          minlength=len(CATEGORIES))
+    return dict(zip(CATEGORIES, counts.tolist()))
+
+
+def bipartisan_percent(votes):
+    """ Return the bipartisan percent of every vote in the vote columns, computed the way
+        ProcessCongressVotes does for its charts (NaN where the Senate formula has no votes to divide). """
+    totals = votes['party_totals'].astype(np.float64)
+    party_max = totals.max(axis=2)
+    party_max_index = totals.argmax(axis=2)
+    party_sum = totals.sum(axis=2)
+    dem_max, rep_max, ind_max = party_max[:, 0], party_max[:, 1], party_max[:, 2]
+    dem_index, rep_index, ind_index = party_max_index[:, 0], party_max_index[:, 1], party_max_index[:, 2]
+    dem_sum, rep_sum, ind_sum = party_sum[:, 0], party_sum[:, 1], party_sum[:, 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # House: each party's largest share added when it agrees with the Democrats, else the difference
+        house = np.where(dem_sum == 0, 0, dem_max / dem_sum)
+        rep_share = rep_max / rep_sum
+        house = np.where(rep_sum == 0, house, np.where(dem_index == rep_index, house + rep_share,
+                                                       np.abs(house - rep_share)))
+        ind_share = ind_max / ind_sum
+        house = np.where(ind_sum > 0, np.where(dem_index == ind_index, house + ind_share,
+                                               np.abs(house - ind_share)), house)
+        # Senate: independents join the party they voted with
+        with_dem = dem_index == ind_index
+        with_rep = ~with_dem & (rep_index == ind_index)
+        senate_dem_share = (dem_max + np.where(with_dem, ind_max, 0)) / (dem_sum + np.where(with_dem, ind_sum, 0))
+        senate_rep_share = (rep_max + np.where(with_rep, ind_max, 0)) / (rep_sum + np.where(with_rep, ind_sum, 0))
+        senate = np.where(dem_index == rep_index, senate_dem_share + senate_rep_share,
+                          np.abs(senate_dem_share - senate_rep_share))
+    return 50 * np.where(votes['chamber'] == HOUSE, house, senate)
+
+
+def check_parity(year, bills, votes):
+    """ Compare the vectorized results with the rollup tallies and the per-vote chart calculation. The
+        bills are recounted from the read only stores and the recount is not saved, so the export never
+        writes to the collected data. """
+    stats = BillStats(year)
+    stats.rebuild(save=False)
+    rollup = stats.totals()
+    tallies = bill_tallies(bills)
+    print('Bill tallies {}match the statistics rollup'.format('' if tallies == rollup else 'do NOT '))
+    scores = bipartisan_percent(votes)
+    mismatched = 0
+    for row in range(len(votes['number'])):
+        party_votes = [list(map(int, party)) for party in votes['party_totals'][row]]
+        try:
+            if votes['chamber'][row] == HOUSE:
+                expected = house_bipartisan_percent(*party_votes)
+            else:
+                expected = senate_bipartisan_percent(dict(zip(PARTIES, party_votes)))
+        except ZeroDivisionError:
+            expected = float('nan')
+        if not np.isclose(scores[row], expected, equal_nan=True):
+            mismatched += 1
+    print('{} of {} bipartisan scores differ from the chart calculation'.format(mismatched, len(scores)))
+
+
+if __name__ == '__main__':
+    for year in [int(arg) for arg in sys.argv[1:]] or [2019]:
+        bill_count, vote_count = ColumnExport(year).export()
+        print('{}: exported {} bills and {} votes'.format(year, bill_count, vote_count))
+        check_parity(year, load_columns([year], 'bills'), load_columns([year], 'votes'))
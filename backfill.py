@@ -0,0 +1,143 @@
+""" Collect votes and bills for a range of years (or Congresses) in one unattended run.
+
+    All the collection work for every year is planned first, then run on one shared worker pool. Every
+    request goes through the shared fetcher, so the per-host rate budget applies across all years at
+    once. Progress and an ETA are printed per year. The run is resumable: vote fetches are recorded in
+    the crawl manifest and bills continue from each type's last collected bill, so running the same
+    command again picks up the remaining work.
+
+    Example: python backfill.py 2009 2019 --workers 12
+             python backfill.py --congresses 113 116 """
+
+import os
+import argparse
+import threading
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import http_fetch
+from response_cache import ResponseCache
+from collect_congress_votes import CollectCongressVotes
+from collect_congress_bills import CollectCongressBills
+from process_congress_votes import ProcessCongressVotes
+from crawl_manifest import CrawlManifest
+from legislators import LegislatorTable
+from bill_search import BillSearch
+
+Congress_start_year = 1787
+Sessions_per_Congress = 2
+
+
+def congress_years(first_congress, last_congress):
+    """ Return the calendar years covered by a range of Congresses (two sessions each). """
+    return list(range(Congress_start_year + Sessions_per_Congress * first_congress,
+                      Congress_start_year + Sessions_per_Congress * (last_congress + 1)))
+
+
+class YearProgress:
+    def __init__(self, year):
+        self.year = year
+        self.total = 0
+        self.done = 0
+        self.started = None
+
+    def report(self):
+        elapsed = perf_counter() - self.started
+        if self.done == 0:
+            eta = 'unknown'
+        else:
+            remaining = elapsed / self.done * (self.total - self.done)
+            eta = '{}m{:02d}s'.format(int(remaining // 60), int(remaining % 60))
+        return '{}: {}/{} ({:.0f}%), ETA {}'.format(self.year, self.done, self.total,
+                                                   100 * self.done / max(self.total, 1), eta)
+
+
+class Backfill:
+    def __init__(self, years, workers=8, votes=True, bills=True, process=False, dbg_print=False):
+        self.years = years
+        self.workers = workers
+        self.votes = votes
+        self.bills = bills
+        self.process = process
+        self.DEBUG_PRINT = dbg_print
+        self.progress = dict((year, YearProgress(year)) for year in years)
+        self.vote_collectors = {}
+        # One manifest, legislator table and search index for all the years' collectors, rather than a
+        # connection to each database per collector
+        if not os.path.isdir('data'):
+            os.makedirs('data')
+        self.manifest = CrawlManifest()
+        self.legislators = LegislatorTable() if bills is True else None
+        self.search_index = BillSearch() if bills is True else None
+        # Planned work: (year, function, arguments, number of items the task covers)
+        self.tasks = []
+        self.lock = threading.Lock()
+
+    def plan(self):
+        """ Work out everything to collect for every year before any of it is started. """
+        for year in self.years:
+            if self.votes is True:
+                collect = CollectCongressVotes(year, True, self.DEBUG_PRINT, manifest=self.manifest)
+                self.vote_collectors[year] = collect
+                for vote_number in collect.plan_house_votes():
+                    self.tasks.append((year, collect.fetch_house_roll, (vote_number,), 1))
+                for vote_number in collect.plan_senate_votes():
+                    self.tasks.append((year, collect.fetch_senate_vote, (vote_number,), 1))
+            if self.bills is True:
+                collect = CollectCongressBills(year, False, self.DEBUG_PRINT, legislators=self.legislators,
+                                               search_index=self.search_index, manifest=self.manifest)
+                for bill_type in collect.bill_type.keys():
+                    start_number, last_number = collect.plan_bills(bill_type, True)
+                    # A bill type is crawled as one task, its bills are collected in order
+                    count = max(0, last_number - start_number + 1)
+                    if count > 0:
+                        self.tasks.append((year, collect.collect_type, (bill_type, True, None, last_number), count))
+            self.progress[year].total = sum(task[3] for task in self.tasks if task[0] == year)
+            print('Planned {}: {} items'.format(year, self.progress[year].total))
+
+    def run(self):
+        if len(self.tasks) == 0:
+            self.plan()
+        start_time = perf_counter()
+        for progress in self.progress.values():
+            progress.started = start_time
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # Bill type crawls are the longest tasks, start them first so they do not finish last
+            futures = dict((pool.submit(function, *arguments), (year, count))
+                           for year, function, arguments, count in sorted(self.tasks, key=lambda t: -t[3]))
+            for future in as_completed(futures):
+                year, count = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print('{}: task failed: {}'.format(year, e))
+                progress = self.progress[year]
+                progress.done += count
+                if self.DEBUG_PRINT is True or progress.done == progress.total:
+                    print(progress.report())
+        for year, collect in self.vote_collectors.items():
+            collect.finish_runs()
+            collect.repair_votes()
+            if self.process is True:
+                ProcessCongressVotes(year, True).process_votes()
+        print('Backfill of {} finished in {:.0f} s'.format(', '.join(str(y) for y in self.years),
+                                                          perf_counter() - start_time))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Collect votes and bills for a range of years or Congresses')
+    parser.add_argument('first', type=int, help='first year (or Congress with --congresses)')
+    parser.add_argument('last', type=int, help='last year (or Congress with --congresses)')
+    parser.add_argument('--congresses', action='store_true', help='first and last are Congress numbers')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--no-votes', action='store_true', help='skip House and Senate votes')
+    parser.add_argument('--no-bills', action='store_true', help='skip bills, resolutions and nominations')
+    parser.add_argument('--process', action='store_true', help='draw the vote charts and pages afterwards')
+    parser.add_argument('--debug', action='store_true')
+    args = parser.parse_args()
+
+    if args.congresses is True:
+        years = congress_years(args.first, args.last)
+    else:
+        years = list(range(args.first, args.last + 1))
+    http_fetch.configure(cache=ResponseCache(), pool_size=max(16, args.workers))
+    Backfill(years, args.workers, not args.no_votes, not args.no_bills, args.process, args.debug).run()
@@ -0,0 +1,201 @@
+""" Compare page_extractor.py with the slice-and-search parsing the bill collector used before it, on a
+    directory of saved congress.gov pages. The pages are named by kind: bill_*.html (bill main pages),
+    nomination_*.html, cosponsors_*.html, text_*.html and subjects_*.html.
+
+    Both parsers run over every page, their fields are checked against each other for parity, and the
+    parse rate (pages/sec) and peak memory (tracemalloc) are reported for each kind of page. """
+
+import os
+import re
+import sys
+import json
+import tracemalloc
+from time import perf_counter
+import page_extractor
+
+
+# The parsing as it was done in collect_congress_bills.py before page_extractor.py
+def sliced_bill_page(text, url, number):
+    title_start = text.find('<title>') + len('<title>')
+    title_end = text.find('</title>')
+    tracker_start = text.find('<p class="hide_fromsighted">')
+    bill = {'title': text[title_start:title_end],
+            'url': url + '/text',
+            'number': number,
+            'cosponsors': url + '/cosponsors',
+            'text': None,
+            'cosponsors_list': None,
+            'cosponsors_table': None}
+    if tracker_start >= 0:
+        tracker_start += len('<p class="hide_fromsighted">')
+        tracker_end = text[tracker_start:].find('</p>')
+        bill['status'] = text[tracker_start:tracker_start+tracker_end]
+        sponsor_start = text.find('Sponsor:')
+        if sponsor_start >= 0:
+            sponsor_at = re.search(r'<td><a\W.*>(.*?)</a>(.*?)</td>', text[sponsor_start:])
+            if sponsor_at is not None:
+                sponsor = sponsor_at.group(1)
+                bill['sponsor'] = sponsor
+                bill['introduced'] = sponsor_at.group(2)
+                if sponsor.find('[R-') >= 0:
+                    party = 'Republican'
+                elif sponsor.find('[D-') >= 0:
+                    party = 'Democratic'
+                else:
+                    party = 'Independent'
+                bill['party'] = party
+        committee_start = text.find('Committees:')
+        if committee_start >= 0:
+            committees = re.search('<td>(.*?)</td>', text[committee_start:])
+            if committees is not None:
+                bill['committees'] = committees.group(1)
+        committee_reports_start = text.find('Committee Reports:')
+        if committee_reports_start >= 0:
+            committee_reports = re.search(r'<td><a\W.*?href="(.*?)">(.*?)</a></td>', text[committee_reports_start:])
+            if committee_reports is not None:
+                bill['committee_reports'] = committee_reports.group(2)
+                bill['committee_reports_url'] = committee_reports.group(1)
+        action_start = text.find('Latest Action:')
+        if action_start >= 0:
+            action = re.search(r'<td>(.*?)\(<a\W.*?href="(.*?)">(.*?)</a>.*</td>', text[action_start:])
+            if action is not None:
+                bill['latest_action'] = action.group(1)
+                bill['all_actions_url'] = action.group(2)
+        policy_start = text.find('Policy Area:<')
+        if policy_start >= 0:
+            policy = re.search(r'<li>(.*?)</li>', text[policy_start:])
+            if policy is not None:
+                bill['policy_area'] = policy.group(1)
+                subjects = re.search(r'<li><a\W.*?href="(.*?)">', text[policy_start:])
+                if subjects is not None:
+                    bill['subjects_url'] = 'https://www.congress.gov' + subjects.group(1)
+                    bill['subjects'] = None
+    else:
+        bill['reserved'] = True
+    return bill
+
+
+def sliced_nomination_page(text, url, number):
+    title_start = text.find('<title>') + len('<title>')
+    title_end = text.find('</title>')
+    bill = {'title': text[title_start:title_end],
+            'url': url,
+            'number': number}
+    for label, key, skip in [('>Description<', 'description', len('>Description<')),
+                             ('>Nominees<', 'nominees', len('>Nominees<')),
+                             ('>Committee<', 'committees', len('>Committee<')),
+                             ('>Organization</h2>', 'organization', len('>Committee<')),
+                             ('>Latest Action<', 'latest_action', len('>Latest Action<')),
+                             ('>Date Received from President<', 'date_received',
+                              len('>Date Received from President<'))]:
+        start = text.find(label)
+        if start >= 0:
+            start += skip
+            found = re.search('<li>(.*?)</li>', text[start:])
+            if found is not None:
+                bill[key] = found.group(1)
+    return bill
+
+
+def sliced_text_page(text):
+    bill_text = None
+    search_for = '<pre id="billTextContainer">'
+    text_start = text.find(search_for)
+    if text_start >= 0:
+        text_start += len(search_for)
+        text_end = text[text_start:].find('</pre>')
+        if text_end >= 0:
+            text_end += text_start
+            bill_text = text[text_start:text_end]
+    if bill_text is None:
+        bill_text = re.search('class="primary">.*<p>(.*?)</p>.*</main>', text)
+        if bill_text is not None:
+            bill_text = bill_text.group(1)
+    return bill_text
+
+
+def sliced_cosponsors_page(text):
+    cosponsors_table = None
+    clist = []
+    table_start = text.find('<table class="item_table">')
+    if table_start >= 0:
+        table_end = text[table_start:].find('</table>')
+        if table_end >= 0:
+            table_end += table_start + len('</table>')
+            cosponsors_table = text[table_start:table_end]
+            clist = re.findall(r'">(.*?)\.\W(.*?)\W\[(.?)-(.*?)\]', cosponsors_table)
+    return cosponsors_table, clist
+
+
+def sliced_subjects_page(text):
+    subjects = []
+    subjects_start = text.find('>Legislative Subjects<')
+    if subjects_start >= 0:
+        subjects_end = text[subjects_start:].find('<!-- end row -->')
+        if subjects_end >= 0:
+            subjects_end += subjects_start
+            subjects = re.findall(r'<li><a.*?>(.*?)</a></li>', text[subjects_start:subjects_end])
+    return subjects
+
+
+# Page kind: (parser before, page_extractor parser), each taking the page text
+PARSERS = {'bill': (lambda text: sliced_bill_page(text, 'url', 1),
+                    lambda text: page_extractor.parse_bill_page(text, 'url', 1)),
+           'nomination': (lambda text: sliced_nomination_page(text, 'url', 1),
+                          lambda text: page_extractor.parse_nomination_page(text, 'url', 1)),
+           'cosponsors': (sliced_cosponsors_page, page_extractor.parse_cosponsors_page),
+           'text': (sliced_text_page, page_extractor.parse_text_page),
+           'subjects': (sliced_subjects_page, page_extractor.parse_subjects_page)}
+
+
+def load_pages(page_dir):
+    pages = dict((kind, []) for kind in PARSERS.keys())
+    for name in sorted(os.listdir(page_dir)):
+        kind = name.split('_')[0]
+        if kind in pages.keys() and name.endswith('.html'):
+            with open('{}/{}'.format(page_dir, name), 'r') as f:
+                pages[kind].append([name, f.read()])
+    return pages
+
+
+def run_parser(parser, documents, repeat=5):
+    start = perf_counter()
+    for _ in range(repeat):
+        outputs = [parser(text) for name, text in documents]
+    elapsed = perf_counter() - start
+    # One more pass under tracemalloc for the peak memory of parsing a single page
+    peak = 0
+    for name, text in documents:
+        tracemalloc.start()
+        parser(text)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return outputs, len(documents) * repeat / elapsed, peak
+
+
+def main(page_dir):
+    pages = load_pages(page_dir)
+    if sum(len(documents) for documents in pages.values()) == 0:
+        print('No bill_*, nomination_*, cosponsors_*, text_* or subjects_*.html pages found in {}'.format(page_dir))
+        return
+    mismatched = []
+    for kind, documents in pages.items():
+        if len(documents) == 0:
+            continue
+        before = run_parser(PARSERS[kind][0], documents)
+        after = run_parser(PARSERS[kind][1], documents)
+        mismatched += [documents[i][0] for i, (a, b) in enumerate(zip(before[0], after[0]))
+                       if json.dumps(a) != json.dumps(b)]
+        print('{:>10} ({} pages): sliced {:9.1f} pages/sec, peak {:8.1f} KiB   '
+              'page_extractor {:9.1f} pages/sec, peak {:8.1f} KiB'.format(kind, len(documents),
+                                                                         before[1], before[2] / 1024,
+                                                                         after[1], after[2] / 1024))
+    if len(mismatched) > 0:
+        print('Field mismatch for: {}'.format(', '.join(mismatched)))
+    else:
+        print('Parsed fields are identical')
+
+
+if __name__ == '__main__':
+    # Point this at a directory of saved congress.gov pages, named as described above
+    main(sys.argv[1] if len(sys.argv) > 1 else 'tests/fixtures/pages')
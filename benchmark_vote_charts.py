@@ -0,0 +1,69 @@
+""" Measure the vote chart drawing rate of process_congress_votes.py for different numbers of chart
+    worker processes, on the collected votes of a year (data/house_votes_<year>, data/senate_votes_<year>).
+
+    Every chart is drawn once in this process (serial, the way process_votes drew them before the
+    chart workers) and then with each number of workers, into temporary directories. The charts/sec of
+    each run is reported, and the images drawn by the workers are checked to be identical to the serial
+    ones.
+
+    Example: python benchmark_vote_charts.py 2019 1 2 4 8 """
+
+import os
+import sys
+import filecmp
+import tempfile
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+from process_congress_votes import ProcessCongressVotes, draw_house_figure, draw_senate_figure
+
+
+def chart_jobs(year, limit=None):
+    """ Return the (draw_figure, meta, vote_set) of every collected vote of the year, or of the first
+        limit House and Senate votes. """
+    process = ProcessCongressVotes(year, False)
+    jobs = [(draw_house_figure, vote[0]['rollcall-vote']['vote-metadata'], vote[0]['rollcall-vote']['vote-data'])
+            for vote in process.house_votes[:limit]]
+    jobs += [(draw_senate_figure, vote[0]['roll_call_vote'], vote[0]['roll_call_vote'])
+             for vote in process.senate_votes[:limit] if isinstance(vote[0], dict)]
+    return jobs
+
+
+def draw_serial(jobs, images_dir):
+    started = perf_counter()
+    for draw_figure, meta, vote_set in jobs:
+        draw_figure(images_dir, meta, vote_set)
+    return len(jobs) / (perf_counter() - started)
+
+
+def draw_parallel(jobs, images_dir, workers):
+    started = perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(draw_figure, images_dir, meta, vote_set)
+                   for draw_figure, meta, vote_set in jobs]
+        for future in futures:
+            future.result()
+    return len(jobs) / (perf_counter() - started)
+
+
+def main(year, worker_counts, limit=None):
+    jobs = chart_jobs(year, limit)
+    if len(jobs) == 0:
+        print('No votes found for {}'.format(year))
+        return
+    print('{} charts, {} CPUs'.format(len(jobs), os.cpu_count()))
+    with tempfile.TemporaryDirectory() as serial_dir:
+        print('    serial: {:6.2f} charts/sec'.format(draw_serial(jobs, serial_dir)))
+        for workers in worker_counts:
+            with tempfile.TemporaryDirectory() as images_dir:
+                rate = draw_parallel(jobs, images_dir, workers)
+                differing = [name for name in os.listdir(serial_dir)
+                             if not filecmp.cmp('{}/{}'.format(serial_dir, name), '{}/{}'.format(images_dir, name),
+                                                shallow=False)]
+                print('{:2d} workers: {:6.2f} charts/sec{}'.format(workers, rate, '' if len(differing) == 0 else
+                                                                   ', {} images differ'.format(len(differing))))
+
+
+if __name__ == '__main__':
+    year = int(sys.argv[1]) if len(sys.argv) > 1 else 2019
+    worker_counts = [int(arg) for arg in sys.argv[2:]] or sorted(set([1, 2, 4, os.cpu_count()]))
+    main(year, worker_counts)
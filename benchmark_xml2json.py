@@ -0,0 +1,63 @@
+""" Compare the Xml2json conversion engines on a directory of saved roll call XML files.
+    Each engine converts every file, the outputs are checked against each other for parity,
+    and the conversion rate (docs/sec) and peak memory (tracemalloc) are reported. """
+
+import os
+import sys
+import json
+import tracemalloc
+from time import perf_counter
+from xml2json import Xml2json
+
+
+def load_documents(xml_dir):
+    documents = []
+    for name in sorted(os.listdir(xml_dir)):
+        if name.endswith('.xml'):
+            with open('{}/{}'.format(xml_dir, name), 'r') as f:
+                documents.append([name, f.read()])
+    return documents
+
+
+def run_engine(engine, documents, repeat=3):
+    converter = Xml2json(engine)
+    # Time the conversions without tracing, tracemalloc slows allocation heavy code down considerably
+    start = perf_counter()
+    for _ in range(repeat):
+        outputs = [converter.convertFromXmlText(data) for name, data in documents]
+    elapsed = perf_counter() - start
+    # Convert one more pass under tracemalloc to get the peak memory of a single conversion
+    peak = 0
+    for name, data in documents:
+        tracemalloc.start()
+        converter.convertFromXmlText(data)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return outputs, len(documents) * repeat / elapsed, peak
+
+
+def main(xml_dir):
+    documents = load_documents(xml_dir)
+    if len(documents) == 0:
+        print('No .xml files found in {}'.format(xml_dir))
+        return
+    results = {}
+    for engine in Xml2json.ENGINES:
+        results[engine] = run_engine(engine, documents)
+
+    mismatched = [documents[i][0] for i, (a, b) in enumerate(zip(results['soup'][0], results['stream'][0]))
+                  if json.dumps(a) != json.dumps(b)]
+    print('{} documents from {}'.format(len(documents), xml_dir))
+    for engine in Xml2json.ENGINES:
+        print('{:>8}: {:10.1f} docs/sec   peak {:8.1f} KiB'.format(engine, results[engine][1],
+                                                                 results[engine][2] / 1024))
+    if len(mismatched) > 0:
+        print('Output mismatch for: {}'.format(', '.join(mismatched)))
+    else:
+        print('Engine outputs are identical')
+
+
+if __name__ == '__main__':
+    # Point this at a directory of saved roll call XML files, e.g. the House roll###.xml or Senate
+    # vote_<congress>_<session>_#####.xml files
+    main(sys.argv[1] if len(sys.argv) > 1 else 'tests/fixtures/xml')
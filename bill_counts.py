@@ -1,86 +1,95 @@
+""" Report the bill, resolution and nomination counts of one or more years from the statistics rollup
+    the collectors keep (see bill_stats.py). A year's rollup is built from its collected bills first if
+    there is none yet, or when --rebuild is given; the bills are read one at a time, so the memory used
+    does not grow with the size of the archive. With several years (or --all, every congress_bills_<year>
+    directory in data/), each year is reported in turn, followed by the totals of all of them.
+
+    Example: python bill_counts.py 2019
+             python bill_counts.py 2019 2020 --rebuild
+             python bill_counts.py --all """
+
 import os
-import json
+import re
+import argparse
+from bill_stats import BillStats, CATEGORIES, chamber
+
+
+def report(stats):
+    total = 0
+    for name in sorted(stats.types.keys()):
+        print('{}  {}'.format(stats.types[name]['last_bill'], name))
+        total += stats.types[name]['last_bill']
+    counts = stats.totals()
+    print('\nTotal = {}\n'.format(total))
+    print_counts(counts)
+
+    for house_or_senate in ['House', 'Senate']:
+        counts = stats.totals(lambda name: chamber(name) == house_or_senate)
+        print('\n{}: {} became law, {} passed chamber, {} referred to committee, {} on calendar, {} introduced'
+              .format(house_or_senate, counts['law'], counts['passed'], counts['referred'], counts['calendar'],
+                      counts['introduced']))
+
+    law_list = [title for name in sorted(stats.types.keys()) for number, title in stats.types[name]['became_law']]
+    print('\nBecame Law ({})\n-------------------'.format(len(law_list)))
+    for item in law_list:
+        print(item)
+
+    confirmed_list = [title for name in sorted(stats.types.keys())
+                      for number, title in stats.types[name]['confirmed']]
+    print('\nConfirmed ({})\n-------------------'.format(len(confirmed_list)))
+    for item in confirmed_list:
+        print(item)
+    return total
+
+
+def print_counts(counts):
+    print('{} became law'.format(counts['law']))
+    print('{} confirmed (total)'.format(counts['confirmed']))
+    print('    {} judges confirmed'.format(counts['judges']))
+    print('    {} Army confirmations'.format(counts['army']))
+    print('    {} Navy confirmations'.format(counts['navy']))
+    print('    {} Marine Corps confirmations'.format(counts['marine_corps']))
+    print('    {} Air Force confirmations'.format(counts['air_force']))
+    print('{} passed chamber'.format(counts['passed']))
+    print('{} referred to committee'.format(counts['referred']))
+    print('{} on calendar'.format(counts['calendar']))
+    print('{} introduced'.format(counts['introduced']))
 
-year = 2019
-file_directory = 'data/congress_bills_{}'.format(year)
-file_list = os.listdir(file_directory)
 
-data_list = []
-for name in file_list:
-    if name.endswith('.json'):
-        with open(file_directory + '/' + name, 'r') as f:
-            data = json.load(f)
-        data_list.append([name, data])
+parser = argparse.ArgumentParser(description='Count the collected bills, resolutions and nominations of years')
+parser.add_argument('years', type=int, nargs='*', help='years to report (default 2019)')
+parser.add_argument('--all', action='store_true', help='report every year collected in the data directory')
+parser.add_argument('--rebuild', action='store_true', help='recount every collected bill instead of using the rollup')
+args = parser.parse_args()
 
-total = 0
-passed = 0
-law = 0
-introduced = 0
-referred = 0
-confirmed = 0
-calendar = 0
-law_list = []
-confirmed_list = []
-judges = 0
-mil_af = 0
-mil_navy = 0
-mil_marines = 0
-mil_army = 0
-for item in data_list:
-    if 'bill_data' in item[1].keys() and 'last_bill' in item[1]['bill_data']:
-        number = item[1]['bill_data']['last_bill']
-        for bill in item[1]['bill_data']['bill']:
-            if 'status' in bill.keys():
-                if bill['status'].find('Agreed to') >= 0:
-                    passed += 1
-                elif bill['status'].find('Became Law') >= 0:
-                    law += 1
-                    law_list.append(bill['title'])
-                elif bill['status'].find('Introduced') >= 0:
-                    introduced += 1
-                elif bill['status'].find('referred to') >= 0:
-                    referred += 1
-                elif bill['status'].find('Referred to') >= 0:
-                    referred += 1
-                elif bill['status'].find('Calendar') >= 0:
-                    calendar += 1
-            elif 'latest_action' in bill.keys():
-                if bill['latest_action'].find('referred to') >= 0:
-                    referred += 1
-                elif bill['latest_action'].find('Confirmed') >= 0:
-                    confirmed += 1
-                    confirmed_list.append(bill['title'])
-                    if bill['title'].find('for The Judiciary') >= 0:
-                        judges += 1
-                    elif bill['title'].find('Air Force') >= 0:
-                        mil_af += 1
-                    elif bill['title'].find('Army') >= 0:
-                        mil_army += 1
-                    elif bill['title'].find('Navy') >= 0:
-                        mil_navy += 1
-                    elif bill['title'].find('Marine Corps') >= 0:
-                        mil_marines += 1
-                elif bill['latest_action'].find('Calendar') >= 0:
-                    calendar += 1
-        print('{}  {}'.format(number, item[0].replace('.json','')))
-        total += number
-print('\nTotal = {}\n'.format(total))
-print('{} became law'.format(law))
-print('{} confirmed (total)'.format(confirmed))
-print('    {} judges confirmed'.format(judges))
-print('    {} Army confirmations'.format(mil_army))
-print('    {} Navy confirmations'.format(mil_navy))
-print('    {} Marine Corps confirmations'.format(mil_marines))
-print('    {} Air Force confirmations'.format(mil_af))
-print('{} passed chamber'.format(passed))
-print('{} referred to committee'.format(referred))
-print('{} on calendar'.format(calendar))
-print('{} introduced'.format(introduced))
+years = args.years
+if args.all is True:
+    years = sorted(int(d.group(1)) for d in [re.fullmatch(r'congress_bills_(\d{4})', name)
+                                             for name in os.listdir('data')] if d is not None)
+elif len(years) == 0:
+    years = [2019]
 
-print('\nBecame Law ({})\n-------------------'.format(law))
-for item in law_list:
-    print(item)
+all_total = 0
+all_counts = dict((category, 0) for category in CATEGORIES)
+# The rollups as reported, so the summary matches them even if a crawl updates one in the meantime
+year_stats = {}
+for year in years:
+    stats = BillStats(year)
+    if args.rebuild is True or not os.path.exists(stats.path):
+        stats.rebuild()
+    year_stats[year] = stats
+    if len(years) > 1:
+        print('\n==================== {} ===================='.format(year))
+    all_total += report(stats)
+    for category, count in stats.totals().items():
+        all_counts[category] += count
 
-print('\nConfirmed ({})\n-------------------'.format(confirmed))
-for item in confirmed_list:
-    print(item)
+if len(years) > 1:
+    print('\n==================== {}-{} ===================='.format(years[0], years[-1]))
+    for year in years:
+        counts = year_stats[year].totals()
+        print('{}: {} became law, {} confirmed, {} passed chamber, {} referred to committee, {} on calendar, '
+              '{} introduced'.format(year, counts['law'], counts['confirmed'], counts['passed'], counts['referred'],
+                                     counts['calendar'], counts['introduced']))
+    print('\nTotal = {}\n'.format(all_total))
+    print_counts(all_counts)
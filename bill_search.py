@@ -0,0 +1,242 @@
+""" Full text search over the collected bills of all years, with an inverted index kept in a SQLite
+    database (data/bill_search.sqlite).
+
+    The title, legislative subjects and text of every bill are split into lower case words, and for
+    each word the index holds the bills it appears in with the positions it appears at, so both words
+    and exact phrases can be looked up without reading any bills. The collectors add each bill to the
+    index as it is collected; a bill collected again is only reindexed if its title, subjects, policy
+    area or text changed. Bills collected before the index existed are added with --index.
+
+    Bills are numbered per Congress, and both years of a Congress collect the same bills, so a bill is
+    indexed once under its Congress, bill type and number, from the latest year it was collected in.
+
+    A query is a list of words and "quoted phrases", all of which must appear in a bill, and can be
+    limited to a policy area and to years.
+
+    Example: python bill_search.py --index 2019 2020
+             python bill_search.py 'veterans "health care"' --policy-area Health --year 2019 """
+
+import re
+import json
+import array
+import sqlite3
+import hashlib
+import argparse
+import threading
+from time import perf_counter
+from bill_store import collected_types
+from blob_store import BlobStore
+
+_tag = re.compile(r'<[^>]*>')
+_word = re.compile(r'[a-z0-9]+')
+_query_part = re.compile(r'"([^"]*)"|(\S+)')
+# Position gap between the title, each subject and the text, so a phrase never spans two of them
+FIELD_GAP = 10
+
+
+def tokenize(text):
+    """ Return the lower case words of text, with any HTML tags removed. """
+    return _word.findall(_tag.sub(' ', text).lower())
+
+
+def bill_terms(bill):
+    """ Return a dictionary of word to the list of its positions in the title, subjects and text of bill. """
+    fields = [bill.get('title') or ''] + list(bill.get('subjects') or []) + [bill.get('text') or '']
+    positions = {}
+    position = 0
+    for field in fields:
+        for word in tokenize(field):
+            positions.setdefault(word, []).append(position)
+            position += 1
+        position += FIELD_GAP
+    return positions
+
+
+def congress_of(year):
+    """ The number of the Congress sitting in a year, e.g. 116 for 2019 and 2020. """
+    return (year - 1787) // 2
+
+
+def content_key(bill):
+    """ A hash of everything indexed about a bill. The text is represented by its SHA-1, which for a bill
+        read back from a store is its blob key, so unchanged bills are recognised without loading their
+        text. """
+    if 'text_blob' in bill.keys():
+        text_key = bill['text_blob']
+    else:
+        text_key = hashlib.sha1((bill.get('text') or '').encode('utf-8')).hexdigest() \
+            if bill.get('text') is not None else None
+    return hashlib.sha1(json.dumps([bill.get('title'), bill.get('policy_area'), bill.get('subjects'),
+                                    text_key]).encode('utf-8')).hexdigest()
+
+
+class BillSearch:
+    def __init__(self, path='data/bill_search.sqlite'):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        columns = [row[1] for row in self.db.execute('PRAGMA table_info(bills)')]
+        if len(columns) > 0 and 'congress' not in columns:
+            # An index keyed by the year's collection holds the bills of a Congress twice, start it again
+            print('{} is rebuilt, add the collected years again with --index'.format(path))
+            self.db.execute('DROP TABLE bills')
+            self.db.execute('DROP TABLE IF EXISTS postings')
+        # collection and year are those of the latest record indexed for the bill
+        self.db.execute('CREATE TABLE IF NOT EXISTS bills ('
+                        'id INTEGER PRIMARY KEY, congress INTEGER, bill_type TEXT, number INTEGER, '
+                        'collection TEXT, year INTEGER, title TEXT, policy_area TEXT, content_key TEXT, '
+                        'UNIQUE (congress, bill_type, number))')
+        self.db.execute('CREATE INDEX IF NOT EXISTS bills_policy_area ON bills (policy_area)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT UNIQUE)')
+        # Positions are an array of unsigned ints saved as bytes
+        self.db.execute('CREATE TABLE IF NOT EXISTS postings ('
+                        'term_id INTEGER, bill_id INTEGER, positions BLOB, PRIMARY KEY (term_id, bill_id)) '
+                        'WITHOUT ROWID')
+        self.db.execute('CREATE INDEX IF NOT EXISTS postings_bill ON postings (bill_id)')
+        self.db.commit()
+        # Word to term id, filled as words are looked up
+        self.term_ids = {}
+
+    def _term_ids(self, words, add=False):
+        """ Return a dictionary of word to term id for the words known to the index, adding the unknown
+            ones first if add is True. """
+        unknown = [word for word in words if word not in self.term_ids]
+        if add is True:
+            self.db.executemany('INSERT OR IGNORE INTO terms (term) VALUES (?)', [(word,) for word in unknown])
+        for start in range(0, len(unknown), 500):
+            batch = unknown[start:start + 500]
+            for term_id, term in self.db.execute('SELECT id, term FROM terms WHERE term IN ({})'
+                                                 .format(', '.join('?' * len(batch))), batch):
+                self.term_ids[term] = term_id
+        return dict((word, self.term_ids[word]) for word in words if word in self.term_ids)
+
+    def add_bill(self, collection, year, bill, commit=True):
+        """ Index a bill of a year's collection (e.g. 'House_bills_2019'), replacing what was indexed for
+            it before. The bill is the same one in both years of a Congress, and a record from an earlier
+            year than the one indexed is left out. Returns False if the bill was already indexed as it is
+            (or from a later year). With commit False, the change is saved by the next commit(). """
+        key = content_key(bill)
+        congress = congress_of(year)
+        bill_type = collection.replace('_{}'.format(year), '')
+        with self.lock:
+            row = self.db.execute('SELECT id, content_key, year FROM bills WHERE congress = ? AND bill_type = ? '
+                                  'AND number = ?', (congress, bill_type, bill['number'])).fetchone()
+            if row is not None and (row[2] > year or row[1] == key):
+                if row[2] < year:
+                    # Collected again in the next year without a change
+                    self.db.execute('UPDATE bills SET collection = ?, year = ? WHERE id = ?', (collection, year,
+                                                                                             row[0]))
+                    if commit is True:
+                        self.db.commit()
+                return False
+        positions = bill_terms(bill)
+        with self.lock:
+            if row is None:
+                bill_id = self.db.execute('INSERT INTO bills (congress, bill_type, number, collection, year, '
+                                          'title, policy_area, content_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                          (congress, bill_type, bill['number'], collection, year,
+                                           bill.get('title'), bill.get('policy_area'), key)).lastrowid
+            else:
+                bill_id = row[0]
+                self.db.execute('UPDATE bills SET collection = ?, year = ?, title = ?, policy_area = ?, '
+                                'content_key = ? WHERE id = ?',
+                                (collection, year, bill.get('title'), bill.get('policy_area'), key, bill_id))
+                self.db.execute('DELETE FROM postings WHERE bill_id = ?', (bill_id,))
+            term_ids = self._term_ids(list(positions.keys()), add=True)
+            # In term order, so the rows go into the postings table in key order
+            self.db.executemany('INSERT INTO postings VALUES (?, ?, ?)',
+                                sorted((term_ids[word], bill_id, array.array('I', word_positions).tobytes())
+                                       for word, word_positions in positions.items()))
+            if commit is True:
+                self.db.commit()
+        return True
+
+    def commit(self):
+        with self.lock:
+            self.db.commit()
+
+    def index_year(self, year):
+        """ Index the collected bills of a year that are not indexed yet or have changed. Returns the
+            number of bills (re)indexed. """
+        indexed = 0
+        for collection, bills in collected_types('data/congress_bills_{}'.format(year), BlobStore()):
+            for bill in bills:
+                if self.add_bill(collection, year, bill, commit=False):
+                    indexed += 1
+                    if indexed % 100 == 0:
+                        self.commit()
+        self.commit()
+        return indexed
+
+    def _postings(self, term_id, bill_ids=None):
+        """ Return a dictionary of bill id to the positions of a term, for all bills or only bill_ids. """
+        rows = self.db.execute('SELECT bill_id, positions FROM postings WHERE term_id = ?', (term_id,))
+        postings = {}
+        for bill_id, positions in rows:
+            if bill_ids is None or bill_id in bill_ids:
+                word_positions = array.array('I')
+                word_positions.frombytes(positions)
+                postings[bill_id] = word_positions
+        return postings
+
+    def _bill_ids(self, term_id):
+        return set(row[0] for row in self.db.execute('SELECT bill_id FROM postings WHERE term_id = ?', (term_id,)))
+
+    def search(self, query, policy_area=None, years=None):
+        """ Return the (collection, number, title) of the bills matching every word and "quoted phrase" of
+            query, optionally only those of a policy area and of the Congresses sitting in the given years,
+            in collection and number order. """
+        phrases = [tokenize(phrase if phrase else word) for phrase, word in _query_part.findall(query)]
+        phrases = [phrase for phrase in phrases if len(phrase) > 0]
+        if len(phrases) == 0:
+            return []
+        with self.lock:
+            term_ids = self._term_ids(sorted(set(word for phrase in phrases for word in phrase)))
+            if any(word not in term_ids for phrase in phrases for word in phrase):
+                return []
+            # Bills with all the words, starting from the rarest word
+            bill_ids = None
+            for word_bill_ids in sorted([self._bill_ids(term_id) for term_id in set(term_ids.values())], key=len):
+                bill_ids = word_bill_ids if bill_ids is None else bill_ids & word_bill_ids
+                if len(bill_ids) == 0:
+                    return []
+            # Keep the bills in which each phrase's words follow one another
+            for phrase in phrases:
+                if len(phrase) < 2:
+                    continue
+                postings = [self._postings(term_ids[word], bill_ids) for word in phrase]
+                bill_ids = set(bill_id for bill_id in bill_ids
+                               if len(set(postings[0][bill_id]).intersection(
+                                   *[set(p - offset for p in postings[offset][bill_id])
+                                     for offset in range(1, len(phrase))])) > 0)
+            sql = 'SELECT collection, number, title FROM bills WHERE id IN ({})'.format(
+                ', '.join(str(bill_id) for bill_id in bill_ids))
+            parameters = []
+            if policy_area is not None:
+                sql += ' AND policy_area = ?'
+                parameters.append(policy_area)
+            if years is not None:
+                congresses = sorted(set(congress_of(year) for year in years))
+                sql += ' AND congress IN ({})'.format(', '.join('?' * len(congresses)))
+                parameters += congresses
+            return self.db.execute(sql + ' ORDER BY collection, number', parameters).fetchall()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Search the collected bills by words and "quoted phrases"')
+    parser.add_argument('query', nargs='?', help='words and "quoted phrases" that must all appear in a bill')
+    parser.add_argument('--policy-area', help='only bills of this policy area, e.g. Health')
+    parser.add_argument('--year', type=int, nargs='+', help='only bills of the Congresses of these years')
+    parser.add_argument('--index', type=int, nargs='+', metavar='YEAR',
+                        help='first add the collected bills of these years to the index')
+    args = parser.parse_args()
+
+    search = BillSearch()
+    for year in args.index or []:
+        started = perf_counter()
+        print('{}: indexed {} bills in {:.1f} s'.format(year, search.index_year(year), perf_counter() - started))
+    if args.query is not None:
+        started = perf_counter()
+        results = search.search(args.query, args.policy_area, args.year)
+        for collection, number, title in results:
+            print('{}  {}'.format(collection, title))
+        print('{} bills found in {:.1f} ms'.format(len(results), (perf_counter() - started) * 1000))
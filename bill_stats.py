@@ -0,0 +1,152 @@
+""" Running statistics of the collected bills, resolutions and nominations of a year, kept in a small
+    rollup file (data/congress_bills_<year>/bill_stats.json) so bill_counts.py can report them without
+    reading any bills.
+
+    The collectors update the rollup as bills are added or change: a new bill is counted, and a bill
+    collected again has its old categories taken off before the new ones are added. For each bill type
+    the rollup also records the size of the bill store it was last brought up to date with; if the store
+    has changed since (e.g. a crawl was interrupted before the rollup was saved), that type is recounted
+    from the store. """
+
+import os
+import json
+import threading
+from bill_store import collected_types
+
+CATEGORIES = ('passed', 'law', 'introduced', 'referred', 'calendar', 'confirmed',
+              'judges', 'army', 'navy', 'marine_corps', 'air_force')
+
+
+def classify(bill):
+    """ Return the list of categories a bill counts in. """
+    categories = []
+    if 'status' in bill.keys():
+        status = bill['status']
+        if status.find('Agreed to') >= 0:
+            categories.append('passed')
+        elif status.find('Became Law') >= 0:
+            categories.append('law')
+        elif status.find('Introduced') >= 0:
+            categories.append('introduced')
+        elif status.find('referred to') >= 0 or status.find('Referred to') >= 0:
+            categories.append('referred')
+        elif status.find('Calendar') >= 0:
+            categories.append('calendar')
+    elif 'latest_action' in bill.keys():
+        action = bill['latest_action']
+        if action.find('referred to') >= 0:
+            categories.append('referred')
+        elif action.find('Confirmed') >= 0:
+            categories.append('confirmed')
+            title = bill['title']
+            if title.find('for The Judiciary') >= 0:
+                categories.append('judges')
+            elif title.find('Air Force') >= 0:
+                categories.append('air_force')
+            elif title.find('Army') >= 0:
+                categories.append('army')
+            elif title.find('Navy') >= 0:
+                categories.append('navy')
+            elif title.find('Marine Corps') >= 0:
+                categories.append('marine_corps')
+        elif action.find('Calendar') >= 0:
+            categories.append('calendar')
+    return categories
+
+
+def chamber(name):
+    """ The chamber of a bill type from its file name, e.g. 'House_bills_2019'. Nominations go to the
+        Senate. """
+    return 'House' if name.startswith('House') else 'Senate'
+
+
+class BillStats:
+    def __init__(self, year, path=None):
+        self.year = year
+        self.path = path if path is not None else 'data/congress_bills_{}/bill_stats.json'.format(year)
+        self.lock = threading.Lock()
+        try:
+            with open(self.path, 'r') as f:
+                self.types = json.load(f)['types']
+        except FileNotFoundError:
+            self.types = {}
+
+    def empty(self, name):
+        return {'chamber': chamber(name), 'last_bill': 0, 'bills': 0, 'store_size': 0,
+                'counts': dict((category, 0) for category in CATEGORIES), 'became_law': [], 'confirmed': []}
+
+    def _count(self, entry, bill, step):
+        """ Add (step 1) or take off (step -1) a bill's categories and list entries. """
+        categories = classify(bill)
+        entry['bills'] += step
+        for category in categories:
+            entry['counts'][category] += step
+        for category, listed in [('law', 'became_law'), ('confirmed', 'confirmed')]:
+            if category in categories:
+                if step > 0:
+                    entry[listed].append([bill['number'], bill['title']])
+                    entry[listed].sort()
+                elif [bill['number'], bill['title']] in entry[listed]:
+                    entry[listed].remove([bill['number'], bill['title']])
+
+    def update(self, name, old_bill, new_bill):
+        """ Count new_bill for the bill type, in place of old_bill if it was collected before. """
+        with self.lock:
+            entry = self.types.setdefault(name, self.empty(name))
+            if old_bill is not None:
+                self._count(entry, old_bill, -1)
+            self._count(entry, new_bill, 1)
+            entry['last_bill'] = max(entry['last_bill'], new_bill['number'])
+
+    def rebuild_type(self, name, bills):
+        """ Recount a bill type from all of its bills. """
+        entry = self.empty(name)
+        for bill in bills:
+            self._count(entry, bill, 1)
+            entry['last_bill'] = max(entry['last_bill'], bill['number'])
+        with self.lock:
+            self.types[name] = entry
+
+    def check(self, name, store):
+        """ Recount a bill type from its store if the rollup was not brought up to date with it. """
+        if name not in self.types or self.types[name]['store_size'] != os.path.getsize(store.data_path):
+            self.rebuild_type(name, store.bills())
+
+    def finish(self, name, store):
+        """ Note the store size the bill type is up to date with and save the rollup. Call this after the
+            store is closed. """
+        with self.lock:
+            entry = self.types.setdefault(name, self.empty(name))
+            entry['store_size'] = os.path.getsize(store.data_path)
+        self.save()
+
+    def rebuild(self, bills_dir=None, save=True):
+        """ Recount every bill type found in the year's bill directory, from the bill stores or, for types
+            collected before the stores existed, the <Type>_<year>.json files. With save False the recount
+            is only kept in memory. """
+        if bills_dir is None:
+            bills_dir = os.path.dirname(self.path)
+        with self.lock:
+            self.types = {}
+        for name, bills in collected_types(bills_dir):
+            self.rebuild_type(name, bills)
+            if os.path.exists('{}/{}.jsonl'.format(bills_dir, name)):
+                self.types[name]['store_size'] = os.path.getsize('{}/{}.jsonl'.format(bills_dir, name))
+        if save is True:
+            self.save()
+
+    def save(self):
+        with self.lock:
+            with open(self.path + '.tmp', 'w') as f:
+                json.dump({'year': self.year, 'types': self.types}, f)
+            os.replace(self.path + '.tmp', self.path)
+
+    def totals(self, group=None):
+        """ Return the counts summed over all bill types, or over the types for which group(name) is
+            True, e.g. lambda name: chamber(name) == 'House'. """
+        counts = dict((category, 0) for category in CATEGORIES)
+        for name, entry in self.types.items():
+            if group is None or group(name):
+                for category in CATEGORIES:
+                    counts[category] += entry['counts'][category]
+        return counts
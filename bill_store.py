@@ -0,0 +1,230 @@
+""" Append-only store for collected bills (or nominations) of one type and year.
+
+    Bills are written to a JSON Lines file (<name>.jsonl, one bill per line) as soon as they are parsed,
+    so a crawl never has to hold the whole collection in memory and a crash loses at most the bill that
+    was being written. A small index file (<name>.index.json) is checkpointed periodically with the byte
+    offset of the latest record of every bill number, the last bill number and the length of the data
+    file at the checkpoint. On open, only the records appended after the last checkpoint (the tail of
+    the data file) are read back, which is all new_only resumes need.
+
+    A bill collected again (e.g. after its status changed) is appended as a new record, and the index
+    then points at the newest one. Once more than compact_share of the records in the data file are such
+    replaced ones, the next checkpoint compacts the store: the latest records are written to a new file
+    that is swapped in with os.replace. Until the new index is saved, the index on disk has the whole
+    data file read again on open, so a crash at any point leaves a store that opens correctly.
+
+    With a BlobStore (blob_store.py), the large BLOB_FIELDS are saved there and the records hold
+    <field>_blob references instead. Bills read back are then BlobBill records, which load those
+    fields only when they are accessed.
+
+    A store opened with read_only=True never writes: a record cut short at the end of the data file is
+    skipped rather than truncated, and no index is checkpointed. Readers of a store that a crawl may be
+    writing at the same time open it this way. """
+
+import os
+import json
+from blob_store import BlobBill
+from json_stream import JsonArrayReader
+
+
+class BillStore:
+    # Bill fields kept in the blob store rather than in the record
+    BLOB_FIELDS = ('text', 'cosponsors_table')
+
+    def __init__(self, path_base, checkpoint_every=50, blobs=None, read_only=False, compact_share=0.5):
+        self.data_path = path_base + '.jsonl'
+        self.index_path = path_base + '.index.json'
+        self.blobs = blobs
+        self.read_only = read_only
+        # Number of appended bills between index checkpoints
+        self.checkpoint_every = checkpoint_every
+        # Share of replaced records in the data file above which a checkpoint compacts it
+        self.compact_share = compact_share
+        # Bill number to byte offset of its latest record in the data file
+        self.offsets = {}
+        # Number of records in the data file, replaced ones included
+        self.records = 0
+        self.last_bill = 0
+        self.unsaved = 0
+        self._load()
+        self.data = open(self.data_path, 'ab') if read_only is False else None
+
+    def _load(self):
+        end = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            self.last_bill = index['last_bill']
+            self.offsets = dict((int(number), offset) for number, offset in index['offsets'].items())
+            end = index['end']
+            # Indexes saved before records were counted, taken to have no replaced records
+            self.records = index.get('records', len(self.offsets))
+        if not os.path.exists(self.data_path):
+            if self.read_only is True:
+                return
+            open(self.data_path, 'wb').close()
+        # Pick up the bills appended after the last checkpoint
+        with open(self.data_path, 'rb' if self.read_only is True else 'r+b') as f:
+            f.seek(end)
+            offset = end
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # A record cut short by a crash (or still being written), drop it
+                    if self.read_only is False:
+                        f.truncate(offset)
+                    break
+                bill = json.loads(line)
+                self.offsets[bill['number']] = offset
+                self.last_bill = max(self.last_bill, bill['number'])
+                self.records += 1
+                offset += len(line)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, number):
+        return number in self.offsets
+
+    def _record(self, bill):
+        """ The record saved for a bill, with its blob fields replaced by references. """
+        if self.blobs is None:
+            return bill
+        record = {}
+        for key, value in bill.items():
+            if key in self.BLOB_FIELDS and isinstance(value, str):
+                record[key + '_blob'] = self.blobs.put(value)
+            else:
+                record[key] = value
+        return record
+
+    def _bill(self, line):
+        record = json.loads(line)
+        if self.blobs is None:
+            return record
+        return BlobBill(record, self.blobs)
+
+    def _writable(self):
+        if self.read_only is True:
+            raise ValueError('{} is open read only'.format(self.data_path))
+
+    def append(self, bill):
+        """ Write a bill to the end of the store, replacing any earlier record of the same number. """
+        self._writable()
+        offset = self.data.tell()
+        self.data.write(json.dumps(self._record(bill)).encode('utf-8') + b'\n')
+        self.data.flush()
+        self.offsets[bill['number']] = offset
+        self.last_bill = max(self.last_bill, bill['number'])
+        self.records += 1
+        self.unsaved += 1
+        if self.unsaved >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """ Save the index, compacting the data file first if too many of its records were replaced.
+            The data file is synced first so the index never points past it. """
+        self._writable()
+        self.data.flush()
+        os.fsync(self.data.fileno())
+        if self.records > 0 and (self.records - len(self.offsets)) / self.records > self.compact_share:
+            self.compact()
+        self._save_index(self.data.tell(), self.offsets, self.records)
+        self.unsaved = 0
+
+    def _save_index(self, end, offsets, records):
+        index = {'last_bill': self.last_bill, 'end': end, 'records': records,
+                 'offsets': dict((str(number), offset) for number, offset in offsets.items())}
+        with open(self.index_path + '.tmp', 'w') as f:
+            json.dump(index, f)
+        os.replace(self.index_path + '.tmp', self.index_path)
+
+    def compact(self):
+        """ Rewrite the data file with only the latest record of every bill, in bill number order. The
+            caller saves the index afterwards (checkpoint does). """
+        self._writable()
+        self.data.flush()
+        offsets = {}
+        with open(self.data_path + '.tmp', 'wb') as f:
+            for number, line in self._lines():
+                offsets[number] = f.tell()
+                f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        # Have the whole data file read again on open until the index of the new one is saved
+        self._save_index(0, {}, 0)
+        self.data.close()
+        os.replace(self.data_path + '.tmp', self.data_path)
+        self.data = open(self.data_path, 'ab')
+        self.offsets = offsets
+        self.records = len(offsets)
+
+    def get(self, number):
+        """ Return the latest record of a bill number, or None if it is not in the store. """
+        if number not in self.offsets:
+            return None
+        if self.data is not None:
+            self.data.flush()
+        with open(self.data_path, 'rb') as f:
+            f.seek(self.offsets[number])
+            return self._bill(f.readline())
+
+    def bills(self):
+        """ Yield the latest record of every bill in bill number order, one at a time. """
+        for number, line in self._lines():
+            yield self._bill(line)
+
+    def _lines(self):
+        """ Yield (number, record line) for the latest record of every bill in bill number order. The
+            offsets are taken when reading starts, so a compaction meanwhile does not disturb it. """
+        if len(self.offsets) == 0:
+            return
+        if self.data is not None:
+            self.data.flush()
+        with open(self.data_path, 'rb') as f:
+            position = 0
+            for number, offset in sorted(self.offsets.items()):
+                if offset != position:
+                    f.seek(offset)
+                line = f.readline()
+                position = offset + len(line)
+                yield number, line
+
+    def reset(self):
+        """ Empty the store, for a full recrawl. """
+        self._writable()
+        self.data.close()
+        self.data = open(self.data_path, 'wb')
+        self.offsets = {}
+        self.records = 0
+        self.last_bill = 0
+        self.checkpoint()
+
+    def close(self):
+        if self.read_only is True:
+            return
+        self.checkpoint()
+        self.data.close()
+
+
+def collected_types(bills_dir, blobs=None):
+    """ Yield (name, bills) for every bill type collected in a congress_bills_<year> directory, e.g.
+        ('House_bills_2019', iterator of bills). Bills come from the type's store or, for types collected
+        before the stores existed, its <name>.json file, read incrementally. The stores are opened read
+        only, so this can run while a crawl is writing them. Each type's bills must be used before moving
+        on to the next type. """
+    for file_name in sorted(os.listdir(bills_dir)):
+        name, extension = os.path.splitext(file_name)
+        if '.' in name:
+            # Store index and other side files
+            continue
+        if extension == '.jsonl':
+            store = BillStore('{}/{}'.format(bills_dir, name), blobs=blobs, read_only=True)
+            yield name, store.bills()
+        elif extension == '.json' and not os.path.exists('{}/{}.jsonl'.format(bills_dir, name)):
+            # Read the bills one at a time rather than loading the whole file
+            with open('{}/{}'.format(bills_dir, file_name), 'r') as f:
+                try:
+                    bills = JsonArrayReader(f, ['bill_data', 'bill'])
+                except KeyError:
+                    continue
+                yield name, iter(bills)
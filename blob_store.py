@@ -0,0 +1,80 @@
+""" Content-addressed store for the large text fields of bills (the bill text and the cosponsors table
+    HTML), so bill records and the <Type>_<year>.json files only hold a short reference to them.
+
+    Each blob is zlib-compressed and saved under the SHA-1 of its text, so identical texts (e.g. the
+    same bill text reached from several records after a refresh) are stored once. Blobs are never
+    changed once written, which makes them safe to share between bill types and years.
+
+    BlobBill wraps a bill record read back from a store and loads its blob fields on first access. """
+
+import os
+import zlib
+import hashlib
+import threading
+
+
+class BlobStore:
+    def __init__(self, blob_dir='data/bill_blobs'):
+        self.blob_dir = blob_dir
+        if not os.path.isdir(self.blob_dir):
+            os.makedirs(self.blob_dir)
+
+    def _path(self, key):
+        # Spread the blob files over 256 subdirectories to keep directory listings short
+        return '{}/{}/{}'.format(self.blob_dir, key[:2], key[2:])
+
+    def put(self, text):
+        """ Save text (a string) and return its key. Text already in the store is not written again. """
+        data = text.encode('utf-8')
+        key = hashlib.sha1(data).hexdigest()
+        path = self._path(key)
+        if not os.path.exists(path):
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary name first, so a blob file is either complete or absent. The name is
+            # unique to the process and thread, as threads of one crawl may save the same text at once
+            temporary = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+            try:
+                with open(temporary, 'wb') as f:
+                    f.write(zlib.compress(data))
+                os.replace(temporary, path)
+            except OSError:
+                # Saved by another thread or process meanwhile, the blob is the same
+                if not os.path.exists(path):
+                    raise
+            finally:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+        return key
+
+    def get(self, key):
+        """ Return the text saved under key. """
+        with open(self._path(key), 'rb') as f:
+            return zlib.decompress(f.read()).decode('utf-8')
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+
+class BlobBill(dict):
+    """ A bill record in which each blob field (e.g. 'text') is held as a reference ('text_blob') and
+        loaded from the blob store when it is first read. """
+    def __init__(self, record, blobs):
+        super().__init__(record)
+        self.blobs = blobs
+
+    def __missing__(self, key):
+        reference = dict.get(self, key + '_blob')
+        if reference is None:
+            raise KeyError(key)
+        return self.blobs.get(reference)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def has_field(self, key):
+        """ True if the record has key, either inline or as a blob reference. """
+        return key in self.keys() or key + '_blob' in self.keys()
@@ -1,15 +1,109 @@
 import os
 from datetime import datetime as dt
-import requests
+import http_fetch
+from http_fetch import fetch
+from response_cache import ResponseCache
+from range_discovery import find_last_number
+from bill_store import BillStore
+from json_stream import JsonArrayReader
+from bill_stats import BillStats
+from blob_store import BlobStore
+from crawl_manifest import CrawlManifest
+from bill_search import BillSearch
+from legislators import LegislatorTable, parse_sponsor, parse_cosponsor, party_name
+from page_extractor import parse_bill_page, parse_nomination_page, parse_text_page, parse_cosponsors_page, \
+    parse_subjects_page, parse_cosponsor_count
 import re
 import json
+import queue
+import hashlib
+import itertools
+import threading
+from collections import deque
+from time import perf_counter, time
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+
+
+class PriorityPool:
+    """ A pool of worker threads that always runs the waiting task of highest priority (the lowest
+        priority number, in submission order among equals). crawl_all shares one between all bill types,
+        each type submitting through its own PriorityPool.Lane, so the workers go to the types in the
+        order they are ranked and a lower ranked type only gets those the higher ones leave idle. """
+    class Lane:
+        """ The submit() of one priority, so a lane can stand in for a ThreadPoolExecutor. """
+        def __init__(self, pool, priority):
+            self.pool = pool
+            self.priority = priority
+
+        def submit(self, fn, *args):
+            return self.pool.submit(self.priority, fn, *args)
+
+    def __init__(self, max_workers):
+        self.tasks = queue.PriorityQueue()
+        # Keeps submission order among tasks of the same priority (and Futures are never compared)
+        self.sequence = itertools.count()
+        self.threads = [threading.Thread(target=self._work, daemon=True) for _ in range(max_workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def lane(self, priority):
+        return PriorityPool.Lane(self, priority)
+
+    def submit(self, priority, fn, *args):
+        future = Future()
+        self.tasks.put((priority, next(self.sequence), future, fn, args))
+        return future
+
+    def _work(self):
+        while True:
+            priority, sequence, future, fn, args = self.tasks.get()
+            if future is None:
+                # Shut down, every task submitted before was run
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def shutdown(self):
+        for _ in self.threads:
+            self.tasks.put((float('inf'), next(self.sequence), None, None, None))
+        for thread in self.threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
 
 
 class CollectCongressBills:
-    def __init__(self, year, show_cosponsors_table=False, dbg_print=False):
+    # Bill fields filled in from the sub-pages rather than the main page
+    SUB_PAGE_FIELDS = ('text', 'cosponsors_list', 'cosponsors_table', 'subjects')
+    # How often a refresh rechecks a bill: (days since its latest action, days between rechecks).
+    # Bills with recent activity are checked on every refresh, dormant ones monthly
+    REFRESH_SCHEDULE = [(30, 0), (180, 7), (None, 30)]
+
+    def __init__(self, year, show_cosponsors_table=False, dbg_print=False, page_workers=8, page_size=None,
+                 legislators=None, search_index=None, manifest=None):
         self.year = year
         self.show_cosponsors_table = show_cosponsors_table
+        # Number of bills per HTML page, or None (or 0) to list all the bills on one page
+        if page_size is not None and page_size < 0:
+            raise ValueError('page_size must be a number of bills, or 0 or None for a single page')
+        self.page_size = page_size if page_size else None
         self.DEBUG_PRINT = dbg_print
+        # Number of bill pages (and, separately, bill sub-pages) fetched at the same time
+        self.page_workers = page_workers
+        # Bill type to its (page, sub-page) lanes of the worker pools shared by all bill types while
+        # crawl_all is running
+        self.shared_pools = None
+        # Bill type to [done, total] of the crawl in progress, and how often crawl_all reports it
+        self.progress = {}
+        self.progress_seconds = 10
         self.year = year
         self.Congress_start_year = 1787
         self.Sessions_per_Congress = 2
@@ -34,6 +128,22 @@ class CollectCongressBills:
             os.mkdir(self.congress_bills_dir)
             self.collected_congress_bills = os.listdir(self.congress_bills_dir)
 
+        # Bill texts and cosponsor tables are kept out of the bill records, in a shared blob store
+        self.blobs = BlobStore()
+
+        # Counts of the collected bills by status, kept up to date for bill_counts.py
+        self.stats = BillStats(self.year)
+
+        # Sponsors and cosponsors are kept in the legislator table, bills refer to them by member id.
+        # The table, search index and manifest can be passed in to share them between collectors
+        self.legislators = legislators if legislators is not None else LegislatorTable()
+
+        # Full text index of the bills of all years, for bill_search.py
+        self.search_index = search_index if search_index is not None else BillSearch()
+
+        # The crawl manifest keeps, per bill, when it was last checked and a hash of its main page summary
+        self.manifest = manifest if manifest is not None else CrawlManifest()
+
         # HTML page directory path
         if 'html' not in os.listdir('.'):
             os.mkdir('html')
@@ -70,330 +180,504 @@ class CollectCongressBills:
                           }
 
     def get_text(self, page):
-        text = None
-        r = requests.get(page + '?format=txt')
+        r = fetch(page + '?format=txt')
         if r.status_code == 200:
-            search_for = '<pre id="billTextContainer">'
-            text_start = r.text.find(search_for)
-            if text_start >= 0:
-                text_start += len(search_for)
-                text_end = r.text[text_start:].find('</pre>')
-                if text_end >= 0:
-                    text_end += text_start
-                    text = r.text[text_start:text_end]
-            if text is None:
-                text = re.search('class="primary">.*<p>(.*?)</p>.*</main>', r.text)
-                if text is not None:
-                    text = text.group(1)
-        return text
+            return parse_text_page(r.text)
+        return None
 
     def get_cosponsors_list(self, page):
-        cosponsors_table = None
-        clist = []
-        r = requests.get(page)
+        r = fetch(page)
         if r.status_code == 200:
-            table_start = r.text.find('<table class="item_table">')
-            if table_start >= 0:
-                table_end = r.text[table_start:].find('</table>')
-                if table_end >= 0:
-                    table_end += table_start + len('</table>')
-                    cosponsors_table = r.text[table_start:table_end]
-                    # Parse the cosponsors list to get count and names
-                    clist = re.findall(r'">(.*?)\.\W(.*?)\W\[(.?)-(.*?)\]', cosponsors_table)
-        return cosponsors_table, clist
+            return parse_cosponsors_page(r.text)
+        return None, []
 
     def get_legislative_subjects(self, page):
-        subjects = []
-        r = requests.get(page)
+        r = fetch(page)
         if r.status_code == 200:
-            subjects_start = r.text.find('>Legislative Subjects<')
-            if subjects_start >= 0:
-                subjects_end = r.text[subjects_start:].find('<!-- end row -->')
-                if subjects_end >= 0:
-                    subjects_end += subjects_start
-                    subjects = re.findall(r'<li><a.*?>(.*?)</a></li>', r.text[subjects_start:subjects_end])
-        return subjects
-
-    def collect_bills(self, bill_type, new_only=False, limit=None):
-        if new_only is False or '{}{}.json'.format(self.bill_type[bill_type]['filename_base'], self.year)\
-                not in self.collected_congress_bills:
-            collected_bills = {'bill_data': {'last_bill': 0, 'bill': []}}
-            start_number = 1
-        else:
-            with open('{}/{}{}.json'.format(self.congress_bills_dir,
-                                            self.bill_type[bill_type]['filename_base'],
-                                            self.year), 'r') as f:
-                collected_bills = json.load(f)
-            start_number = collected_bills['bill_data']['last_bill'] + 1
+            return parse_subjects_page(r.text)
+        return []
 
-        # Collect the bills from congress.gov
+    def bill_available(self, bill_type, number):
+        return fetch(self.bill_type[bill_type]['url_base'].format(self.congress, number)).status_code == 200
+
+    def find_last_bill(self, bill_type, known=0, limit=100000):
+        """ Locate the highest bill (or nomination) number of bill_type available on congress.gov, so the
+            crawl has a known work list rather than probing until the first missing page. """
+        last_number = find_last_number(lambda number: self.bill_available(bill_type, number), known, limit)
+        self.debug_print('{}: last number is {}'.format(self.bill_type[bill_type]['page_title'], last_number))
+        return last_number
+
+    def max_bill_number(self, limit=None):
         if limit is None:
-            max_bill_number = 100000
+            return 100000
+        return limit
+
+    def store_path(self, bill_type):
+        return '{}/{}{}'.format(self.congress_bills_dir, self.bill_type[bill_type]['filename_base'], self.year)
+
+    def open_store(self, bill_type, new_only=False):
+        """ Return the bill store of bill_type. It is emptied unless only new bills are wanted, and a new
+            store is filled from the JSON file written before the store existed, if there is one. """
+        store = BillStore(self.store_path(bill_type), blobs=self.blobs)
+        if new_only is False:
+            store.reset()
+        elif len(store) == 0 and os.path.exists(self.store_path(bill_type) + '.json'):
+            with open(self.store_path(bill_type) + '.json', 'r') as f:
+                for bill in JsonArrayReader(f, ['bill_data', 'bill']):
+                    self.intern_members(bill_type, bill)
+                    store.append(bill)
+            store.checkpoint()
+        return store
+
+    def plan_bills(self, bill_type, new_only=False, limit=None):
+        """ Return the (first, last) bill numbers a collect_type call would fetch for bill_type. """
+        start_number = 1
+        if new_only is True:
+            store = self.open_store(bill_type, new_only)
+            start_number = store.last_bill + 1
+            store.close()
+        return start_number, self.find_last_bill(bill_type, start_number - 1, self.max_bill_number(limit))
+
+    def collect_type(self, bill_type, new_only=False, limit=None, last_number=None, refresh=False):
+        """ Collect bill_type with collect_nominations or collect_bills as appropriate. """
+        if bill_type == 'nominations':
+            self.collect_nominations(bill_type, new_only, limit, last_number, refresh)
+        else:
+            self.collect_bills(bill_type, new_only, limit, last_number, refresh)
+
+    def stats_name(self, bill_type):
+        """ The name of bill_type in the statistics rollup, e.g. 'House_bills_2019'. """
+        return '{}{}'.format(self.bill_type[bill_type]['filename_base'], self.year)
+
+    def collection(self, bill_type):
+        """ The crawl manifest collection name of bill_type, e.g. 'house_bills_2019'. """
+        return '{}_{}'.format(bill_type, self.year)
+
+    def page_summary(self, text, bill):
+        """ Return the main page summary of a bill as bytes: its main page fields and the cosponsor count
+            shown on the page. A change in the summary means the bill needs collecting again. """
+        summary = dict((key, value) for key, value in bill.items() if key not in self.SUB_PAGE_FIELDS)
+        summary['cosponsor_count'] = parse_cosponsor_count(text)
+        return json.dumps(summary, sort_keys=True).encode('utf-8')
+
+    def summary_changed(self, bill_type, number, summary):
+        item = self.manifest.item(self.collection(bill_type), number)
+        return item is None or item['content_hash'] != hashlib.sha1(summary).hexdigest()
+
+    def collect_bill(self, bill_type, number, sub_pool, previous=None):
+        """ Fetch and parse the main page of one bill. The cosponsors, text and legislative subjects pages
+            are queued on sub_pool rather than fetched here, and the bill gets placeholders for them.
+            Returns the bill, the sub-page futures and the page summary, or (None, None, None) if the bill
+            page is not found. When refreshing a collected bill (previous) whose summary has not changed,
+            previous is returned as it is and no sub-pages are fetched. """
+        url = self.bill_type[bill_type]['url_base'].format(self.congress, number)
+        self.debug_print('Trying: {}'.format(url))
+        r = fetch(url)
+        if r.status_code != 200:
+            return None, None, None
+        bill = parse_bill_page(r.text, url, number)
+        summary = self.page_summary(r.text, bill)
+        if previous is not None and not self.summary_changed(bill_type, number, summary):
+            return previous, {}, summary
+        sub_pages = {'cosponsors': sub_pool.submit(self.get_cosponsors_list, url + '/cosponsors'),
+                     'text': sub_pool.submit(self.get_text, url + '/text')}
+        if 'subjects_url' in bill.keys():
+            sub_pages['subjects'] = sub_pool.submit(self.get_legislative_subjects, bill['subjects_url'])
+        return bill, sub_pages, summary
+
+    def collect_nomination(self, bill_type, number, sub_pool, previous=None):
+        """ Fetch and parse one nomination page. Nominations have no sub-pages, so the returned sub-page
+            dictionary is always empty. Returns (None, None, None) if the nomination page is not found, and
+            previous (when refreshing) if the page summary has not changed. """
+        url = self.bill_type[bill_type]['url_base'].format(self.congress, number)
+        self.debug_print('Trying: {}'.format(url))
+        r = fetch(url)
+        if r.status_code != 200:
+            return None, None, None
+        bill = parse_nomination_page(r.text, url, number)
+        summary = self.page_summary(r.text, bill)
+        if previous is not None and not self.summary_changed(bill_type, number, summary):
+            return previous, {}, summary
+        return bill, {}, summary
+
+    def complete_bill(self, bill, sub_pages):
+        """ Wait for the sub-page fetches of a bill and fill in their results. """
+        if 'cosponsors' in sub_pages.keys():
+            bill['cosponsors_table'], bill['cosponsors_list'] = sub_pages['cosponsors'].result()
+        if 'text' in sub_pages.keys():
+            bill['text'] = sub_pages['text'].result()
+        if 'subjects' in sub_pages.keys():
+            bill['subjects'] = sub_pages['subjects'].result()
+
+    def refresh_due(self, bill_type, bill, now):
+        """ Return True if a collected bill is due to be checked again, see REFRESH_SCHEDULE. """
+        item = self.manifest.item(self.collection(bill_type), bill['number'])
+        if item is None:
+            return True
+        action_date = re.search(r'(\d{2}/\d{2}/\d{4})', bill.get('latest_action') or '')
+        if action_date is None:
+            idle_days = None
         else:
-            max_bill_number = limit
-        for number in range(start_number, max_bill_number):
-            url = self.bill_type[bill_type]['url_base'].format(self.congress, number)
-            self.debug_print('Trying: {}'.format(url))
-            r = requests.get(url)
-            if r.status_code == 200:
-                title_start = r.text.find('<title>') + len('<title>')
-                title_end = r.text.find('</title>')
-                tracker_start = r.text.find('<p class="hide_fromsighted">')
-                cosponsors_table, cosponsors_list = self.get_cosponsors_list(url + '/cosponsors')
-                bill = {'title': r.text[title_start:title_end],
-                        'url': url + '/text',
-                        'number': number,
-                        'cosponsors': url + '/cosponsors',
-                        'text': self.get_text(url + '/text'),
-                        'cosponsors_list': cosponsors_list,
-                        'cosponsors_table': cosponsors_table}
-                if tracker_start >= 0:
-                    tracker_start += len('<p class="hide_fromsighted">')
-                    tracker_end = r.text[tracker_start:].find('</p>')
-                    bill['status'] = r.text[tracker_start:tracker_start+tracker_end]
-                    # Check for Sponsor
-                    sponsor_start = r.text.find('Sponsor:')
-                    if sponsor_start >= 0:
-                        sponsor_at = re.search(r'<td><a\W.*>(.*?)</a>(.*?)</td>', r.text[sponsor_start:])
-                        if sponsor_at is not None:
-                            sponsor = sponsor_at.group(1)
-                            sponsor_intro = sponsor_at.group(2)
-                            bill['sponsor'] = sponsor
-                            bill['introduced'] = sponsor_intro
-                            if sponsor.find('[R-') >= 0:
-                                party = 'Republican'
-                            elif sponsor.find('[D-') >= 0:
-                                party = 'Democratic'
-                            else:
-                                party = 'Independent'
-                            bill['party'] = party
-                    # Check for Committee
-                    committee_start = r.text.find('Committees:')
-                    if committee_start >= 0:
-                        committees = re.search('<td>(.*?)</td>', r.text[committee_start:])
-                        if committees is not None:
-                            bill['committees'] = committees.group(1)
-                    # Check for Committee Report
-                    committee_reports_start = r.text.find('Committee Reports:')
-                    if committee_reports_start >= 0:
-                        committee_reports = re.search(r'<td><a\W.*?href="(.*?)">(.*?)</a></td>',
-                                                      r.text[committee_reports_start:])
-                        if committee_reports is not None:
-                            bill['committee_reports'] = committee_reports.group(2)
-                            bill['committee_reports_url'] = committee_reports.group(1)
-                    # Check for Latest Action
-                    action_start = r.text.find('Latest Action:')
-                    if action_start >= 0:
-                        action = re.search(r'<td>(.*?)\(<a\W.*?href="(.*?)">(.*?)</a>.*</td>', r.text[action_start:])
-                        if action is not None:
-                            bill['latest_action'] = action.group(1)
-                            bill['all_actions_url'] = action.group(2)
-                    policy_start = r.text.find('Policy Area:<')
-                    if policy_start >= 0:
-                        policy = re.search(r'<li>(.*?)</li>', r.text[policy_start:])
-                        if policy is not None:
-                            bill['policy_area'] = policy.group(1)
-                            subjects = re.search(r'<li><a\W.*?href="(.*?)">', r.text[policy_start:])
-                            if subjects is not None:
-                                bill['subjects_url'] = 'https://www.congress.gov' + subjects.group(1)
-                                bill['subjects'] = self.get_legislative_subjects(bill['subjects_url'])
+            idle_days = (now - dt.strptime(action_date.group(1), '%m/%d/%Y').timestamp()) / 86400
+        for active_days, recheck_days in self.REFRESH_SCHEDULE:
+            if active_days is None or (idle_days is not None and idle_days <= active_days):
+                return now - item['last_attempt'] >= recheck_days * 86400
+
+    def intern_members(self, bill_type, bill):
+        """ Add the sponsor and cosponsors of a bill to the legislator table and refer to them by id: the
+            bill's sponsor and party are replaced by a sponsor_id, and its cosponsors_list by cosponsor_ids.
+            A sponsor that can not be parsed is kept as it is. """
+        sponsor_id = None
+        if 'sponsor' in bill.keys():
+            sponsor = parse_sponsor(bill['sponsor'])
+            if sponsor is not None:
+                sponsor_id = self.legislators.member_id(*sponsor)
+        cosponsor_ids = []
+        if bill.get('cosponsors_list') is not None:
+            cosponsor_ids = [self.legislators.member_id(*parse_cosponsor(cosponsor))
+                             for cosponsor in bill['cosponsors_list']]
+        if sponsor_id is not None or bill.get('cosponsors_list') is not None:
+            # Keep the fields in the same place in the bill
+            fields = list(bill.items())
+            bill.clear()
+            for key, value in fields:
+                if key == 'sponsor' and sponsor_id is not None:
+                    bill['sponsor_id'] = sponsor_id
+                elif key == 'party' and sponsor_id is not None:
+                    continue
+                elif key == 'cosponsors_list':
+                    bill['cosponsor_ids'] = cosponsor_ids
                 else:
-                    bill['reserved'] = True
-                collected_bills['bill_data']['last_bill'] = number
-                collected_bills['bill_data']['bill'].append(bill)
-            else:
-                print('Not found')
+                    bill[key] = value
+        if sponsor_id is not None or len(cosponsor_ids) > 0:
+            self.legislators.record_bill(self.collection(bill_type), bill['number'], sponsor_id, cosponsor_ids)
+
+    def crawl_pages(self, bill_type, collect_page, store, numbers, page_pool, sub_pool):
+        """ Collect the bill numbers with collect_page (collect_bill or collect_nomination). Pages for up
+            to 2 * page_workers bills and their sub-pages are in flight at the same time, and each finished
+            bill is appended to the store in the order of numbers. A number already in the store is
+            refreshed: it is only appended again if its page summary changed. """
+        total = len(numbers)
+        self.progress[bill_type] = [0, total]
+        collection = self.collection(bill_type)
+        numbers = iter(numbers)
+        in_flight = deque()
+        while True:
+            # Keep the window of bills being fetched full
+            while len(in_flight) < 2 * self.page_workers:
+                number = next(numbers, None)
+                if number is None:
+                    break
+                previous = store.get(number)
+                in_flight.append((number, previous, page_pool.submit(collect_page, bill_type, number, sub_pool,
+                                                                     previous)))
+            if len(in_flight) == 0:
                 break
-        self.update_html(bill_type, collected_bills)
+            number, previous, future = in_flight.popleft()
+            bill, sub_pages, summary = future.result()
+            self.progress[bill_type][0] += 1
+            if bill is None:
+                # A gap in the numbering, move on to the next one
+                print('Not found')
+                continue
+            if bill is previous:
+                # Refreshed and unchanged, only the time of the check is recorded
+                self.manifest.record(collection, number, 'done', 200, summary)
+                continue
+            self.complete_bill(bill, sub_pages)
+            self.intern_members(bill_type, bill)
+            self.debug_print('[{}/{}] Collected: {}'.format(self.progress[bill_type][0], total, bill['title']))
+            store.append(bill)
+            self.stats.update(self.stats_name(bill_type), previous, bill)
+            self.search_index.add_bill(self.stats_name(bill_type), self.year, bill)
+            self.manifest.record(collection, number, 'done', 200, summary)
 
-    def collect_nominations(self, bill_type, new_only=False, limit=None):
-        if new_only is False or '{}{}.json'.format(self.bill_type[bill_type]['filename_base'], self.year)\
-                not in self.collected_congress_bills:
-            collected_bills = {'bill_data': {'last_bill': 0, 'bill': []}}
-            start_number = 1
-        else:
-            with open('{}/{}{}.json'.format(self.congress_bills_dir,
-                                            self.bill_type[bill_type]['filename_base'],
-                                            self.year), 'r') as f:
-                collected_bills = json.load(f)
-            start_number = collected_bills['bill_data']['last_bill'] + 1
+    def collect_pages(self, bill_type, collect_page, new_only, limit, last_number, refresh=False):
+        store = self.open_store(bill_type, new_only)
+        start_number = store.last_bill + 1
+        self.stats.check(self.stats_name(bill_type), store)
+        try:
+            # Collect the bills from congress.gov
+            if last_number is None:
+                last_number = self.find_last_bill(bill_type, start_number - 1, self.max_bill_number(limit))
+            numbers = list(range(start_number, last_number + 1))
+            if refresh is True:
+                # Recheck the collected bills that are due first
+                now = time()
+                numbers = [bill['number'] for bill in store.bills() if self.refresh_due(bill_type, bill, now)] \
+                    + numbers
+            if self.shared_pools is not None:
+                # Running under crawl_all, all bill types share its worker pools
+                page_pool, sub_pool = self.shared_pools[bill_type]
+                self.crawl_pages(bill_type, collect_page, store, numbers, page_pool, sub_pool)
+            else:
+                with ThreadPoolExecutor(max_workers=self.page_workers) as page_pool, \
+                        ThreadPoolExecutor(max_workers=self.page_workers) as sub_pool:
+                    self.crawl_pages(bill_type, collect_page, store, numbers, page_pool, sub_pool)
+            self.update_html(bill_type, store)
+        finally:
+            # Whatever was collected before an error is kept, and the next new_only run resumes after it
+            store.close()
+            self.stats.finish(self.stats_name(bill_type), store)
 
-        # Collect the bills from congress.gov
-        if limit is None:
-            max_bill_number = 100000
-        else:
-            max_bill_number = limit
-        for number in range(start_number, max_bill_number):
-            url = self.bill_type[bill_type]['url_base'].format(self.congress, number)
-            self.debug_print('Trying: {}'.format(url))
-            r = requests.get(url)
-            if r.status_code == 200:
-                title_start = r.text.find('<title>') + len('<title>')
-                title_end = r.text.find('</title>')
-                tracker_start = r.text.find('<p class="hide_fromsighted">')
-                bill = {'title': r.text[title_start:title_end],
-                        'url': url,
-                        'number': number}
-                # Find Description, Latest Action, Date Received from President, Committee, All Actions
-                description_start = r.text.find('>Description<')
-                if description_start >= 0:
-                    description_start += len('>Description<')
-                    description = re.search('<li>(.*?)</li>', r.text[description_start:])
-                    if description is not None:
-                        bill['description'] = description.group(1)
-                nominees_start  = r.text.find('>Nominees<')
-                if nominees_start >= 0:
-                    nominees_start += len('>Nominees<')
-                    nominees = re.search('<li>(.*?)</li>', r.text[nominees_start:])
-                    if nominees is not None:
-                        bill['nominees'] = nominees.group(1)
-                committee_start = r.text.find('>Committee<')
-                if committee_start >= 0:
-                    committee_start += len('>Committee<')
-                    committee = re.search('<li>(.*?)</li>', r.text[committee_start:])
-                    if committee is not None:
-                        bill['committees'] = committee.group(1)
-                organization_start = r.text.find('>Organization</h2>')
-                if organization_start >= 0:
-                    organization_start += len('>Committee<')
-                    organization = re.search('<li>(.*?)</li>', r.text[organization_start:])
-                    if organization is not None:
-                        bill['organization'] = organization.group(1)
-                latest_action_start = r.text.find('>Latest Action<')
-                if latest_action_start >= 0:
-                    latest_action_start += len('>Latest Action<')
-                    latest_action = re.search('<li>(.*?)</li>', r.text[latest_action_start:])
-                    if latest_action is not None:
-                        bill['latest_action'] = latest_action.group(1)
-                date_received_start = r.text.find('>Date Received from President<')
-                if date_received_start >= 0:
-                    date_received_start += len('>Date Received from President<')
-                    date_received = re.search('<li>(.*?)</li>', r.text[date_received_start:])
-                    if date_received is not None:
-                        bill['date_received'] = date_received.group(1)
-                collected_bills['bill_data']['last_bill'] = number
-                collected_bills['bill_data']['bill'].append(bill)
+    def collect_bills(self, bill_type, new_only=False, limit=None, last_number=None, refresh=False):
+        """ Collect bills of bill_type from congress.gov, see crawl_pages. With refresh, collected bills
+            that are due (see refresh_due) are checked for changes as well. """
+        self.collect_pages(bill_type, self.collect_bill, new_only, limit, last_number, refresh)
+
+    def collect_nominations(self, bill_type, new_only=False, limit=None, last_number=None, refresh=False):
+        """ Collect nominations from congress.gov, see crawl_pages. """
+        self.collect_pages(bill_type, self.collect_nomination, new_only, limit, last_number, refresh)
+
+    def crawl_all(self, new_only=True, limit=None, refresh=False):
+        """ Crawl every bill type at the same time. The types share one pair of worker pools (and, through
+            the shared fetcher, one connection pool and per-host rate budget). The pools are PriorityPools
+            ranking the types by their number of new items, so the largest type always has the workers it
+            can use and the others fill in around it, and progress for each type is printed every
+            progress_seconds. With refresh, collected bills that are due are rechecked for changes too. """
+        plans = {}
+        for bill_type in self.bill_type.keys():
+            plans[bill_type] = self.plan_bills(bill_type, new_only, limit)
+        order = sorted(plans.keys(), key=lambda t: plans[t][1] - plans[t][0], reverse=True)
+        start_time = perf_counter()
+        with PriorityPool(self.page_workers) as page_pool, PriorityPool(self.page_workers) as sub_pool, \
+                ThreadPoolExecutor(max_workers=len(order)) as type_pool:
+            self.shared_pools = dict((bill_type, (page_pool.lane(rank), sub_pool.lane(rank)))
+                                     for rank, bill_type in enumerate(order))
+            try:
+                futures = [type_pool.submit(self.collect_type, bill_type, new_only, limit, plans[bill_type][1],
+                                            refresh) for bill_type in order]
+                while True:
+                    done, running = wait(futures, timeout=self.progress_seconds)
+                    print('{:.0f} s: {}'.format(perf_counter() - start_time, ', '.join(
+                        '{} {}/{}'.format(self.bill_type[t]['page_title'], *self.progress.get(t, [0, 0]))
+                        for t in order)))
+                    if len(running) == 0:
+                        break
+                for future in futures:
+                    # Raise any error from the bill type crawls
+                    future.result()
+            finally:
+                self.shared_pools = None
+
+    def write_json(self, bill_type, store):
+        """ Write the bills of the store to the <filename_base><year>.json file one bill at a time, in the
+            same layout as json.dumps(collected_bills, indent=1). The bill text and cosponsors table are
+            written as text_blob and cosponsors_table_blob references into the blob store. """
+        with open(self.store_path(bill_type) + '.json', 'w') as f:
+            f.write('{{\n "bill_data": {{\n  "last_bill": {},\n  "bill": ['.format(store.last_bill))
+            separator = '\n'
+            for bill in store.bills():
+                f.write(separator)
+                f.write('\n'.join('   ' + line for line in json.dumps(bill, indent=1).split('\n')))
+                separator = ',\n'
+            if separator == '\n':
+                f.write(']\n }\n}')
             else:
-                print('Not found')
-                break
-        self.update_html(bill_type, collected_bills)
+                f.write('\n  ]\n }\n}')
+
+    def html_header(self, heading, updated=True):
+        """ Return the start of a listing page, with today's date as the last update unless updated is
+            False. """
+        html = '<html>\n<head>\n<title>{}</title>'.format(heading)
+        html += '\n<link rel="stylesheet" href="../bill_style.css">\n</head>\n'
+        html += '<h1>{}</h1>\n'.format(heading)
+        if updated is True:
+            html += '<body>\n<h2>Last updated {}</h2><br>\n'.format(dt.now().strftime('%B %d, %Y'))
+        else:
+            html += '<body>\n'
+        return html
 
-    def update_html(self, bill_type, collected_bills):
-        odd = True
+    def bill_html(self, bill, odd):
+        """ Return the HTML listing entry of one bill, in an "odd" or "even" div. """
         # format(congress, pub_number, congress, pub_number)
         public_law_pdf = 'https://www.govinfo.gov/content/pkg/PLAW-{}publ{}/pdf/PLAW-{}publ{}.pdf'
         public_law_txt = 'https://www.govinfo.gov/content/pkg/PLAW-{}publ{}/html/PLAW-{}publ{}.htm'
 
-        # Create/update the HTML page
-        html = '<html>\n<head>\n<title>{} {}</title>'.format(self.bill_type[bill_type]['page_title'], self.year)
-        html += '\n<link rel="stylesheet" href="../bill_style.css">\n</head>\n'
-        html += '<h1>{} {}</h1>\n'.format(self.bill_type[bill_type]['page_title'], self.year)
-        html += '<body>\n<h2>Last updated {}</h2><br>\n'.format(dt.now().strftime('%B %d, %Y'))
-
-        for bill in collected_bills['bill_data']['bill']:
-            if odd is True:
-                html += '<div class="odd">\n'
-                odd = False
-            else:
-                html += '<div class="even">\n'
-                odd = True
-            html += '<br><a href="{}"><font class="bill_title"><b>{}</b></font></a>\n'\
-                .format(bill['url'], bill['title'])
-            if 'nominees' in bill.keys():
-                html += '<li><b>Nominees:</b> {}</li>\n'.format(bill['nominees'])
-            if 'status' in bill.keys():
-                if bill['status'].find('Passed') >= 0:
-                    html += '<li><b>Status:</b> <font class="passed"><b>{}</b></font></li>\n'.format(bill['status'])
-                elif bill['status'].find('Became Law') >= 0:
-                    law_number = re.search(r'Public Law No: (\d+?)-(\d+)', bill['latest_action'])
-                    if law_number is not None:
-                        html += '<li><b>Status:</b> <font class="became_law"><a href="{}"><b>{}</b></a></font></li>\n'\
-                            .format(public_law_pdf.format(law_number.group(1), law_number.group(2),
-                                                          law_number.group(1), law_number.group(2)), bill['status'])
-                    else:
-                        html += '<li><b>Status:</b> <font class="became_law"><b>{}</b></font></li>\n'\
-                            .format(bill['status'])
-                elif bill['status'].find('Vetoed') >= 0:
-                    html += '<li><b>Status:</b> <font class="vetoed"><b>{}</b></font></li>\n'.format(bill['status'])
-                elif bill['status'].find('Failed to pass over veto') >= 0:
-                    html += '<li><b>Status:</b> <font class="vetoed"><b>{}</b></font></li>\n'.format(bill['status'])
-                elif bill['status'].find('Agreed to') >= 0:
-                    html += '<li><b>Status:</b> <font class="agreed"><b>{}</b></font></li>\n'.format(bill['status'])
-                else:
-                    html += '<li><b>{}</b></li>\n'.format(bill['status'])
-            if 'sponsor' in bill.keys():
-                html += '<li><b>Sponsor:</b><font class="{}"> {}</font></li>\n'.format(bill['party'], bill['sponsor'])
-                html += '<li>{}</li>\n'.format(bill['introduced'])
-            if 'description' in bill.keys():
-                html += '<li><b>Description:</b> {}</li>\n'.format(bill['description'])
-            if 'committees' in bill.keys():
-                html += '<li><b>Committee(s):</b> {}</li>\n'.format(bill['committees']
-                                                                    .replace('href="',
-                                                                             'href="https://www.congress.gov/'))
-            if 'committee_reports' in bill.keys():
-                html += '<li><a href="https://www.congress.gov/{}">{}</a></li>\n'\
-                    .format(bill['committee_reports_url'], bill['committee_reports'])
-            if 'date_received' in bill.keys():
-                html += '<li><b>Date Received from President:</b> {}</li>\n'.format(bill['date_received'])
-            if 'organization' in bill.keys():
-                html += '<li><b>Organization:</b> {}</li>\n'.format(bill['organization'])
-            if 'policy_area' in bill.keys():
-                if 'subjects_url' in bill.keys():
-                    html += '<li><b>Policy Area:</b> <a href="{}">{}</a></li>\n'\
-                        .format(bill['subjects_url'], bill['policy_area'])
-                else:
-                    html += '<li><b>Policy Area:</b> {}</li>\n'.format(bill['policy_area'])
-                if 'subjects' in bill.keys():
-                    html += '<li><b>Legislative Subjects:</b> {}</li>\n'.format(', '.join(bill['subjects']))
-            if 'latest_action' in bill.keys():
-                if bill['latest_action'].find('Confirmed by') >= 0:
-                    html += '<li><b>Latest Action:</b><font class="confirmed"> {}</font></li>\n'\
-                        .format(bill['latest_action'].replace('href="', 'href="https://www.congress.gov/'))
-                elif bill['latest_action'].find('withdrawal') >= 0:
-                    html += '<li><b>Latest Action:</b><font class="withdrawn"> {}</font></li>\n'\
-                        .format(bill['latest_action'].replace('href="', 'href="https://www.congress.gov/'))
+        if odd is True:
+            html = '<div class="odd">\n'
+        else:
+            html = '<div class="even">\n'
+        html += '<br><a href="{}"><font class="bill_title"><b>{}</b></font></a>\n'\
+            .format(bill['url'], bill['title'])
+        if 'nominees' in bill.keys():
+            html += '<li><b>Nominees:</b> {}</li>\n'.format(bill['nominees'])
+        if 'status' in bill.keys():
+            if bill['status'].find('Passed') >= 0:
+                html += '<li><b>Status:</b> <font class="passed"><b>{}</b></font></li>\n'.format(bill['status'])
+            elif bill['status'].find('Became Law') >= 0:
+                law_number = re.search(r'Public Law No: (\d+?)-(\d+)', bill['latest_action'])
+                if law_number is not None:
+                    html += '<li><b>Status:</b> <font class="became_law"><a href="{}"><b>{}</b></a></font></li>\n'\
+                        .format(public_law_pdf.format(law_number.group(1), law_number.group(2),
+                                                      law_number.group(1), law_number.group(2)), bill['status'])
                 else:
-                    html += '<li><b>Latest Action:</b> {}</li>\n'\
-                        .format(bill['latest_action'].replace('href="', 'href="https://www.congress.gov/'))
-            if 'all_actions_url' in bill.keys():
-                html += '<li><a href="https://www.congress.gov/{}">All actions</a></li>\n'\
-                    .format(bill['all_actions_url'])
-            if 'cosponsors_list' in bill.keys() and bill['cosponsors_list'] is not None:
-                name_list = dem_list = rep_list = ind_list = []
-                name_list = ['{}({})'.format(n[1], n[2]) for n in bill['cosponsors_list']]
-                dem_list = [n[1] for n in bill['cosponsors_list'] if n[2] == 'D']
-                rep_list = [n[1] for n in bill['cosponsors_list'] if n[2] == 'R']
-                ind_list = [n[1] for n in bill['cosponsors_list'] if n[2] == 'I']
-                html += '<li><b>{} cosponsors:</b><table border="1">' \
-                        '<tr><td>{} Democrats</td><td>{}</td></tr>' \
-                        '<tr><td>{} Republicans</td><td>{}</td></tr>' \
-                        '<tr><td>{} Independents</td><td>{}</td></tr></table>' \
-                        '</li>\n'.format(len(name_list),
-                                         len(dem_list), '; '.join(dem_list),
-                                         len(rep_list), '; '.join(rep_list),
-                                         len(ind_list), '; '.join(ind_list))
-            if self.show_cosponsors_table is True \
-                    and 'cosponsors_table' in bill.keys() \
-                    and bill['cosponsors_table'] is not None:
-                html += bill['cosponsors_table'] + '\n'
-            elif 'cosponsors' in bill.keys():
-                html += '<li><a href="{}">Cosponsors</a></li>\n'.format(bill['cosponsors'])
-            if 'reserved' in bill.keys():
-                html += '<li>Reserved</li>\n'
-            html += '<br>\n</div>\n'
-
-        html += '</body>\n</html>'
+                    html += '<li><b>Status:</b> <font class="became_law"><b>{}</b></font></li>\n'\
+                        .format(bill['status'])
+            elif bill['status'].find('Vetoed') >= 0:
+                html += '<li><b>Status:</b> <font class="vetoed"><b>{}</b></font></li>\n'.format(bill['status'])
+            elif bill['status'].find('Failed to pass over veto') >= 0:
+                html += '<li><b>Status:</b> <font class="vetoed"><b>{}</b></font></li>\n'.format(bill['status'])
+            elif bill['status'].find('Agreed to') >= 0:
+                html += '<li><b>Status:</b> <font class="agreed"><b>{}</b></font></li>\n'.format(bill['status'])
+            else:
+                html += '<li><b>{}</b></li>\n'.format(bill['status'])
+        if 'sponsor_id' in bill.keys():
+            sponsor = self.legislators.member(bill['sponsor_id'])
+            html += '<li><b>Sponsor:</b><font class="{}"> {}</font></li>\n'\
+                .format(party_name(sponsor['party']), self.legislators.sponsor_text(bill['sponsor_id']))
+            html += '<li>{}</li>\n'.format(bill['introduced'])
+        elif 'sponsor' in bill.keys():
+            # Collected before sponsors were kept in the legislator table
+            html += '<li><b>Sponsor:</b><font class="{}"> {}</font></li>\n'.format(bill['party'], bill['sponsor'])
+            html += '<li>{}</li>\n'.format(bill['introduced'])
+        if 'description' in bill.keys():
+            html += '<li><b>Description:</b> {}</li>\n'.format(bill['description'])
+        if 'committees' in bill.keys():
+            html += '<li><b>Committee(s):</b> {}</li>\n'.format(bill['committees']
+                                                                .replace('href="',
+                                                                         'href="https://www.congress.gov/'))
+        if 'committee_reports' in bill.keys():
+            html += '<li><a href="https://www.congress.gov/{}">{}</a></li>\n'\
+                .format(bill['committee_reports_url'], bill['committee_reports'])
+        if 'date_received' in bill.keys():
+            html += '<li><b>Date Received from President:</b> {}</li>\n'.format(bill['date_received'])
+        if 'organization' in bill.keys():
+            html += '<li><b>Organization:</b> {}</li>\n'.format(bill['organization'])
+        if 'policy_area' in bill.keys():
+            if 'subjects_url' in bill.keys():
+                html += '<li><b>Policy Area:</b> <a href="{}">{}</a></li>\n'\
+                    .format(bill['subjects_url'], bill['policy_area'])
+            else:
+                html += '<li><b>Policy Area:</b> {}</li>\n'.format(bill['policy_area'])
+            if 'subjects' in bill.keys():
+                html += '<li><b>Legislative Subjects:</b> {}</li>\n'.format(', '.join(bill['subjects']))
+        if 'latest_action' in bill.keys():
+            if bill['latest_action'].find('Confirmed by') >= 0:
+                html += '<li><b>Latest Action:</b><font class="confirmed"> {}</font></li>\n'\
+                    .format(bill['latest_action'].replace('href="', 'href="https://www.congress.gov/'))
+            elif bill['latest_action'].find('withdrawal') >= 0:
+                html += '<li><b>Latest Action:</b><font class="withdrawn"> {}</font></li>\n'\
+                    .format(bill['latest_action'].replace('href="', 'href="https://www.congress.gov/'))
+            else:
+                html += '<li><b>Latest Action:</b> {}</li>\n'\
+                    .format(bill['latest_action'].replace('href="', 'href="https://www.congress.gov/'))
+        if 'all_actions_url' in bill.keys():
+            html += '<li><a href="https://www.congress.gov/{}">All actions</a></li>\n'\
+                .format(bill['all_actions_url'])
+        cosponsors_list = bill.get('cosponsors_list')
+        if 'cosponsor_ids' in bill.keys():
+            cosponsors_list = [(m['title'], m['name'], m['party'])
+                               for m in [self.legislators.member(i) for i in bill['cosponsor_ids']]]
+        if cosponsors_list is not None:
+            name_list = dem_list = rep_list = ind_list = []
+            name_list = ['{}({})'.format(n[1], n[2]) for n in cosponsors_list]
+            dem_list = [n[1] for n in cosponsors_list if n[2] == 'D']
+            rep_list = [n[1] for n in cosponsors_list if n[2] == 'R']
+            ind_list = [n[1] for n in cosponsors_list if n[2] == 'I']
+            html += '<li><b>{} cosponsors:</b><table border="1">' \
+                    '<tr><td>{} Democrats</td><td>{}</td></tr>' \
+                    '<tr><td>{} Republicans</td><td>{}</td></tr>' \
+                    '<tr><td>{} Independents</td><td>{}</td></tr></table>' \
+                    '</li>\n'.format(len(name_list),
+                                     len(dem_list), '; '.join(dem_list),
+                                     len(rep_list), '; '.join(rep_list),
+                                     len(ind_list), '; '.join(ind_list))
+        if self.show_cosponsors_table is True and bill.get('cosponsors_table') is not None:
+            html += bill['cosponsors_table'] + '\n'
+        elif 'cosponsors' in bill.keys():
+            html += '<li><a href="{}">Cosponsors</a></li>\n'.format(bill['cosponsors'])
+        if 'reserved' in bill.keys():
+            html += '<li>Reserved</li>\n'
+        html += '<br>\n</div>\n'
+        return html
+
+    def page_nav(self, page_name, page, pages):
+        """ Return the previous / index / next links of page (numbered from 1) of a paginated listing. """
+        links = []
+        if page > 1:
+            links.append('<a href="{}_{}.html">&lt; Previous</a>'.format(page_name, page - 1))
+        links.append('<a href="{}.html">Index</a>'.format(page_name))
+        if page < pages:
+            links.append('<a href="{}_{}.html">Next &gt;</a>'.format(page_name, page + 1))
+        return '<p>{}</p>\n'.format(' | '.join(links))
+
+    def write_html_pages(self, bill_type, store):
+        """ Write the listing as pages of page_size bills (<Filename_base><year>_<page>.html) and an index
+            page (<Filename_base><year>.html) linking to them. A page is only rewritten when its content
+            changed since the last run, which is tracked with a hash per page. The pages carry no date, so
+            an unchanged page is never out of date; the last update date is on the index page, which is
+            written every time. """
+        page_name = '{}{}'.format(self.bill_type[bill_type]['filename_base'], self.year)
+        heading = '{} {}'.format(self.bill_type[bill_type]['page_title'], self.year)
+        hashes_path = self.store_path(bill_type) + '.pages.json'
+        try:
+            with open(hashes_path, 'r') as f:
+                page_hashes = json.load(f)
+        except FileNotFoundError:
+            page_hashes = {}
+        pages = (len(store) + self.page_size - 1) // self.page_size
+        ranges = []
+        rewritten = 0
+        entries = []
+        bills = store.bills()
+        for page in range(1, pages + 1):
+            # Only one page of bills is held at a time
+            entries.clear()
+            first_number = last_number = None
+            for bill in bills:
+                entries.append(self.bill_html(bill, len(entries) % 2 == 0))
+                if first_number is None:
+                    first_number = bill['number']
+                last_number = bill['number']
+                if len(entries) == self.page_size:
+                    break
+            ranges.append((first_number, last_number))
+            nav = self.page_nav(page_name, page, pages)
+            content = self.html_header('{} (page {} of {})'.format(heading, page, pages), updated=False) \
+                + nav + ''.join(entries) + nav + '</body>\n</html>'
+            page_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            path = '{}/{}_{}.html'.format(self.html_dir, page_name, page)
+            if page_hashes.get(str(page)) == page_hash and os.path.exists(path):
+                continue
+            with open(path, 'wt') as f:
+                f.write(content)
+            page_hashes[str(page)] = page_hash
+            rewritten += 1
+        # Remove pages left over from a longer listing
+        for page in [key for key in page_hashes.keys() if int(key) > pages]:
+            if os.path.exists('{}/{}_{}.html'.format(self.html_dir, page_name, page)):
+                os.remove('{}/{}_{}.html'.format(self.html_dir, page_name, page))
+            del page_hashes[page]
+        with open('{}/{}.html'.format(self.html_dir, page_name), 'wt') as f:
+            f.write(self.html_header(heading))
+            f.write('<ul>\n')
+            for page, (first_number, last_number) in enumerate(ranges, 1):
+                f.write('<li><a href="{}_{}.html">Numbers {} to {}</a></li>\n'.format(page_name, page, first_number,
+                                                                                      last_number))
+            f.write('</ul>\n</body>\n</html>')
+        with open(hashes_path, 'w') as f:
+            json.dump(page_hashes, f)
+        self.debug_print('{}: {} of {} pages rewritten'.format(heading, rewritten, pages))
+
+    def update_html(self, bill_type, store):
+        """ Save the JSON file and the HTML listing of bill_type. The listing is written one bill at a
+            time, as a single page or, with page_size set, as an index and pages of page_size bills. """
         # Save JSON file
-        with open('{}/{}{}.json'.format(self.congress_bills_dir,
-                                        self.bill_type[bill_type]['filename_base'],
-                                        self.year), 'w') as f:
-            f.write(json.dumps(collected_bills, indent=1))
+        self.write_json(bill_type, store)
+        if self.page_size is not None:
+            self.write_html_pages(bill_type, store)
+            return
         # Save HTML file
         with open('{}/{}{}.html'.format(self.html_dir,
                                         self.bill_type[bill_type]['filename_base'],
                                         self.year), 'wt') as f:
-            f.write(html)
-
+            f.write(self.html_header('{} {}'.format(self.bill_type[bill_type]['page_title'], self.year)))
+            odd = True
+            for bill in store.bills():
+                f.write(self.bill_html(bill, odd))
+                odd = not odd
+            f.write('</body>\n</html>')
 
     def debug_print(self, to_print):
         if self.DEBUG_PRINT is True:
@@ -403,11 +687,10 @@ class CollectCongressBills:
 if __name__ == '__main__':
     limit = None
     get_new_only = True
+    # Also recheck already collected bills for status, action and cosponsor changes
+    refresh = True
+    # Keep fetched pages in the response cache so repeat runs only download pages that changed
+    http_fetch.configure(cache=ResponseCache())
     collect = CollectCongressBills(2019, False, True)
-    collect.collect_bills('house_bills', get_new_only, limit)
-    collect.collect_bills('senate_bills', get_new_only, limit)
-    collect.collect_bills('house_resolutions', get_new_only, limit)
-    collect.collect_bills('senate_resolutions', get_new_only, limit)
-    collect.collect_bills('house_joint_resolutions', get_new_only, limit)
-    collect.collect_bills('senate_joint_resolutions', get_new_only, limit)
-    collect.collect_nominations('nominations', get_new_only, limit)
+    # Crawl the bills, resolutions and nominations all at once
+    collect.crawl_all(get_new_only, limit, refresh)
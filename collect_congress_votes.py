@@ -1,16 +1,30 @@
 """ This file requires the prior installation of xml2json. """
 
 from xml2json import Xml2json
+import http_fetch
+from http_fetch import fetch
+from response_cache import ResponseCache
+from range_discovery import find_last_number
+from vote_index import house_roll_numbers, senate_vote_tallies
+from crawl_manifest import CrawlManifest
 import os
-from time import sleep
+import json
+import requests
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
 class CollectCongressVotes:
-    def __init__(self, year=2019, updates_only=True, dbg_print=False):
+    def __init__(self, year=2019, updates_only=True, dbg_print=False, house_workers=4, use_index=True,
+                 manifest=None):
         # Flag to control either only processing missing files (True), or reprocessing all files (False)
         self.UPDATES_ONLY = updates_only
         # Set DEBUG_PRINT to True to get console updates, or False to suppress them
         self.DEBUG_PRINT = dbg_print
+        # Maximum number of House roll calls requested from clerk.house.gov at the same time
+        self.house_workers = house_workers
+        # Read the chambers' vote listings to find the votes to collect (falls back to probing vote URLs)
+        self.use_index = use_index
 
         self.year = year
         self.Congress_start_year = 1787
@@ -30,86 +44,238 @@ class CollectCongressVotes:
         self.house_vote_dir = 'data/house_votes_{}'.format(self.year)
         self.senate_vote_dir = 'data/senate_votes_{}'.format(self.year)
 
-        # Get a list of files already processed/saved for House votes
-        try:
-            self.processed_list = os.listdir(self.house_vote_dir)
-        except FileNotFoundError:
-            os.mkdir(self.house_vote_dir)
-            self.processed_list = os.listdir(self.house_vote_dir)
+        # The roll call XML files as fetched, kept so the JSON files can be rebuilt offline with
+        # Xml2json().convertDirectory (named as the chambers name them, e.g. roll001.xml and vote_116_1_00001.xml)
+        self.house_xml_dir = 'xml/house_{}'.format(self.year)
+        self.senate_xml_dir = 'xml/senate_{}'.format(self.year)
+
+        for vote_dir in [self.house_vote_dir, self.senate_vote_dir, self.house_xml_dir, self.senate_xml_dir]:
+            if not os.path.isdir(vote_dir):
+                os.makedirs(vote_dir)
 
         # Set up the base URL name for House roll call vote XML files
         self.rollcall_url_base = 'http://clerk.house.gov/evs/{}/roll'.format(self.year)
-        # Get a list of files already processed/saved for Senate votes
-        try:
-            self.senate_processed_list = os.listdir(self.senate_vote_dir)
-        except FileNotFoundError:
-            os.mkdir(self.senate_vote_dir)
-            self.senate_processed_list = os.listdir(self.senate_vote_dir)
         # Set up the base URL name for Senate roll call vote XML files
         # (append vote number and .xml with zero pad of 5 digits)
         self.senate_base_url = 'https://www.senate.gov/legislative/LIS/'\
                                'roll_call_votes/vote{}{}/vote_{}_{}_'.format(self.congress, self.session,
                                                                              self.congress, self.session)
 
-    def collect_house_votes(self):
-        # Process all House roll call vote pages from 1 to 2000
-        for vote_number in range(1, 2001):
-            if (self.UPDATES_ONLY is True) and ('roll{}.json'.format(vote_number) in self.processed_list):
-                # If only doing updates and the current roll call number already has a file, skip it
+        # The crawl manifest records the outcome of every vote fetch, for resuming and gap repair
+        # (passed in to share one manifest between collectors)
+        self.manifest = manifest if manifest is not None else CrawlManifest()
+        self.house_collection = 'house_votes_{}'.format(self.year)
+        self.senate_collection = 'senate_votes_{}'.format(self.year)
+        # Roll call responses fetched while probing for the last vote, by URL, kept for the crawl
+        self.probed = {}
+        # Sets of the vote numbers already saved, for constant time lookups
+        self.house_done = set(int(f.replace('roll', '').replace('.json', '')) for f in os.listdir(self.house_vote_dir)
+                              if f.startswith('roll') and f.endswith('.json'))
+        self.senate_done = set(int(f.replace('vote', '').replace('.json', '')) for f in os.listdir(self.senate_vote_dir)
+                               if f.startswith('vote') and f.endswith('.json'))
+        # Files saved before the manifest existed count as done
+        self.manifest.import_done(self.house_collection, self.house_done)
+        self.manifest.import_done(self.senate_collection, self.senate_done)
+
+    def house_roll_url(self, vote_number):
+        return '{}{}.xml'.format(self.rollcall_url_base, str(vote_number).zfill(3))
+
+    def senate_vote_url(self, vote_number):
+        # The Senate vote number is zero padded to 5 digits
+        return '{}{}.xml'.format(self.senate_base_url, str(vote_number).zfill(5))
+
+    def vote_available(self, url, root_tag):
+        """ Whether url holds a roll call, i.e. its body has the root_tag element. The response of one that
+            does is kept, so the crawl does not fetch it a second time. A probe that is out of retries
+            counts as unavailable (find_last_number tolerates isolated gaps). """
+        try:
+            r = fetch(url)
+        except requests.exceptions.RequestException as e:
+            print('Error probing {}: {}'.format(url, e))
+            return False
+        # clerk.house.gov can answer with a generated html page past the last roll call
+        if r.status_code == 200 and r.text.find(root_tag) >= 0:
+            self.probed[url] = r
+            return True
+        return False
+
+    def house_roll_available(self, vote_number):
+        return self.vote_available(self.house_roll_url(vote_number), '<rollcall-vote')
+
+    def senate_vote_available(self, vote_number):
+        return self.vote_available(self.senate_vote_url(vote_number), '<roll_call_vote')
+
+    def find_last_house_roll(self):
+        """ Locate the last available House roll call, starting from the highest one already saved. """
+        return find_last_number(self.house_roll_available, max(self.house_done, default=0), limit=2001)
+
+    def find_last_senate_vote(self):
+        """ Locate the last available Senate roll call, starting from the highest one already saved. """
+        return find_last_number(self.senate_vote_available, max(self.senate_done, default=0), limit=2001)
+
+    def fetch_vote(self, collection, vote_number, url, root, filename, xml_filename):
+        """ Fetch and convert one roll call vote, save it to filename (and the XML as fetched to
+            xml_filename) and record the outcome in the crawl manifest. Returns False if the vote could not
+            be collected. """
+        self.debug_print(f'Trying {url}')
+        # A response kept from probing for the last vote is used rather than fetched again
+        r = self.probed.pop(url, None)
+        try:
+            if r is None:
+                r = fetch(url)
+        except requests.exceptions.RequestException as e:
+            # Out of retries, record the failure so the repair pass tries this vote again
+            self.debug_print('Error: {}'.format(e))
+            self.manifest.record(collection, vote_number, 'failed')
+            return False
+        if r.status_code != 200 or len(r.text) == 0:
+            print('Status: {}'.format(r.status_code))
+            self.manifest.record(collection, vote_number, 'failed', r.status_code)
+            return False
+        # Pass the roll call xml file to the Xml2json wrapper class and get the results back
+        out = Xml2json().convertFromXmlText(r.text)
+        if not (root in out.keys()):
+            # congress.gov generates an html page if you go beyond the actual vote pages
+            self.manifest.record(collection, vote_number, 'failed', r.status_code)
+            return False
+        with open(xml_filename, 'wb') as f:
+            f.write(r.content)
+        Xml2json().saveToJsonFile(out, filename)
+        self.manifest.record(collection, vote_number, 'done', r.status_code, r.content)
+        return True
+
+    def fetch_house_roll(self, vote_number):
+        """ Fetch and convert one House roll call and save it as roll<vote_number>.json. """
+        collected = self.fetch_vote(self.house_collection, vote_number, self.house_roll_url(vote_number),
+                                    'rollcall-vote', '{}/roll{}.json'.format(self.house_vote_dir, vote_number),
+                                    '{}/roll{}.xml'.format(self.house_xml_dir, str(vote_number).zfill(3)))
+        if collected is True:
+            self.house_done.add(vote_number)
+        return collected
+
+    def fetch_senate_vote(self, vote_number):
+        """ Fetch and convert one Senate roll call and save it as vote#####.json. """
+        # Format the string version of the current roll call number to have leading zeroes enough to have 5 digits
+        collected = self.fetch_vote(self.senate_collection, vote_number, self.senate_vote_url(vote_number),
+                                    'roll_call_vote', '{}/vote{}.json'.format(self.senate_vote_dir,
+                                                                              str(vote_number).zfill(5)),
+                                    '{}/vote_{}_{}_{}.xml'.format(self.senate_xml_dir, self.congress, self.session,
+                                                                  str(vote_number).zfill(5)))
+        if collected is True:
+            self.senate_done.add(vote_number)
+        return collected
+
+    def run_house_work(self, work):
+        """ Fetch the House roll calls in work, with up to house_workers roll calls in flight at the same
+            time. Each roll call file is written as soon as it is done. """
+        start_time = perf_counter()
+        collected = 0
+        with ThreadPoolExecutor(max_workers=self.house_workers) as pool:
+            futures = {pool.submit(self.fetch_house_roll, vote_number): vote_number for vote_number in work}
+            for done, future in enumerate(as_completed(futures), 1):
+                vote_number = futures[future]
+                if future.result() is True:
+                    collected += 1
+                    self.debug_print('[{}/{}] Collected roll{}.json'.format(done, len(work), vote_number))
+                else:
+                    self.debug_print('[{}/{}] File not found: roll{}'.format(done, len(work), vote_number))
+        elapsed = perf_counter() - start_time
+        print('House: collected {} roll calls in {:.1f} s ({:.2f} rolls/sec, {} workers)'
+              .format(collected, elapsed, collected / elapsed if elapsed > 0 else 0, self.house_workers))
+
+    def run_senate_work(self, work):
+        for done, vote_number in enumerate(work, 1):
+            self.debug_print('[{}/{}] Senate vote {}'.format(done, len(work), vote_number))
+            if self.fetch_senate_vote(vote_number) is not True:
+                # A gap in the numbering or a failed read, move on to the next vote
+                self.debug_print('File not found')
+
+    def plan_house_votes(self):
+        """ Find the available House roll calls and return the list of roll call numbers that still need
+            collecting. A crawl that was interrupted picks up where it stopped. """
+        vote_numbers = house_roll_numbers(self.year) if self.use_index is True else None
+        if vote_numbers is None:
+            vote_numbers = range(1, self.find_last_house_roll() + 1)
+        last_number = max(vote_numbers, default=0)
+        run_started = self.manifest.begin_run(self.house_collection)
+        # When reprocessing everything, skip only what this (possibly resumed) run already collected
+        done = self.house_done if self.UPDATES_ONLY is True \
+            else self.manifest.completed_since(self.house_collection, run_started)
+        work = []
+        for vote_number in vote_numbers:
+            if vote_number in done:
+                # If the current roll call number is already collected, skip it
                 self.debug_print('Already collected: roll{}.json'.format(vote_number))
                 continue
-            # Create the URL for the roll call page to process
-            url = '{}{}.xml'.format(self.rollcall_url_base, str(vote_number).zfill(3))
-            self.debug_print(f'Trying {url}')
-
-            # Pass the URL for the roll call xml file to the Xml2json wrapper class and get the results back
-            out = Xml2json().convertFromXmlUrl(url)
-            if out is None:
-                # If there was a URL error detected, stop the processing loop for House votes
-                self.debug_print('File not found')
-                break
-            if not ('rollcall-vote' in out.keys()):
-                # congress.gov generates an html page if you go beyond the actual vote pages
-                # Detect an error page to break the processing loop
-                self.debug_print('File not found')
-                break
-            filename = '{}/roll{}.json'.format(self.house_vote_dir, vote_number)
-            Xml2json().saveToJsonFile(out, filename)
+            work.append(vote_number)
+        self.debug_print('House: last roll call is {}, {} to collect'.format(last_number, len(work)))
+        return work
+
+    def collect_house_votes(self):
+        self.run_house_work(self.plan_house_votes())
+        self.manifest.finish_run(self.house_collection)
+
+    def senate_vote_changed(self, vote_number, tally):
+        """ Compare a saved Senate vote with its (yeas, nays) tally from the vote menu. """
+        try:
+            with open('{}/vote{}.json'.format(self.senate_vote_dir, str(vote_number).zfill(5)), 'r') as f:
+                count = json.load(f)['roll_call_vote']['count']
+            return (str(count['yeas']).strip(), str(count['nays']).strip()) != tally
+        except (OSError, ValueError, KeyError, TypeError):
+            # An unreadable saved file is as good as a changed one
+            return True
+
+    def plan_senate_votes(self):
+        """ Find the available Senate roll calls from the vote menu (or by probing vote URLs if the menu
+            can not be read) and return the list of vote numbers that are new or whose tally changed. """
+        tallies = senate_vote_tallies(self.congress, self.session) if self.use_index is True else None
+        if tallies is None:
+            tallies = dict((vote_number, None) for vote_number in range(1, self.find_last_senate_vote() + 1))
+        last_number = max(tallies.keys(), default=0)
+        run_started = self.manifest.begin_run(self.senate_collection)
+        if self.UPDATES_ONLY is True:
+            done = self.senate_done
+        else:
+            done = self.manifest.completed_since(self.senate_collection, run_started)
+        work = []
+        for vote_number in sorted(tallies.keys()):
+            if vote_number in done:
+                if self.UPDATES_ONLY is not True or tallies[vote_number] is None \
+                        or not self.senate_vote_changed(vote_number, tallies[vote_number]):
+                    # If the current roll call number is already collected, skip it
+                    self.debug_print('Already collected: vote{}.json'.format(str(vote_number).zfill(5)))
+                    continue
+                self.debug_print('Changed since collected: vote{}.json'.format(str(vote_number).zfill(5)))
+            work.append(vote_number)
+        self.debug_print('Senate: last roll call is {}, {} to collect'.format(last_number, len(work)))
+        return work
 
     def collect_senate_votes(self):
-        # Process all Senate roll call vote pages from 1 to 2000
-        for vote_page in range(1, 2001):
-            # Format the string version of the current roll call number to have leading zeroes enough to have 5 digits
-            vote_number_formatted = str(vote_page).zfill(5)
-            out_filename = f'vote{vote_number_formatted}.json'
-            if (self.UPDATES_ONLY is True) and (out_filename in self.senate_processed_list):
-                # If only doing updates and the current roll call number already has a file, skip it
-                self.debug_print(f'Already collected: {out_filename}')
-                continue
+        self.run_senate_work(self.plan_senate_votes())
+        self.manifest.finish_run(self.senate_collection)
 
-            # Create the URL for the roll call page to process
-            url = '{}{}.xml'.format(self.senate_base_url, vote_number_formatted)
-            self.debug_print(f'Trying {url}')
+    def finish_runs(self):
+        """ Mark the House and Senate crawls as complete in the manifest (for callers running the
+            planned work themselves). """
+        self.manifest.finish_run(self.house_collection)
+        self.manifest.finish_run(self.senate_collection)
 
-            # Pass the URL for the roll call xml file to the Xml2json wrapper class and get the results back
-            out = Xml2json().convertFromXmlUrl(url)
-            if out is None:
-                # If there was a URL error detected, stop the processing loop for House votes
-                self.debug_print('File not found')
-                break
-            elif not ('roll_call_vote' in out.keys()):
-                # For the Senate, the error detection above works when no more pages are available, but if that
-                # changes to have a generated file, this guard would detect the end of processing
-                self.debug_print('File not found')
-                break
-            filename = '{}/{}'.format(self.senate_vote_dir, out_filename)
-            Xml2json().saveToJsonFile(out, filename)
-            # Delay between senate.gov access attempts, one second
-            sleep(2)
+    def repair_votes(self):
+        """ Gap repair pass: retry only the votes that failed, or are missing below the highest vote
+            collected, for each chamber. """
+        for collection, collected, run_work in [(self.house_collection, self.house_done, self.run_house_work),
+                                                (self.senate_collection, self.senate_done, self.run_senate_work)]:
+            failed = self.manifest.numbers(collection, 'failed')
+            gaps = set(range(1, max(collected, default=0))) - collected
+            work = sorted((failed | gaps) - collected)
+            if len(work) > 0:
+                self.debug_print('Repairing {}: {}'.format(collection, work))
+                run_work(work)
 
     def collect_votes(self):
         self.collect_house_votes()
         self.collect_senate_votes()
+        self.repair_votes()
 
     def debug_print(self, to_print):
         if self.DEBUG_PRINT is True:
@@ -117,5 +283,6 @@ class CollectCongressVotes:
 
 
 if __name__ == '__main__':
+    http_fetch.configure(cache=ResponseCache())
     collect = CollectCongressVotes(2016, True, True)
     collect.collect_votes()
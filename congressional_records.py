@@ -0,0 +1,176 @@
+""" Index of the daily Congressional Record PDF files available on congress.gov.
+
+    Whether a day has a Congressional Record is checked with a HEAD request, falling back to a GET of
+    the first byte only (Range: bytes=0-0) if the server does not answer HEAD, so the PDFs themselves
+    are never downloaded. Days are checked concurrently through the shared fetch layer, which keeps the
+    requests within the host's rate budget. The dates of each year found available, found missing and
+    whose check failed (a timeout or server error) are saved in data/congressional_records_<year>.json
+    as the check ends, even if it is interrupted. Later runs check the days not checked yet, the failed
+    ones again, and the missing days after the last available one, whose Record may not have been
+    published yet. """
+
+import os
+import json
+import bisect
+import calendar
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from http_fetch import fetch, head, HttpFetcher
+
+# Format in: Congress(number), year, month(00), day(00), year, month, day
+BASE_URL = 'https://www.congress.gov/{}/crec/{}/{}/{}/CREC-{}-{}-{}.pdf'
+
+Congress_start_year = 1787
+Sessions_per_Congress = 2
+
+
+def congress_session(year):
+    """ Return the (Congress number, session) of a year. """
+    # Subtract the start of Congress year 1787 from the year of interest, divide by two for the Congress number
+    congress = (year - Congress_start_year) / Sessions_per_Congress
+    # If the vote year calculated ends with .5, it is the second session, otherwise it is the first session
+    if congress > int(congress):
+        return int(congress), 2
+    return int(congress), 1
+
+
+def record_url(day):
+    """ The URL of the Congressional Record PDF of a day (a datetime.date). """
+    month_str = str(day.month).zfill(2)
+    day_str = str(day.day).zfill(2)
+    return BASE_URL.format(congress_session(day.year)[0], day.year, month_str, day_str, day.year, month_str, day_str)
+
+
+def record_available(url, use_head=True):
+    """ Return (available, head_supported) for the file at url, found without downloading it. available
+        is None if the server kept failing (a 5xx or 429 answer after the fetcher's retries). Once the
+        server has refused HEAD, use_head=False goes straight to the one byte GET. """
+    if use_head is True:
+        r = head(url, allow_redirects=True)
+        if r.status_code not in (405, 501):
+            if r.status_code in HttpFetcher.RETRY_STATUS:
+                return None, True
+            return r.status_code == 200, True
+    # HEAD is not supported, ask for the first byte only
+    r = fetch(url, headers={'Range': 'bytes=0-0'}, stream=True)
+    r.close()
+    if r.status_code in HttpFetcher.RETRY_STATUS:
+        return None, False
+    return r.status_code in (200, 206), False
+
+
+class CongressionalRecords:
+    def __init__(self, year, workers=8, index_path=None):
+        self.year = year
+        # Number of days checked at the same time
+        self.workers = workers
+        # Cleared when the server answers HEAD with 405 Method Not Allowed
+        self.use_head = True
+        self.index_path = index_path if index_path is not None \
+            else 'data/congressional_records_{}.json'.format(year)
+        # Days found with a Congressional Record (in order), found without one, and whose check failed
+        self.available = []
+        self.missing = set()
+        self.failed = set()
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return
+        self.available = sorted(date.fromisoformat(day) for day in index['available'])
+        if 'missing' in index.keys():
+            self.missing = set(date.fromisoformat(day) for day in index['missing'])
+            self.failed = set(date.fromisoformat(day) for day in index['failed'])
+        elif len(self.available) > 0:
+            # An index from before missing days were recorded, it covers every day up to the last available
+            day = date(self.year, 1, 1)
+            while day < self.available[-1]:
+                self.missing.add(day)
+                day += timedelta(days=1)
+            self.missing.difference_update(self.available)
+
+    def days_to_check(self, today=None):
+        """ The days of the year up to today not known to have a Congressional Record: those never
+            checked, those whose check failed, and the missing ones after the last available day. """
+        today = today if today is not None else date.today()
+        settled = set(self.available)
+        if len(self.available) > 0:
+            settled.update(day for day in self.missing if day < self.available[-1])
+        day = date(self.year, 1, 1)
+        last = min(today, date(self.year, 12, 31))
+        days = []
+        while day <= last:
+            if day not in settled:
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def check(self, day):
+        """ True if the Congressional Record of the day is available, False if not, None if the check
+            failed. """
+        try:
+            available, self.use_head = record_available(record_url(day), self.use_head)
+        except Exception as e:
+            print('{}: {}'.format(record_url(day), e))
+            return None
+        return available
+
+    def record(self, day, available):
+        """ Note the outcome of checking a day. """
+        self.missing.discard(day)
+        self.failed.discard(day)
+        if available is None:
+            self.failed.add(day)
+        elif available is False:
+            self.missing.add(day)
+        elif day not in self.available:
+            bisect.insort(self.available, day)
+
+    def update(self, today=None):
+        """ Check the days that need it, save the index (also if the check is interrupted) and return
+            the newly found days. """
+        days = self.days_to_check(today)
+        found = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for day, available in zip(days, pool.map(self.check, days)):
+                    if available is True and day not in self.available:
+                        found.append(day)
+                    self.record(day, available)
+        finally:
+            self.save()
+        return found
+
+    def save(self):
+        if not os.path.isdir(os.path.dirname(self.index_path)):
+            os.makedirs(os.path.dirname(self.index_path))
+        with open(self.index_path + '.tmp', 'w') as f:
+            json.dump({'year': self.year, 'available': [day.isoformat() for day in self.available],
+                       'missing': [day.isoformat() for day in sorted(self.missing)],
+                       'failed': [day.isoformat() for day in sorted(self.failed)]}, f)
+        os.replace(self.index_path + '.tmp', self.index_path)
+
+    def html(self, today=None):
+        """ The HTML listing of the available Congressional Records, a section per month up to today's. """
+        today = today if today is not None else date.today()
+        html_text = '<!DOCTYPE html>\n<html>\n'
+        html_text += '<head><title>Congressional Records {}</title></head>\n'.format(self.year)
+        html_text += '<body>\n'
+        for month in range(1, 13):
+            if self.year == today.year and month > today.month:
+                break
+            month_name = calendar.month_name[month]
+            html_text += '<h2>{} {}</h2>\n'.format(month_name, self.year)
+            for day in self.available:
+                if day.month == month:
+                    html_text += '<a href="{}">{}</a><br>\n'.format(
+                        record_url(day), 'Congressional Record for {}, {} {}, {}'
+                        .format(calendar.day_name[day.weekday()], month_name, day.day, self.year))
+            html_text += '<br>\n'
+        html_text += '</body>\n</html>\n'
+        return html_text
+
+    def write_html(self, path=None):
+        path = path if path is not None else 'Congressional_Records_{}.html'.format(self.year)
+        with open(path, 'wt') as f:
+            f.write(self.html())
@@ -0,0 +1,90 @@
+""" Durable record of what a crawl has fetched, kept in a SQLite database.
+
+    Every item of a collection (e.g. 'house_votes_2019' roll call numbers) gets a row with its status
+    ('done' or 'failed'), the last HTTP status code, a hash of the content, the number of attempts and
+    the time of the first attempt, last attempt and completion. Rows are written as soon as each item
+    finishes, so a crashed crawl can resume where it stopped, and a repair pass can retry just the
+    failed items instead of rerunning the whole crawl. """
+
+import hashlib
+import sqlite3
+import threading
+from time import time
+
+
+class CrawlManifest:
+    def __init__(self, path='data/crawl_manifest.sqlite'):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS items ('
+                        'collection TEXT, number INTEGER, status TEXT, http_code INTEGER, content_hash TEXT, '
+                        'attempts INTEGER, first_attempt REAL, last_attempt REAL, completed REAL, '
+                        'PRIMARY KEY (collection, number))')
+        self.db.execute('CREATE TABLE IF NOT EXISTS runs (collection TEXT PRIMARY KEY, started REAL, finished REAL)')
+        self.db.commit()
+
+    def record(self, collection, number, status, http_code=None, content=None):
+        """ Record the outcome of one attempt at an item. content (bytes) is hashed, not stored. """
+        content_hash = hashlib.sha1(content).hexdigest() if content is not None else None
+        now = time()
+        completed = now if status == 'done' else None
+        with self.lock:
+            self.db.execute('INSERT INTO items VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?) '
+                            'ON CONFLICT (collection, number) DO UPDATE SET status = excluded.status, '
+                            'http_code = excluded.http_code, content_hash = excluded.content_hash, '
+                            'attempts = attempts + 1, last_attempt = excluded.last_attempt, '
+                            'completed = COALESCE(excluded.completed, completed)',
+                            (collection, number, status, http_code, content_hash, now, now, completed))
+            self.db.commit()
+
+    def numbers(self, collection, status):
+        """ Return the set of item numbers of the collection with the given status. """
+        with self.lock:
+            rows = self.db.execute('SELECT number FROM items WHERE collection = ? AND status = ?',
+                                   (collection, status)).fetchall()
+        return set(row[0] for row in rows)
+
+    def item(self, collection, number):
+        """ Return the row for one item as a dictionary, or None if it was never attempted. """
+        with self.lock:
+            row = self.db.execute('SELECT status, http_code, content_hash, attempts, first_attempt, last_attempt, '
+                                  'completed FROM items WHERE collection = ? AND number = ?',
+                                  (collection, number)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('status', 'http_code', 'content_hash', 'attempts', 'first_attempt', 'last_attempt',
+                         'completed'), row))
+
+    def import_done(self, collection, numbers):
+        """ Mark items already saved on disk (e.g. by a crawl from before the manifest existed) as done,
+            leaving items the manifest already knows about alone. """
+        now = time()
+        with self.lock:
+            self.db.executemany('INSERT OR IGNORE INTO items VALUES (?, ?, \'done\', NULL, NULL, 0, ?, ?, ?)',
+                                [(collection, number, now, now, now) for number in numbers])
+            self.db.commit()
+
+    def begin_run(self, collection):
+        """ Start a crawl of the collection and return its start time. If the previous crawl never
+            finished, its start time is returned instead so the crawl resumes rather than restarts. """
+        with self.lock:
+            row = self.db.execute('SELECT started, finished FROM runs WHERE collection = ?',
+                                  (collection,)).fetchone()
+            if row is not None and row[1] is None:
+                return row[0]
+            started = time()
+            self.db.execute('INSERT OR REPLACE INTO runs VALUES (?, ?, NULL)', (collection, started))
+            self.db.commit()
+        return started
+
+    def finish_run(self, collection):
+        with self.lock:
+            self.db.execute('UPDATE runs SET finished = ? WHERE collection = ?', (time(), collection))
+            self.db.commit()
+
+    def completed_since(self, collection, since):
+        """ Return the set of item numbers completed at or after the given time. """
+        with self.lock:
+            rows = self.db.execute('SELECT number FROM items WHERE collection = ? AND completed >= ?',
+                                   (collection, since)).fetchall()
+        return set(row[0] for row in rows)
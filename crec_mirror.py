@@ -0,0 +1,233 @@
+""" Local mirror of the daily Congressional Record PDF files found by congressional_records.py.
+
+    Each PDF is streamed to disk in chunks as <name>.pdf.part and renamed to <name>.pdf once its size
+    matches what the server announced. A download that is cut off leaves the .part file behind, and the
+    next attempt (in the same run or a later one) asks only for the missing bytes with an HTTP Range
+    request. The ETag (or Last-Modified date) of the response is kept next to the .part file as
+    <name>.pdf.part.validator and sent back with If-Range, so if the file changed on the server the
+    whole new file is sent rather than the rest of the new one appended to the start of the old one.
+    The bytes are written as sent (Accept-Encoding: identity, never decoded), so the offsets always
+    match the server's. The size and SHA-256 of every completed file are kept in data/crec/<year>/manifest.json, so
+    files already in the mirror are skipped, and verify() can check them for damage. Several files are
+    downloaded at the same time through the shared fetch layer.
+
+    Example: python crec_mirror.py 2019 2020
+             python crec_mirror.py 2019 --verify """
+
+import os
+import re
+import argparse
+import json
+import hashlib
+import threading
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+from http_fetch import fetch, HttpFetcher
+from congressional_records import CongressionalRecords, record_url
+
+
+# Content-Range of a 206 response, e.g. 'bytes 1000-1999/2000'
+_content_range = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)')
+
+
+class IncompleteDownload(ValueError):
+    """ A download that ended with a different size than the server announced. """
+    pass
+
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CrecMirror.CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class CrecMirror:
+    # Bytes read from the response and written to disk at a time
+    CHUNK_SIZE = 65536
+
+    def __init__(self, year, workers=4, retries=3, mirror_dir=None):
+        self.year = year
+        # Number of files downloaded at the same time
+        self.workers = workers
+        # Number of times a cut off download is resumed before giving up on the file for this run
+        self.retries = retries
+        self.mirror_dir = mirror_dir if mirror_dir is not None else 'data/crec/{}'.format(year)
+        if not os.path.isdir(self.mirror_dir):
+            os.makedirs(self.mirror_dir)
+        self.manifest_path = '{}/manifest.json'.format(self.mirror_dir)
+        self.lock = threading.Lock()
+        try:
+            with open(self.manifest_path, 'r') as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+
+    def save_manifest(self):
+        with self.lock:
+            with open(self.manifest_path + '.tmp', 'w') as f:
+                json.dump(self.manifest, f, indent=1, sort_keys=True)
+            os.replace(self.manifest_path + '.tmp', self.manifest_path)
+
+    def path(self, url):
+        return '{}/{}'.format(self.mirror_dir, url.split('/')[-1])
+
+    def is_complete(self, url):
+        """ True if the file is in the mirror with the size recorded when it was downloaded. """
+        entry = self.manifest.get(url.split('/')[-1])
+        path = self.path(url)
+        return entry is not None and os.path.exists(path) and os.path.getsize(path) == entry['size']
+
+    def download(self, url):
+        """ Download url into the mirror, resuming a partial download. Returns the number of bytes
+            transferred, 0 if the file was already complete. Raises the last error (IncompleteDownload if
+            the file did not arrive whole) once the retries are used up. """
+        if self.is_complete(url):
+            return 0
+        transferred = 0
+        attempt = 0
+        while True:
+            try:
+                transferred += self._fetch_part(url)
+                return transferred
+            except HttpFetcher.RETRY_ERRORS + (IncompleteDownload,):
+                if attempt >= self.retries:
+                    raise
+            attempt += 1
+
+    def _fetch_part(self, url):
+        """ Fetch the rest of the file after the bytes already in its .part file, and complete it. """
+        path = self.path(url)
+        part_path = path + '.part'
+        validator_path = part_path + '.validator'
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        # The bytes on disk are the bytes sent, never decompressed, so they line up with the Range offsets
+        headers = {'Accept-Encoding': 'identity'}
+        if offset > 0:
+            headers['Range'] = 'bytes={}-'.format(offset)
+            if os.path.exists(validator_path):
+                # Only send the rest if the file is still the one the .part file was started from
+                with open(validator_path, 'r') as f:
+                    headers['If-Range'] = f.read()
+        r = fetch(url, headers=headers, stream=True)
+        try:
+            if r.status_code == 416:
+                # Nothing left after offset, the .part file already holds the whole file (or more)
+                content_range = r.headers.get('Content-Range', '')
+                size = int(content_range.split('/')[-1]) if content_range.split('/')[-1].isdigit() else offset
+                transferred = 0
+            else:
+                if r.status_code == 200:
+                    # No range request, the server ignored it or the file changed, so the whole file is coming
+                    offset = 0
+                elif r.status_code == 206:
+                    content_range = _content_range.match(r.headers.get('Content-Range', ''))
+                    if content_range is None or int(content_range.group(1)) != offset:
+                        # Not the bytes asked for, start the file again
+                        os.remove(part_path)
+                        raise IncompleteDownload('{} sent the range {} instead of bytes {}-'
+                                                 .format(url, r.headers.get('Content-Range'), offset))
+                else:
+                    r.raise_for_status()
+                    raise ValueError('Unexpected status {} for {}'.format(r.status_code, url))
+                if offset == 0:
+                    self.save_validator(r, validator_path)
+                size = self.expected_size(r, offset)
+                transferred = 0
+                with open(part_path, 'ab' if offset > 0 else 'wb') as f:
+                    try:
+                        for chunk in r.raw.stream(self.CHUNK_SIZE, decode_content=False):
+                            f.write(chunk)
+                            transferred += len(chunk)
+                    except urllib3.exceptions.HTTPError as e:
+                        # Read from the connection directly, so a cut off transfer is urllib3's error
+                        raise IncompleteDownload('{} was cut off after {} bytes: {}'.format(url, transferred, e))
+        finally:
+            r.close()
+        if size is not None and os.path.getsize(part_path) != size:
+            if os.path.getsize(part_path) > size:
+                # More than the whole file, the partial download cannot be trusted
+                os.remove(part_path)
+                raise IncompleteDownload('{} is larger than the {} bytes announced'.format(part_path, size))
+            raise IncompleteDownload('{} has {} of {} bytes'.format(part_path, os.path.getsize(part_path), size))
+        os.replace(part_path, path)
+        if os.path.exists(validator_path):
+            os.remove(validator_path)
+        with self.lock:
+            self.manifest[url.split('/')[-1]] = {'size': os.path.getsize(path), 'sha256': file_sha256(path)}
+        self.save_manifest()
+        return transferred
+
+    def save_validator(self, r, validator_path):
+        """ Keep the strong ETag (or else the Last-Modified date) of the response a .part file is started
+            from, for If-Range when it is resumed. """
+        etag = r.headers.get('ETag')
+        validator = etag if etag is not None and not etag.startswith('W/') else r.headers.get('Last-Modified')
+        if validator is not None:
+            with open(validator_path, 'w') as f:
+                f.write(validator)
+        elif os.path.exists(validator_path):
+            os.remove(validator_path)
+
+    def expected_size(self, r, offset):
+        """ The size of the whole file from a 200 or 206 response, or None if the server does not say. """
+        content_range = r.headers.get('Content-Range', '')
+        if r.status_code == 206 and '/' in content_range and content_range.split('/')[-1].isdigit():
+            return int(content_range.split('/')[-1])
+        if r.headers.get('Content-Length', '').isdigit():
+            return offset + int(r.headers['Content-Length'])
+        return None
+
+    def mirror(self, urls):
+        """ Download the urls not yet in the mirror, several at a time. Returns the (url, error) pairs of
+            the files that could not be completed; running again resumes them. """
+        failed = []
+        downloaded = 0
+
+        def download(url):
+            try:
+                return self.download(url), None
+            except Exception as e:
+                return 0, e
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for url, (transferred, error) in zip(urls, pool.map(download, urls)):
+                if error is not None:
+                    failed.append((url, error))
+                    print('{}: {}'.format(url, error))
+                downloaded += transferred
+        print('{}: {} bytes downloaded, {} of {} files in the mirror'
+              .format(self.year, downloaded, len(urls) - len(failed), len(urls)))
+        return failed
+
+    def verify(self):
+        """ Return the names of the mirrored files whose size or SHA-256 no longer matches the manifest.
+            They are dropped from the manifest, so the next mirror run downloads them again. """
+        damaged = []
+        for name, entry in sorted(self.manifest.items()):
+            path = '{}/{}'.format(self.mirror_dir, name)
+            if not os.path.exists(path) or os.path.getsize(path) != entry['size'] \
+                    or file_sha256(path) != entry['sha256']:
+                damaged.append(name)
+        with self.lock:
+            for name in damaged:
+                del self.manifest[name]
+        self.save_manifest()
+        return damaged
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mirror the Congressional Record PDF files of years')
+    parser.add_argument('years', type=int, nargs='*', help='years to mirror (default 2019)')
+    parser.add_argument('--verify', action='store_true', help='check the mirrored files first, damaged ones are '
+                                                               'downloaded again')
+    args = parser.parse_args()
+    for year in args.years or [2019]:
+        records = CongressionalRecords(year)
+        records.update()
+        mirror = CrecMirror(year)
+        if args.verify is True:
+            for name in mirror.verify():
+                print('{} is damaged'.format(name))
+        mirror.mirror([record_url(day) for day in records.available])
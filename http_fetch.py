@@ -0,0 +1,167 @@
+""" Shared HTTP fetch layer for the collectors. All page and XML requests go through one requests
+    Session, so connections to congress.gov, clerk.house.gov and senate.gov are kept alive and
+    reused instead of paying a new TCP+TLS handshake for every page. Transient failures (5xx
+    responses, connection resets, timeouts) are retried with exponential backoff and jitter, and
+    every request draws on a per-host rate budget (rate_limiter.py) that adapts to the host's health.
+
+    An optional ResponseCache (response_cache.py) makes repeat fetches conditional requests, and in
+    replay mode serves every request (HEAD requests included) from the cache without touching the
+    network. """
+
+import random
+import threading
+from time import sleep, monotonic
+import requests
+from requests.adapters import HTTPAdapter
+from rate_limiter import HostRateLimiter
+
+
+def retry_after(response):
+    """ The Retry-After delay of a response in seconds, or None if it has none (or gives a date). """
+    value = response.headers.get('Retry-After')
+    if value is not None and value.strip().isdigit():
+        return int(value)
+    return None
+
+
+class HttpFetcher:
+    # Response codes worth trying again, the server side is having a temporary problem
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+    # Connection level errors worth trying again
+    RETRY_ERRORS = (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError)
+
+    def __init__(self, timeout=(10, 60), retries=4, backoff=0.5, max_backoff=30, pool_size=16,
+                 cache=None, replay=False, rate_limiter=None):
+        # (connect, read) timeouts in seconds passed to every request
+        self.timeout = timeout
+        # Number of retries after the first attempt
+        self.retries = retries
+        # First retry delay in seconds, doubled on each further retry up to max_backoff
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Optional ResponseCache, and whether to serve only from it (no network access)
+        self.cache = cache
+        self.replay = replay
+        if self.replay and self.cache is None:
+            raise ValueError('Replay mode needs a response cache')
+        # Per-host request budget shared by everything using this fetcher
+        self.rate_limiter = rate_limiter if rate_limiter is not None else HostRateLimiter()
+
+        self.session = requests.Session()
+        # One keep-alive connection pool per host, sized for the number of concurrent requests to a host
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def retry_delay(self, attempt):
+        """ Exponential backoff with jitter, so retries from concurrent requests do not all land on the
+            host at the same moment. """
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def get(self, url, **kwargs):
+        """ GET the url and return the requests Response, going through the response cache when one is
+            configured. Streamed requests bypass the cache, and in replay mode they get the not recorded
+            response since their bodies are never recorded. """
+        if self.replay:
+            entry = self.cache.get(url) if not kwargs.get('stream') else None
+            if entry is None:
+                return self.cache.not_recorded(url)
+            return self.cache.to_response(url, entry)
+        if self.cache is None or kwargs.get('stream'):
+            return self._get(url, **kwargs)
+        entry = self.cache.get(url)
+        if entry is not None and entry['status'] == 200:
+            headers = dict(kwargs.get('headers') or {})
+            headers.update(self.cache.conditional_headers(entry))
+            kwargs['headers'] = headers
+        r = self._get(url, **kwargs)
+        if r.status_code == 304 and entry is not None:
+            # Not modified, the cached body is still current
+            self.cache.touch(url)
+            return self.cache.to_response(url, entry)
+        if self.cacheable(r, entry):
+            self.cache.put(url, r)
+        return r
+
+    def cacheable(self, response, entry):
+        """ Whether to record a response in the cache. Successful responses and 404s (a replayed crawl
+            needs the same end-of-range 404 the recorded one saw) are kept; throttling and other error
+            responses are not, and a cached 200 is only ever replaced by another successful response. """
+        if 200 <= response.status_code < 300:
+            return True
+        return response.status_code == 404 and (entry is None or entry['status'] != 200)
+
+    def head(self, url, **kwargs):
+        """ HEAD the url and return the requests Response, e.g. to check that a large file exists without
+            downloading it. With a response cache the answer is recorded (apart from the GET of the same
+            url), and in replay mode it is served from the recording. """
+        if self.cache is None:
+            return self._get(url, method='HEAD', **kwargs)
+        key = 'HEAD {}'.format(url)
+        entry = self.cache.get(key)
+        if self.replay:
+            if entry is None:
+                return self.cache.not_recorded(url)
+            return self.cache.to_response(url, entry)
+        r = self._get(url, method='HEAD', **kwargs)
+        if self.cacheable(r, entry):
+            self.cache.put(key, r)
+        return r
+
+    def _get(self, url, method='GET', **kwargs):
+        """ GET (or HEAD) the url and return the requests Response. Retries on the RETRY_STATUS codes and
+            RETRY_ERRORS exceptions; after the last retry the final response is returned (or the final
+            exception raised) so callers see the same result a plain requests.get would give them. """
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(url)
+            started = monotonic()
+            try:
+                r = self.session.request(method, url, **kwargs)
+            except self.RETRY_ERRORS:
+                self.rate_limiter.report(url, None, monotonic() - started)
+                if attempt >= self.retries:
+                    raise
+            else:
+                self.rate_limiter.report(url, r.status_code, monotonic() - started, retry_after(r))
+                if r.status_code not in self.RETRY_STATUS or attempt >= self.retries:
+                    return r
+                r.close()
+            sleep(self.retry_delay(attempt))
+            attempt += 1
+
+
+_shared_fetcher = None
+_shared_lock = threading.Lock()
+
+
+def configure(**kwargs):
+    """ Replace the shared fetcher with one built from the given HttpFetcher settings
+        (timeout, retries, backoff, max_backoff, pool_size, cache, replay, rate_limiter). """
+    global _shared_fetcher
+    with _shared_lock:
+        _shared_fetcher = HttpFetcher(**kwargs)
+    return _shared_fetcher
+
+
+def get_fetcher():
+    """ Return the fetcher shared by all collectors, creating it with default settings on first use. """
+    global _shared_fetcher
+    with _shared_lock:
+        if _shared_fetcher is None:
+            _shared_fetcher = HttpFetcher()
+        return _shared_fetcher
+
+
+def fetch(url, **kwargs):
+    """ GET a url through the shared fetcher. """
+    return get_fetcher().get(url, **kwargs)
+
+
+def head(url, **kwargs):
+    """ HEAD a url through the shared fetcher. """
+    return get_fetcher().head(url, **kwargs)
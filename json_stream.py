@@ -0,0 +1,96 @@
+""" Incremental reader for large JSON files such as the <Type>_<year>.json bill files, which hold every
+    bill of a type (once with the full bill texts) in one array. JsonArrayReader finds an array inside
+    the file by its key path and yields its items one at a time, reading the file in chunks, so only
+    the item being decoded is held in memory however large the file is.
+
+    Example: for bill in JsonArrayReader(f, ['bill_data', 'bill']): ... """
+
+import json
+
+
+class JsonArrayReader:
+    CHUNK_SIZE = 65536
+
+    def __init__(self, f, key_path):
+        """ Position the reader at the start of the array found by following key_path (object keys from
+            the top level) in the open text file f. Raises KeyError if there is no such array. """
+        self.f = f
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+        for key in key_path:
+            self._find_key(key)
+        if self._next_char() != '[':
+            raise KeyError(key_path[-1])
+        self.position += 1
+
+    def _fill(self):
+        """ Read more of the file into the buffer, dropping what has been consumed. Returns False at the
+            end of the file. """
+        if self.eof:
+            return False
+        self.buffer = self.buffer[self.position:]
+        self.position = 0
+        # Read at least as much as is buffered, so a large item is completed in a few reads
+        chunk = self.f.read(max(self.CHUNK_SIZE, len(self.buffer)))
+        if chunk == '':
+            self.eof = True
+            return False
+        self.buffer += chunk
+        return True
+
+    def _next_char(self):
+        """ Skip white space and return the next character without consuming it ('' at the end). """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in ' \t\r\n':
+                self.position += 1
+            if self.position < len(self.buffer) or not self._fill():
+                return self.buffer[self.position:self.position + 1]
+
+    def _decode(self):
+        """ Decode and consume the JSON value at the current position. """
+        self._next_char()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # A number cut at the end of the buffer decodes too, but continues in the next chunk
+                if self.eof or (end < len(self.buffer) and self.buffer[end] in ',:]} \t\r\n'):
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def _find_key(self, key):
+        """ Consume the object at the current position up to the value of key. """
+        if self._next_char() != '{':
+            raise KeyError(key)
+        self.position += 1
+        while True:
+            if self._next_char() in ['}', '']:
+                raise KeyError(key)
+            name = self._decode()
+            if self._next_char() != ':':
+                raise ValueError('Expected ":" after key "{}"'.format(name))
+            self.position += 1
+            if name == key:
+                return
+            # Skip the value of another key
+            self._decode()
+            if self._next_char() == ',':
+                self.position += 1
+
+    def __iter__(self):
+        if self._next_char() == ']':
+            self.position += 1
+            return
+        while True:
+            yield self._decode()
+            separator = self._next_char()
+            self.position += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError('Expected "," or "]" between array items, found "{}"'.format(separator))
@@ -0,0 +1,117 @@
+""" Table of the legislators who sponsor and cosponsor bills, kept in a SQLite database.
+
+    Every member gets a stable integer id the first time they are seen, from their title (Rep/Sen),
+    name, party letter, state and district. Bills then refer to their sponsor and cosponsors by id
+    (sponsor_id, cosponsor_ids) rather than repeating the names and party, which are taken from the
+    member (sponsor_text, party_name) when a bill is shown or exported, and a member to bills index records
+    which bills each member sponsored or cosponsored. The members are also held in memory, so looking
+    up a member or the party of a list of ids does not touch the database. """
+
+import re
+import sqlite3
+import threading
+
+# e.g. 'Rep. Smith, Adam [D-WA-9]' or 'Sen. Cornyn, John [R-TX]'
+_sponsor = re.compile(r'\s*(\w+)\.\s+(.*?)\s*\[(\w*)-(\w*)-?([^\]]*)\]')
+# Party letter to the party name bill listings and exports use, any other letter is 'Independent'
+PARTY_NAMES = {'D': 'Democratic', 'R': 'Republican'}
+
+
+def party_name(party):
+    """ Return the party name of a member's party letter, e.g. 'Democratic' for 'D'. """
+    return PARTY_NAMES.get(party, 'Independent')
+
+
+def parse_sponsor(sponsor):
+    """ Return (title, name, party, state, district) from a sponsor string, or None. """
+    member = _sponsor.match(sponsor)
+    if member is None:
+        return None
+    return member.groups()
+
+
+def parse_cosponsor(cosponsor):
+    """ Return (title, name, party, state, district) from a cosponsors_list entry, the
+        (title, name, party, state-district) groups found in a cosponsors table. """
+    title = cosponsor[0].split('>')[-1].strip()
+    state, _, district = cosponsor[3].partition('-')
+    return title, cosponsor[1], cosponsor[2], state, district
+
+
+class LegislatorTable:
+    def __init__(self, path='data/legislators.sqlite'):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS members ('
+                        'id INTEGER PRIMARY KEY, title TEXT, name TEXT, party TEXT, state TEXT, district TEXT, '
+                        'UNIQUE (title, name, party, state, district))')
+        self.db.execute('CREATE TABLE IF NOT EXISTS member_bills ('
+                        'member_id INTEGER, collection TEXT, number INTEGER, role TEXT, '
+                        'PRIMARY KEY (member_id, collection, number, role))')
+        self.db.execute('CREATE INDEX IF NOT EXISTS member_bills_bill ON member_bills (collection, number)')
+        self.db.commit()
+        # Member id to member, and (title, name, party, state, district) to member id
+        self.members = {}
+        self.ids = {}
+        for row in self.db.execute('SELECT id, title, name, party, state, district FROM members'):
+            self.members[row[0]] = dict(zip(('id', 'title', 'name', 'party', 'state', 'district'), row))
+            self.ids[row[1:]] = row[0]
+
+    def member_id(self, title, name, party, state, district):
+        """ Return the id of the member, adding them to the table if they are new. Another table (or
+            process) on the same database may have added the member since this one was loaded, so the
+            insert is ignored if they are there and the id is read back either way. """
+        key = (title, name, party, state, district)
+        with self.lock:
+            if key not in self.ids:
+                self.db.execute('INSERT OR IGNORE INTO members (title, name, party, state, district) '
+                                'VALUES (?, ?, ?, ?, ?)', key)
+                self.db.commit()
+                member_id = self.db.execute('SELECT id FROM members WHERE title = ? AND name = ? AND party = ? '
+                                            'AND state = ? AND district = ?', key).fetchone()[0]
+                self.ids[key] = member_id
+                self.members[member_id] = dict(zip(('id', 'title', 'name', 'party', 'state', 'district'),
+                                                   (member_id,) + key))
+            return self.ids[key]
+
+    def member(self, member_id):
+        """ Return the member with the id as a dictionary (id, title, name, party, state, district). """
+        return self.members[member_id]
+
+    def sponsor_text(self, member_id):
+        """ Return the member as congress.gov shows a sponsor, e.g. 'Rep. Smith, Adam [D-WA-9]'. """
+        member = self.members[member_id]
+        seat = '-'.join(part for part in (member['party'], member['state'], member['district']) if part)
+        return '{}. {} [{}]'.format(member['title'], member['name'], seat)
+
+    def record_bill(self, collection, number, sponsor_id, cosponsor_ids):
+        """ Record the sponsor and cosponsors of a bill in the member to bills index, replacing what was
+            recorded for the bill before. """
+        rows = [(member_id, collection, number, 'cosponsor') for member_id in cosponsor_ids]
+        if sponsor_id is not None:
+            rows.append((sponsor_id, collection, number, 'sponsor'))
+        with self.lock:
+            self.db.execute('DELETE FROM member_bills WHERE collection = ? AND number = ?', (collection, number))
+            self.db.executemany('INSERT OR IGNORE INTO member_bills VALUES (?, ?, ?, ?)', rows)
+            self.db.commit()
+
+    def bills(self, member_id, role=None):
+        """ Return the (collection, number, role) of the bills the member sponsored or cosponsored, or
+            only those with the given role ('sponsor' or 'cosponsor'). """
+        with self.lock:
+            if role is None:
+                rows = self.db.execute('SELECT collection, number, role FROM member_bills WHERE member_id = ? '
+                                       'ORDER BY collection, number', (member_id,)).fetchall()
+            else:
+                rows = self.db.execute('SELECT collection, number, role FROM member_bills '
+                                       'WHERE member_id = ? AND role = ? ORDER BY collection, number',
+                                       (member_id, role)).fetchall()
+        return rows
+
+    def party_counts(self, member_ids):
+        """ Return a dictionary of party letter to the number of the members that belong to it. """
+        counts = {}
+        for member_id in member_ids:
+            party = self.members[member_id]['party']
+            counts[party] = counts.get(party, 0) + 1
+        return counts
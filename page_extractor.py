@@ -0,0 +1,164 @@
+""" Field extraction for congress.gov bill, cosponsors, text, legislative subjects and nomination pages.
+
+    Pages are several hundred KB of HTML. Each field is found by locating its label with str.find and
+    then matching a precompiled pattern from that offset (pattern.search(text, pos)), so no copy of the
+    rest of the page is made for every field and no pattern is compiled per call.
+
+    The parse functions take the page text, so saved pages can be parsed without any network access
+    (see benchmark_page_extractor.py). """
+
+import re
+
+_sponsor = re.compile(r'<td><a\W.*>(.*?)</a>(.*?)</td>')
+_td = re.compile('<td>(.*?)</td>')
+_committee_report = re.compile(r'<td><a\W.*?href="(.*?)">(.*?)</a></td>')
+_latest_action = re.compile(r'<td>(.*?)\(<a\W.*?href="(.*?)">(.*?)</a>.*</td>')
+_li = re.compile(r'<li>(.*?)</li>')
+_subjects_link = re.compile(r'<li><a\W.*?href="(.*?)">')
+_text_paragraph = re.compile('class="primary">.*<p>(.*?)</p>.*</main>')
+_cosponsor = re.compile(r'">(.*?)\.\W(.*?)\W\[(.?)-(.*?)\]')
+_subject = re.compile(r'<li><a.*?>(.*?)</a></li>')
+_cosponsor_count = re.compile(r'Cosponsors\s*\((\d+)\)')
+
+
+def _title(text):
+    title_start = text.find('<title>') + len('<title>')
+    title_end = text.find('</title>')
+    return text[title_start:title_end]
+
+
+def _search_after(pattern, text, label, skip=0):
+    """ Match pattern from the first occurrence of label (moved on by skip characters), or None. """
+    start = text.find(label)
+    if start < 0:
+        return None
+    return pattern.search(text, start + skip)
+
+
+def parse_bill_page(text, url, number):
+    """ Return the bill dictionary parsed from a bill's main page. The sub-page fields (text,
+        cosponsors_list, cosponsors_table and, if the page links to its subjects, subjects) are left as
+        None for the caller to fill in. """
+    bill = {'title': _title(text),
+            'url': url + '/text',
+            'number': number,
+            'cosponsors': url + '/cosponsors',
+            'text': None,
+            'cosponsors_list': None,
+            'cosponsors_table': None}
+    tracker_start = text.find('<p class="hide_fromsighted">')
+    if tracker_start < 0:
+        bill['reserved'] = True
+        return bill
+    tracker_start += len('<p class="hide_fromsighted">')
+    tracker_end = text.find('</p>', tracker_start)
+    bill['status'] = text[tracker_start:tracker_end] if tracker_end >= 0 else ''
+    # Check for Sponsor
+    sponsor_at = _search_after(_sponsor, text, 'Sponsor:')
+    if sponsor_at is not None:
+        sponsor = sponsor_at.group(1)
+        bill['sponsor'] = sponsor
+        bill['introduced'] = sponsor_at.group(2)
+        if sponsor.find('[R-') >= 0:
+            party = 'Republican'
+        elif sponsor.find('[D-') >= 0:
+            party = 'Democratic'
+        else:
+            party = 'Independent'
+        bill['party'] = party
+    # Check for Committee
+    committees = _search_after(_td, text, 'Committees:')
+    if committees is not None:
+        bill['committees'] = committees.group(1)
+    # Check for Committee Report
+    committee_reports = _search_after(_committee_report, text, 'Committee Reports:')
+    if committee_reports is not None:
+        bill['committee_reports'] = committee_reports.group(2)
+        bill['committee_reports_url'] = committee_reports.group(1)
+    # Check for Latest Action
+    action = _search_after(_latest_action, text, 'Latest Action:')
+    if action is not None:
+        bill['latest_action'] = action.group(1)
+        bill['all_actions_url'] = action.group(2)
+    policy_start = text.find('Policy Area:<')
+    if policy_start >= 0:
+        policy = _li.search(text, policy_start)
+        if policy is not None:
+            bill['policy_area'] = policy.group(1)
+            subjects = _subjects_link.search(text, policy_start)
+            if subjects is not None:
+                bill['subjects_url'] = 'https://www.congress.gov' + subjects.group(1)
+                bill['subjects'] = None
+    return bill
+
+
+def parse_cosponsor_count(text):
+    """ Return the cosponsor count shown on a bill's main page (as a string), or None. """
+    count = _cosponsor_count.search(text)
+    return count.group(1) if count is not None else None
+
+
+def parse_nomination_page(text, url, number):
+    """ Return the nomination dictionary parsed from a nomination page. """
+    bill = {'title': _title(text),
+            'url': url,
+            'number': number}
+    # Find Description, Latest Action, Date Received from President, Committee, All Actions
+    description = _search_after(_li, text, '>Description<', len('>Description<'))
+    if description is not None:
+        bill['description'] = description.group(1)
+    nominees = _search_after(_li, text, '>Nominees<', len('>Nominees<'))
+    if nominees is not None:
+        bill['nominees'] = nominees.group(1)
+    committee = _search_after(_li, text, '>Committee<', len('>Committee<'))
+    if committee is not None:
+        bill['committees'] = committee.group(1)
+    # The organization search has always skipped len('>Committee<') past its label
+    organization = _search_after(_li, text, '>Organization</h2>', len('>Committee<'))
+    if organization is not None:
+        bill['organization'] = organization.group(1)
+    latest_action = _search_after(_li, text, '>Latest Action<', len('>Latest Action<'))
+    if latest_action is not None:
+        bill['latest_action'] = latest_action.group(1)
+    date_received = _search_after(_li, text, '>Date Received from President<',
+                                  len('>Date Received from President<'))
+    if date_received is not None:
+        bill['date_received'] = date_received.group(1)
+    return bill
+
+
+def parse_text_page(text):
+    """ Return the bill text from a bill's text page (?format=txt), or None. """
+    search_for = '<pre id="billTextContainer">'
+    text_start = text.find(search_for)
+    if text_start >= 0:
+        text_start += len(search_for)
+        text_end = text.find('</pre>', text_start)
+        if text_end >= 0:
+            return text[text_start:text_end]
+    paragraph = _text_paragraph.search(text)
+    if paragraph is not None:
+        return paragraph.group(1)
+    return None
+
+
+def parse_cosponsors_page(text):
+    """ Return the cosponsors table HTML (or None) and the list of (title, name, party, state) tuples
+        parsed from it. """
+    table_start = text.find('<table class="item_table">')
+    if table_start >= 0:
+        table_end = text.find('</table>', table_start)
+        if table_end >= 0:
+            table_end += len('</table>')
+            return text[table_start:table_end], _cosponsor.findall(text, table_start, table_end)
+    return None, []
+
+
+def parse_subjects_page(text):
+    """ Return the legislative subjects listed on a bill's subjects page. """
+    subjects_start = text.find('>Legislative Subjects<')
+    if subjects_start >= 0:
+        subjects_end = text.find('<!-- end row -->', subjects_start)
+        if subjects_end >= 0:
+            return _subject.findall(text, subjects_start, subjects_end)
+    return []
@@ -1,8 +1,14 @@
 import os
 import json
 import numpy as np
-from matplotlib import pyplot as plt
+import matplotlib
 from datetime import datetime as dt
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+
+# The charts are only saved to files, so use the non-interactive backend (in the chart workers too)
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
 
 
 def wrap_text(text, max_characters):
@@ -21,11 +27,279 @@ def wrap_text(text, max_characters):
     return text
 
 
+def house_party_votes(meta):
+    """ Return the Democratic, Republican and Independent [yea, nay, present, not voting] counts of a
+        House roll call from its vote-metadata. """
+    party_votes = []
+    for party in ['Democratic', 'Republican', 'Independent']:
+        totals = [i['totals-by-party'] for i in meta['vote-totals'][0:3] if i['totals-by-party']['party'] == party]
+        party_votes.append([int(totals[0]['yea-total']), int(totals[0]['nay-total']),
+                            int(totals[0]['present-total']), int(totals[0]['not-voting-total'])])
+    return party_votes
+
+
+def senate_party_votes(vote_set):
+    """ Return a dictionary of party ('D', 'R', 'I') to the [yea, nay, present, not voting] counts of a
+        Senate roll call vote. """
+    party_votes = {'D': [], 'R': [], 'I': []}
+    for party in ['D', 'R', 'I']:
+        party_votes[party].append(len([i for i in vote_set['members']
+                                      if (i['member']['party'] == party)
+                                      and (i['member']['vote_cast'] in ['Yes', 'Yea', 'Aye', 'Y'])]))
+        party_votes[party].append(len([i for i in vote_set['members']
+                                      if (i['member']['party'] == party)
+                                      and (i['member']['vote_cast'] in ['No', 'Nay', 'N'])]))
+        party_votes[party].append(len([i for i in vote_set['members']
+                                      if (i['member']['party'] == party)
+                                      and (i['member']['vote_cast'] in ['Present', 'present'])]))
+        party_votes[party].append(len([i for i in vote_set['members']
+                                      if (i['member']['party'] == party)
+                                      and (i['member']['vote_cast'] in ['Not Voting'])]))
+    return party_votes
+
+
+def house_bipartisan_percent(dem_votes, rep_votes, ind_votes):
+    """ The level of bipartisan agreement of a House vote, from each party's vote counts. """
+    dem_max = max(dem_votes)
+    dem_max_index = dem_votes.index(max(dem_votes))
+    rep_max = max(rep_votes)
+    rep_max_index = rep_votes.index(max(rep_votes))
+    ind_max = max(ind_votes)
+    ind_max_index = ind_votes.index(max(ind_votes))
+
+    # Calculate the level of bipartisan agreement as a percentage of the total votes
+    if sum(dem_votes) == 0:
+        bipartisan = 0
+    else:
+        bipartisan = dem_max / sum(dem_votes)
+    # Same index for max votes in two parties indicates agreement
+    if sum(rep_votes) != 0 and dem_max_index == rep_max_index:
+        bipartisan += rep_max / sum(rep_votes)
+    elif sum(rep_votes) != 0:
+        bipartisan = abs(bipartisan - (rep_max / sum(rep_votes)))
+    if sum(ind_votes) > 0:
+        if dem_max_index == ind_max_index:
+            bipartisan += ind_max / sum(ind_votes)
+        else:
+            bipartisan = abs(bipartisan - (ind_max / sum(ind_votes)))
+    return 50 * bipartisan
+
+
+def senate_bipartisan_percent(party_votes):
+    """ The level of bipartisan agreement of a Senate vote, from senate_party_votes. Independents are
+        counted with the party they voted with. """
+    dem_max = max(party_votes['D'])
+    dem_max_index = party_votes['D'].index(max(party_votes['D']))
+    rep_max = max(party_votes['R'])
+    rep_max_index = party_votes['R'].index(max(party_votes['R']))
+    ind_max = max(party_votes['I'])
+    ind_max_index = party_votes['I'].index(max(party_votes['I']))
+
+    dem_sum = sum(party_votes['D'])
+    rep_sum = sum(party_votes['R'])
+    ind_sum = sum(party_votes['I'])
+
+    if dem_max_index == ind_max_index:
+        dem_max += ind_max
+        dem_sum += ind_sum
+    elif rep_max_index == ind_max_index:
+        rep_max += ind_max
+        rep_sum += ind_sum
+
+    # Calculate the level of bipartisan agreement as a percentage of the total votes
+    bipartisan = dem_max / dem_sum
+    # Same index for max votes in two parties indicates agreement
+    if dem_max_index == rep_max_index:
+        bipartisan += rep_max / rep_sum
+    else:
+        bipartisan = abs(bipartisan - (rep_max / rep_sum))
+    return 50 * bipartisan
+
+
+def draw_house_figure(images_dir, meta, vote_set):
+    """ Draw the chart of a House roll call and save it as images_dir/roll<number>.png. """
+    figsize = 1.5
+    radius = 0.9
+    size = 0.2
+    title = 'Roll call {}  ({})'.format(meta['rollcall-num'], meta['action-date'])
+    if 'legis-num' in meta.keys():
+        title += '\n{}'.format(meta['legis-num'])
+    if 'vote-desc' in meta.keys() and meta['vote-desc'] != '':
+        title += '\n{}'.format(wrap_text(['vote-desc'], 100))
+    elif 'amendment-num' in meta.keys() and meta['amendment-num'] != '':
+        title += '\nAmendment {}'.format(wrap_text(['amendment-num'], 100))
+        title += '\nAuthor: {}'.format(wrap_text(['amendment-author'], 100))
+    title += '\n{} ({})'.format(meta['vote-question'], meta['vote-type'])
+    title += '\n{}'.format(meta['vote-result'])
+
+    if 'totals-by-vote' in meta['vote-totals'][3].keys():
+        fig = plt.figure(figsize=(7, 6))
+        ax = plt.subplot2grid((2, 5), (0, 0), colspan=4, rowspan=2)
+        ax2 = plt.subplot2grid((2, 5), (1, 4), colspan=1)
+        ax.set_title(title)
+        labels = ['Yes', 'No', 'Present', 'Not Voting']
+        totals = meta['vote-totals'][3]['totals-by-vote']
+        yes = int(totals['yea-total'])
+        no = int(totals['nay-total'])
+        present = int(totals['present-total'])
+        not_voting = int(totals['not-voting-total'])
+        total_votes = yes + no + present + not_voting
+        sizes = [yes, no, present, not_voting]
+        colors = ['#33FF33', '#CCCCCC', 'gray', 'white']
+        pie = ax.pie(sizes, autopct='%d%%', pctdistance=0.9, colors=colors, counterclock=False, radius=radius,
+                     labels=labels, shadow=False, startangle=-90, wedgeprops=dict(width=size, edgecolor='w'),
+                     labeldistance=1.05)
+        for i, a in enumerate(pie[2]):
+            if float(a.get_text().strip('%')) < 2:
+                a.set_text('')
+                ax.texts[i*2].set_text('')
+        ax.legend(pie[0], labels, bbox_to_anchor=(1, 0, 0.5, 1.75), loc="center left")
+
+        # Create by party results nested pie chart
+        dem_votes, rep_votes, ind_votes = house_party_votes(meta)
+        results = [count for option in zip(dem_votes, rep_votes, ind_votes) for count in option]
+        bipartisan_percent = house_bipartisan_percent(dem_votes, rep_votes, ind_votes)
+
+        party_labels = ['Democratic', 'Republican', 'Independent']
+        inner_colors = ['blue', 'red', 'purple']
+        pie = ax.pie(results, autopct='%d%%', pctdistance=0.85, colors=inner_colors, counterclock=False,
+                     shadow=False, startangle=-90, radius=radius-size,
+                     wedgeprops=dict(width=radius-size, edgecolor='w'))
+        for i, a in enumerate(pie[2]):
+            if results[i] >= 5:
+                a.set_text('{}'.format(results[i]))
+            else:
+                a.set_text('')
+        ax.set(aspect="equal")
+        plt.legend(pie[0], party_labels, bbox_to_anchor=(-0.25, 0, 0, 2.95), loc="center left")
+
+        # Create barchart
+        ax2.bar([0], bipartisan_percent, width=1, bottom=None, color='black')
+        plt.xticks([0])
+        plt.yticks(np.arange(0, 101, 10))
+        ax2.set_title('Bipartisan Percent\n{:.1f}%'.format(bipartisan_percent))
+    elif 'totals-by-candidate' in meta['vote-totals'][3].keys():
+        # The vote was special, not producing normal vote total counts
+        fig = plt.figure(figsize=(8, 6))
+        plt.title(title)
+        vote_list = meta['vote-totals']
+        vote_counts = []
+        vote_for = []
+        for item in vote_list:
+            vote_for.append(item['totals-by-candidate']['candidate'])
+            vote_counts.append(int(item['totals-by-candidate']['candidate-total']))
+        pie = plt.pie(vote_counts, autopct='%d%%', counterclock=False, shadow=False, startangle=-90,
+                      radius=radius, wedgeprops=dict(width=size, edgecolor='w'))
+        for i, a in enumerate(pie[2]):
+            if float(a.get_text().strip('%')) < 2:
+                a.set_text('')
+        plt.legend(pie[0], vote_for, bbox_to_anchor=(1, 0, 0.5, 1), loc="center left")
+        plt.tight_layout()
+
+    plt.savefig('{}/roll{}.png'.format(images_dir, meta['rollcall-num']),
+                dpi=70*figsize, bbox_inches="tight", pad_inches=.02)
+    plt.close()
+
+
+def draw_senate_figure(images_dir, meta, vote_set):
+    """ Draw the chart of a Senate roll call and save it as images_dir/vote<number>.png. """
+    figsize = 1.5
+    radius = 0.9
+    size = 0.2
+    title = 'Roll call {}  ({})'.format(meta['vote_number'], meta['vote_date'])
+    if 'document' in meta.keys():
+        title += '\n{} -- {}'.format(meta['document']['document_name'],
+                                     wrap_text(meta['document']['document_title'], 100))
+    title += '\n{} ({} required)'.format(meta['vote_question_text'], meta['majority_requirement'])
+    title += '\n{}'.format(meta['vote_result'])
+    fig = plt.figure(figsize=(7, 6))
+    ax = plt.subplot2grid((2, 5), (0, 0), colspan=4, rowspan=2)
+    ax2 = plt.subplot2grid((2, 5), (1, 4), colspan=1)
+    ax.set_title(title)
+    labels = ['Yes', 'No', 'Present', 'Not Voting']
+    totals = meta['count']
+    if totals['yeas'] != '':
+        yes = int(totals['yeas'])
+    else:
+        yes = 0
+    if totals['nays'] != '':
+        no = int(totals['nays'])
+    else:
+        no = 0
+    if totals['present'] != '':
+        present = int(totals['present'])
+    else:
+        present = 0
+    if totals['absent'] != '':
+        not_voting = int(totals['absent'])
+    else:
+        not_voting = 0
+    total_votes = yes + no + present + not_voting
+    sizes = [yes, no, present, not_voting]
+    colors = ['#33FF33', '#CCCCCC', 'gray', 'white']
+    pie = ax.pie(sizes, autopct='%d%%', pctdistance=0.9, colors=colors, counterclock=False, radius=radius,
+                 labels=labels, shadow=False, startangle=-90, wedgeprops=dict(width=size, edgecolor='w'),
+                 labeldistance=1.05)
+    for i, a in enumerate(pie[2]):
+        if float(a.get_text().strip('%')) < 2:
+            a.set_text('')
+            ax.texts[i*2].set_text('')
+    ax.legend(pie[0], labels, bbox_to_anchor=(1, 0, 0.5, 1.75), loc="center left")
+
+    # Get the number of party votes
+    party_votes = senate_party_votes(vote_set)
+    party_labels = ['Democratic', 'Republican', 'Independent']
+    inner_colors = ['blue', 'red', 'purple']
+    results = [party_votes['D'][0],
+               party_votes['R'][0],
+               party_votes['I'][0],
+               party_votes['D'][1],
+               party_votes['R'][1],
+               party_votes['I'][1],
+               party_votes['D'][2],
+               party_votes['R'][2],
+               party_votes['I'][2],
+               party_votes['D'][3],
+               party_votes['R'][3],
+               party_votes['I'][3]]
+
+    pie = ax.pie(results, autopct='%d%%', pctdistance=0.85, colors=inner_colors, counterclock=False,
+                 shadow=False, startangle=-90, radius=radius-size,
+                 wedgeprops=dict(width=radius-size, edgecolor='w'))
+    for i, a in enumerate(pie[2]):
+        if results[i] >= 5:
+            a.set_text('{}'.format(results[i]))
+        else:
+            a.set_text('')
+    ax.set(aspect="equal")
+    plt.legend(pie[0], party_labels, bbox_to_anchor=(-0.25, 0, 0, 2.95), loc="center left")
+
+    bipartisan_percent = senate_bipartisan_percent(party_votes)
+
+    # Create barchart
+    ax2.bar([0], bipartisan_percent, width=1, bottom=None, color='black')
+    plt.xticks([0])
+    plt.yticks(np.arange(0, 101, 10))
+    ax2.set_title('Bipartisan Percent\n{:.1f}%'.format(bipartisan_percent))
+
+    plt.savefig('{}/vote{}.png'.format(images_dir, meta['vote_number'].zfill(5)),
+                dpi=70*figsize, bbox_inches="tight", pad_inches=.02)
+    plt.close()
+
+
 class ProcessCongressVotes:
-    def __init__(self, year=2019, updates_only=True):
+    def __init__(self, year=2019, updates_only=True, chart_workers=0):
         self.year = year
         # Flag to control either only processing missing files (True), or reprocessing all files (False)
         self.UPDATES_ONLY = updates_only
+        # Number of processes drawing charts while the HTML is built (None for one per CPU). With 0, the
+        # default, the charts are drawn in this process, one at a time
+        self.chart_workers = chart_workers if chart_workers is not None else os.cpu_count()
+        # Chart worker pool while process_votes is running, the charts submitted to it, and the number of
+        # charts queued in all
+        self.chart_pool = None
+        self.chart_futures = []
+        self.chart_count = 0
         self.Congress_start_year = 1787
         self.Sessions_per_Congress = 2
 
@@ -90,273 +364,13 @@ class ProcessCongressVotes:
                 self.senate_votes.append([json.load(f), int(vote_file.replace('vote', '').replace('.json', ''))])
         self.senate_votes = sorted(self.senate_votes, key=lambda x: x[1], reverse=True)
 
-    def draw_house_figure(self, meta, vote_set):
-        figsize = 1.5
-        radius = 0.9
-        size = 0.2
-        title = 'Roll call {}  ({})'.format(meta['rollcall-num'], meta['action-date'])
-        if 'legis-num' in meta.keys():
-            title += '\n{}'.format(meta['legis-num'])
-        if 'vote-desc' in meta.keys() and meta['vote-desc'] != '':
-            title += '\n{}'.format(wrap_text(['vote-desc'], 100))
-        elif 'amendment-num' in meta.keys() and meta['amendment-num'] != '':
-            title += '\nAmendment {}'.format(wrap_text(['amendment-num'], 100))
-            title += '\nAuthor: {}'.format(wrap_text(['amendment-author'], 100))
-        title += '\n{} ({})'.format(meta['vote-question'], meta['vote-type'])
-        title += '\n{}'.format(meta['vote-result'])
-
-        if 'totals-by-vote' in meta['vote-totals'][3].keys():
-            fig = plt.figure(figsize=(7, 6))
-            ax = plt.subplot2grid((2, 5), (0, 0), colspan=4, rowspan=2)
-            ax2 = plt.subplot2grid((2, 5), (1, 4), colspan=1)
-            ax.set_title(title)
-            labels = ['Yes', 'No', 'Present', 'Not Voting']
-            totals = meta['vote-totals'][3]['totals-by-vote']
-            yes = int(totals['yea-total'])
-            no = int(totals['nay-total'])
-            present = int(totals['present-total'])
-            not_voting = int(totals['not-voting-total'])
-            total_votes = yes + no + present + not_voting
-            sizes = [yes, no, present, not_voting]
-            colors = ['#33FF33', '#CCCCCC', 'gray', 'white']
-            pie = ax.pie(sizes, autopct='%d%%', pctdistance=0.9, colors=colors, counterclock=False, radius=radius,
-                         labels=labels, shadow=False, startangle=-90, wedgeprops=dict(width=size, edgecolor='w'),
-                         labeldistance=1.05)
-            for i, a in enumerate(pie[2]):
-                if float(a.get_text().strip('%')) < 2:
-                    a.set_text('')
-                    ax.texts[i*2].set_text('')
-            ax.legend(pie[0], labels, bbox_to_anchor=(1, 0, 0.5, 1.75), loc="center left")
-
-            # Create by party results nested pie chart
-            dem_totals = [i['totals-by-party'] for i in meta['vote-totals'][0:3]
-                          if i['totals-by-party']['party'] == 'Democratic']
-            repub_totals = [i['totals-by-party'] for i in meta['vote-totals'][0:3]
-                            if i['totals-by-party']['party'] == 'Republican']
-            ind_totals = [i['totals-by-party'] for i in meta['vote-totals'][0:3]
-                          if i['totals-by-party']['party'] == 'Independent']
-            dem_votes = []
-            rep_votes = []
-            ind_votes = []
-            results = []
-            dem_votes.append(int(dem_totals[0]['yea-total']))
-            rep_votes.append(int(repub_totals[0]['yea-total']))
-            ind_votes.append(int(ind_totals[0]['yea-total']))
-            results.append(int(dem_totals[0]['yea-total']))
-            results.append(int(repub_totals[0]['yea-total']))
-            results.append(int(ind_totals[0]['yea-total']))
-
-            dem_votes.append(int(dem_totals[0]['nay-total']))
-            rep_votes.append(int(repub_totals[0]['nay-total']))
-            ind_votes.append(int(ind_totals[0]['nay-total']))
-            results.append(int(dem_totals[0]['nay-total']))
-            results.append(int(repub_totals[0]['nay-total']))
-            results.append(int(ind_totals[0]['nay-total']))
-
-            dem_votes.append(int(dem_totals[0]['present-total']))
-            rep_votes.append(int(repub_totals[0]['present-total']))
-            ind_votes.append(int(ind_totals[0]['present-total']))
-            results.append(int(dem_totals[0]['present-total']))
-            results.append(int(repub_totals[0]['present-total']))
-            results.append(int(ind_totals[0]['present-total']))
-
-            dem_votes.append(int(dem_totals[0]['not-voting-total']))
-            rep_votes.append(int(repub_totals[0]['not-voting-total']))
-            ind_votes.append(int(ind_totals[0]['not-voting-total']))
-            results.append(int(dem_totals[0]['not-voting-total']))
-            results.append(int(repub_totals[0]['not-voting-total']))
-            results.append(int(ind_totals[0]['not-voting-total']))
-
-            dem_max = max(dem_votes)
-            dem_max_index = dem_votes.index(max(dem_votes))
-            rep_max = max(rep_votes)
-            rep_max_index = rep_votes.index(max(rep_votes))
-            ind_max = max(ind_votes)
-            ind_max_index = ind_votes.index(max(ind_votes))
-
-            # Calculate the level of bipartisan agreement as a percentage of the total votes
-            if sum(dem_votes) == 0:
-                bipartisan = 0
-            else:
-                bipartisan = dem_max / sum(dem_votes)
-            # Same index for max votes in two parties indicates agreement
-            if sum(rep_votes) != 0 and dem_max_index == rep_max_index:
-                bipartisan += rep_max / sum(rep_votes)
-            elif sum(rep_votes) != 0:
-                bipartisan = abs(bipartisan - (rep_max / sum(rep_votes)))
-            if sum(ind_votes) > 0:
-                if dem_max_index == ind_max_index:
-                    bipartisan += ind_max / sum(ind_votes)
-                else:
-                    bipartisan = abs(bipartisan - (ind_max / sum(ind_votes)))
-            bipartisan_percent = 50 * bipartisan
-
-            party_labels = ['Democratic', 'Republican', 'Independent']
-            inner_colors = ['blue', 'red', 'purple']
-            pie = ax.pie(results, autopct='%d%%', pctdistance=0.85, colors=inner_colors, counterclock=False,
-                         shadow=False, startangle=-90, radius=radius-size,
-                         wedgeprops=dict(width=radius-size, edgecolor='w'))
-            for i, a in enumerate(pie[2]):
-                if results[i] >= 5:
-                    a.set_text('{}'.format(results[i]))
-                else:
-                    a.set_text('')
-            ax.set(aspect="equal")
-            plt.legend(pie[0], party_labels, bbox_to_anchor=(-0.25, 0, 0, 2.95), loc="center left")
-
-            # Create barchart
-            ax2.bar([0], bipartisan_percent, width=1, bottom=None, color='black')
-            plt.xticks([0])
-            plt.yticks(np.arange(0, 101, 10))
-            ax2.set_title('Bipartisan Percent\n{:.1f}%'.format(bipartisan_percent))
-        elif 'totals-by-candidate' in meta['vote-totals'][3].keys():
-            # The vote was special, not producing normal vote total counts
-            fig = plt.figure(figsize=(8, 6))
-            plt.title(title)
-            vote_list = meta['vote-totals']
-            vote_counts = []
-            vote_for = []
-            for item in vote_list:
-                vote_for.append(item['totals-by-candidate']['candidate'])
-                vote_counts.append(int(item['totals-by-candidate']['candidate-total']))
-            pie = plt.pie(vote_counts, autopct='%d%%', counterclock=False, shadow=False, startangle=-90,
-                          radius=radius, wedgeprops=dict(width=size, edgecolor='w'))
-            for i, a in enumerate(pie[2]):
-                if float(a.get_text().strip('%')) < 2:
-                    a.set_text('')
-            plt.legend(pie[0], vote_for, bbox_to_anchor=(1, 0, 0.5, 1), loc="center left")
-            plt.tight_layout()
-
-        plt.savefig('{}/roll{}.png'.format(self.images_dir, meta['rollcall-num']),
-                    dpi=70*figsize, bbox_inches="tight", pad_inches=.02)
-        plt.close()
-
-    def draw_senate_figure(self, meta, vote_set):
-        figsize = 1.5
-        radius = 0.9
-        size = 0.2
-        title = 'Roll call {}  ({})'.format(meta['vote_number'], meta['vote_date'])
-        if 'document' in meta.keys():
-            title += '\n{} -- {}'.format(meta['document']['document_name'],
-                                         wrap_text(meta['document']['document_title'], 100))
-        title += '\n{} ({} required)'.format(meta['vote_question_text'], meta['majority_requirement'])
-        title += '\n{}'.format(meta['vote_result'])
-        fig = plt.figure(figsize=(7, 6))
-        ax = plt.subplot2grid((2, 5), (0, 0), colspan=4, rowspan=2)
-        ax2 = plt.subplot2grid((2, 5), (1, 4), colspan=1)
-        ax.set_title(title)
-        labels = ['Yes', 'No', 'Present', 'Not Voting']
-        totals = meta['count']
-        if totals['yeas'] != '':
-            yes = int(totals['yeas'])
-        else:
-            yes = 0
-        if totals['nays'] != '':
-            no = int(totals['nays'])
-        else:
-            no = 0
-        if totals['present'] != '':
-            present = int(totals['present'])
-        else:
-            present = 0
-        if totals['absent'] != '':
-            not_voting = int(totals['absent'])
-        else:
-            not_voting = 0
-        total_votes = yes + no + present + not_voting
-        sizes = [yes, no, present, not_voting]
-        colors = ['#33FF33', '#CCCCCC', 'gray', 'white']
-        pie = ax.pie(sizes, autopct='%d%%', pctdistance=0.9, colors=colors, counterclock=False, radius=radius,
-                     labels=labels, shadow=False, startangle=-90, wedgeprops=dict(width=size, edgecolor='w'),
-                     labeldistance=1.05)
-        for i, a in enumerate(pie[2]):
-            if float(a.get_text().strip('%')) < 2:
-                a.set_text('')
-                ax.texts[i*2].set_text('')
-        ax.legend(pie[0], labels, bbox_to_anchor=(1, 0, 0.5, 1.75), loc="center left")
-
-        # Get the number of party votes
-        party_votes = {'D': [], 'R': [], 'I': []}
-        for party in ['D', 'R', 'I']:
-            party_votes[party].append(len([i for i in vote_set['members']
-                                          if (i['member']['party'] == party)
-                                          and (i['member']['vote_cast'] in ['Yes', 'Yea', 'Aye', 'Y'])]))
-            party_votes[party].append(len([i for i in vote_set['members']
-                                          if (i['member']['party'] == party)
-                                          and (i['member']['vote_cast'] in ['No', 'Nay', 'N'])]))
-            party_votes[party].append(len([i for i in vote_set['members']
-                                          if (i['member']['party'] == party)
-                                          and (i['member']['vote_cast'] in ['Present', 'present'])]))
-            party_votes[party].append(len([i for i in vote_set['members']
-                                          if (i['member']['party'] == party)
-                                          and (i['member']['vote_cast'] in ['Not Voting'])]))
-        party_labels = ['Democratic', 'Republican', 'Independent']
-        inner_colors = ['blue', 'red', 'purple']
-        results = [party_votes['D'][0],
-                   party_votes['R'][0],
-                   party_votes['I'][0],
-                   party_votes['D'][1],
-                   party_votes['R'][1],
-                   party_votes['I'][1],
-                   party_votes['D'][2],
-                   party_votes['R'][2],
-                   party_votes['I'][2],
-                   party_votes['D'][3],
-                   party_votes['R'][3],
-                   party_votes['I'][3]]
-
-        pie = ax.pie(results, autopct='%d%%', pctdistance=0.85, colors=inner_colors, counterclock=False,
-                     shadow=False, startangle=-90, radius=radius-size,
-                     wedgeprops=dict(width=radius-size, edgecolor='w'))
-        for i, a in enumerate(pie[2]):
-            if results[i] >= 5:
-                a.set_text('{}'.format(results[i]))
-            else:
-                a.set_text('')
-        ax.set(aspect="equal")
-        plt.legend(pie[0], party_labels, bbox_to_anchor=(-0.25, 0, 0, 2.95), loc="center left")
-
-        dem_max = max(party_votes['D'])
-        dem_max_index = party_votes['D'].index(max(party_votes['D']))
-        rep_max = max(party_votes['R'])
-        rep_max_index = party_votes['R'].index(max(party_votes['R']))
-        ind_max = max(party_votes['I'])
-        ind_max_index = party_votes['I'].index(max(party_votes['I']))
-
-        dem_sum = sum(party_votes['D'])
-        rep_sum = sum(party_votes['R'])
-        ind_sum = sum(party_votes['I'])
-
-        if dem_max_index == ind_max_index:
-            dem_max += ind_max
-            dem_sum += ind_sum
-        elif rep_max_index == ind_max_index:
-            rep_max += ind_max
-            rep_sum += ind_sum
-
-        # Calculate the level of bipartisan agreement as a percentage of the total votes
-        bipartisan = dem_max / dem_sum
-        # Same index for max votes in two parties indicates agreement
-        if dem_max_index == rep_max_index:
-            bipartisan += rep_max / rep_sum
+    def queue_chart(self, draw_figure, meta, vote_set):
+        """ Have a chart drawn by the chart workers, or right away if there are none. """
+        self.chart_count += 1
+        if self.chart_pool is None:
+            draw_figure(self.images_dir, meta, vote_set)
         else:
-            bipartisan = abs(bipartisan - (rep_max / rep_sum))
-        # if sum(party_votes['I']) > 0:
-        #     if dem_max_index == ind_max_index:
-        #         bipartisan += ind_max / sum(party_votes['I'])
-        #     else:
-        #         bipartisan = abs(bipartisan - (ind_max / sum(party_votes['I'])))
-        bipartisan_percent = 50 * bipartisan
-
-        # Create barchart
-        ax2.bar([0], bipartisan_percent, width=1, bottom=None, color='black')
-        plt.xticks([0])
-        plt.yticks(np.arange(0, 101, 10))
-        ax2.set_title('Bipartisan Percent\n{:.1f}%'.format(bipartisan_percent))
-
-        plt.savefig('{}/vote{}.png'.format(self.images_dir, meta['vote_number'].zfill(5)),
-                    dpi=70*figsize, bbox_inches="tight", pad_inches=.02)
-        plt.close()
+            self.chart_futures.append(self.chart_pool.submit(draw_figure, self.images_dir, meta, vote_set))
 
     def insert_house_table_entry(self, meta, proc_item, procedural):
         if procedural is False:
@@ -402,7 +416,7 @@ class ProcessCongressVotes:
             .format(meta['vote-result'].replace(' ', '_'), meta['vote-result'], meta['vote-type'])
         html_text += '\n'
         if self.UPDATES_ONLY is not True or 'roll{}.png'.format(proc_item[1]) not in self.image_files:
-            self.draw_house_figure(meta, proc_item[0]['rollcall-vote']['vote-data'])
+            self.queue_chart(draw_house_figure, meta, proc_item[0]['rollcall-vote']['vote-data'])
         html_text += '<br><a href="../{}/{}"><img src="../{}/{}"></a>\n'.format(self.images_dir,
                                                                                 'roll{}.png'.format(proc_item[1]),
                                                                                 self.images_dir,
@@ -479,7 +493,7 @@ class ProcessCongressVotes:
                                                                          meta['majority_requirement'])
         html_text += '\n'
         if self.UPDATES_ONLY is not True or 'vote{}.png'.format(str(proc_item[1]).zfill(5)) not in self.image_files:
-            self.draw_senate_figure(meta, proc_item[0]['roll_call_vote'])
+            self.queue_chart(draw_senate_figure, meta, proc_item[0]['roll_call_vote'])
         html_text += '<br><a href="../{}/{}"><img src="../{}/{}"></a>\n'\
             .format(self.images_dir, 'vote{}.png'.format(str(proc_item[1]).zfill(5)),
                     self.images_dir, 'vote{}.png'.format(str(proc_item[1]).zfill(5)))
@@ -495,6 +509,33 @@ class ProcessCongressVotes:
         return html_text
 
     def process_votes(self):
+        """ Write the votes page. The charts are drawn by chart_workers processes while the page is put
+            together from the vote data, or in this process as it goes if chart_workers is below 1. """
+        started = perf_counter()
+        self.chart_futures = []
+        self.chart_count = 0
+        if self.chart_workers < 1:
+            self.write_votes_page(self.votes_html())
+        else:
+            with ProcessPoolExecutor(max_workers=self.chart_workers) as pool:
+                self.chart_pool = pool
+                try:
+                    html = self.votes_html()
+                finally:
+                    self.chart_pool = None
+                self.write_votes_page(html)
+                for future in self.chart_futures:
+                    # Raise any error from drawing a chart
+                    future.result()
+        elapsed = perf_counter() - started
+        print('Drew {} charts in {:.1f} s ({} workers)'.format(self.chart_count, elapsed, max(self.chart_workers, 0)))
+
+    def write_votes_page(self, html):
+        with open('html/congress_votes_{}.html'.format(self.year), 'wt') as f:
+            f.write(html)
+
+    def votes_html(self):
+        """ Return the votes page HTML, queueing the charts that need to be drawn. """
         # Create an HTML page for the graphs
         html = '<html>\n<head>\n<title>Congress Votes {}</title>'.format(self.year)
         html += '\n<link rel="stylesheet" href="../style.css">\n</head>\n'
@@ -568,8 +609,7 @@ class ProcessCongressVotes:
             html += '</tr>\n'
         html += '</table>\n'
         html += '</center></body>\n</html>'
-        with open('html/congress_votes_{}.html'.format(self.year), 'wt') as f:
-            f.write(html)
+        return html
 
 
 if __name__ == '__main__':
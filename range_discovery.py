@@ -0,0 +1,49 @@
+""" Find the last available item of a numbered series (roll call votes, bills, nominations) without
+    walking the whole series one number at a time. """
+
+
+def find_last_number(exists, known=0, limit=100000, gap_tolerance=2):
+    """ Return the highest number n below limit for which exists(n) is True, or known if nothing
+        past known exists.
+
+        exists is called with a candidate number and should return True if that item is available.
+        Starting just past known (a number already known to exist, 0 if none), the probe distance
+        doubles until a missing number is found, then a binary search narrows down the last existing
+        number between the two. A probe only counts as missing if the next gap_tolerance numbers are
+        missing too, so isolated gaps in the numbering do not cut the range short. Each number is
+        checked at most once. """
+    checked = {}
+
+    def check(n):
+        if n not in checked:
+            checked[n] = n < limit and exists(n) is True
+        return checked[n]
+
+    def present(n):
+        # True if n, or one of the gap_tolerance numbers after it, exists
+        return any(check(k) for k in range(n, min(n + gap_tolerance + 1, limit)))
+
+    # Exponential probing: low is always present (or the starting point), high is always missing
+    low = known
+    step = 1
+    while True:
+        probe = low + step
+        if probe >= limit:
+            high = limit
+            break
+        if present(probe):
+            low = probe
+            step *= 2
+        else:
+            high = probe
+            break
+
+    # Binary search for the boundary. When it ends, low is present but low + 1 and the gap_tolerance
+    # numbers after it are all missing, so low itself exists
+    while high - low > 1:
+        middle = (low + high) // 2
+        if present(middle):
+            low = middle
+        else:
+            high = middle
+    return low
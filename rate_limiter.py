@@ -0,0 +1,88 @@
+""" Adaptive per-host rate limiting for the shared fetch layer (http_fetch.py).
+
+    Each host gets a token bucket. Every request to the host takes a token, and tokens refill at the
+    host's current rate. The rate adapts to how the host is coping: a 429/503 response, a connection
+    failure or a slow response halves it, while a run of healthy responses raises it again step by
+    step, up to the configured maximum. Because the buckets live in the shared fetcher, concurrent
+    crawls of the same host all draw on one budget. """
+
+import threading
+from time import monotonic, sleep
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    def __init__(self, rate=2.0, burst=2, min_rate=0.1, max_rate=10.0, slow_seconds=10.0):
+        # Requests per second currently allowed, and the range it can adapt within
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        # Number of requests that can go out back to back after an idle period
+        self.burst = burst
+        # A response taking longer than this counts as a sign the host is struggling
+        self.slow_seconds = slow_seconds
+        self.tokens = burst
+        self.updated = monotonic()
+        # No requests before this time (set from a Retry-After header)
+        self.paused_until = 0
+        self.healthy = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """ Wait until a request to the host is allowed. """
+        while True:
+            with self.lock:
+                now = monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            sleep(wait)
+
+    def report(self, status, elapsed, retry_after=None):
+        """ Adjust the rate from the outcome of a request. status is None for a connection failure. """
+        with self.lock:
+            if status in (429, 503) or status is None or elapsed > self.slow_seconds:
+                # Multiplicative decrease, the host wants fewer requests
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.tokens = min(self.tokens, 0)
+                self.healthy = 0
+                if retry_after is not None:
+                    self.paused_until = max(self.paused_until, monotonic() + retry_after)
+            else:
+                # Additive increase once about a second's worth of requests came back healthy
+                self.healthy += 1
+                if self.healthy >= self.rate:
+                    self.rate = min(self.max_rate, self.rate + max(0.1, self.rate * 0.1))
+                    self.healthy = 0
+
+
+class HostRateLimiter:
+    # Starting budgets per host. senate.gov has been unreliable under load, so it starts slow
+    DEFAULT_LIMITS = {'www.senate.gov': {'rate': 0.5, 'burst': 1, 'min_rate': 0.05, 'max_rate': 1.0},
+                      'clerk.house.gov': {'rate': 5.0, 'burst': 5, 'max_rate': 20.0},
+                      'www.congress.gov': {'rate': 2.0, 'burst': 4, 'max_rate': 10.0}}
+
+    def __init__(self, limits=None, default=None):
+        # limits maps host name to TokenBucket settings, default is used for any other host
+        self.limits = dict(self.DEFAULT_LIMITS)
+        if limits is not None:
+            self.limits.update(limits)
+        self.default = default if default is not None else {'rate': 2.0, 'burst': 2}
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlsplit(url).hostname or ''
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(**self.limits.get(host, self.default))
+            return self.buckets[host]
+
+    def acquire(self, url):
+        self.bucket(url).acquire()
+
+    def report(self, url, status, elapsed, retry_after=None):
+        self.bucket(url).report(status, elapsed, retry_after)
@@ -0,0 +1,145 @@
+""" Persistent HTTP response cache for the shared fetch layer (http_fetch.py).
+
+    Responses are keyed by URL. Each body is kept in its own file under the cache directory and a small
+    SQLite index holds the status code, ETag, Last-Modified, encoding, size and last access time. The
+    fetcher uses the validators to revalidate with If-None-Match/If-Modified-Since, so an unchanged
+    page costs a 304 instead of a full download. The total size of the stored bodies is bounded, and
+    the least recently used entries are evicted first.
+
+    The cache doubles as a record/replay store: run the collectors once with the cache enabled to
+    record every response, then run them with replay=True to serve everything from the cache with no
+    network access at all. """
+
+import os
+import hashlib
+import sqlite3
+import threading
+from time import time
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class ResponseCache:
+    def __init__(self, cache_dir='data/http_cache', max_bytes=1024 ** 3):
+        self.cache_dir = cache_dir
+        # Upper bound on the total size of the stored bodies, in bytes
+        self.max_bytes = max_bytes
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect('{}/index.sqlite'.format(self.cache_dir), check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS responses ('
+                        'url TEXT PRIMARY KEY, status INTEGER, etag TEXT, last_modified TEXT, '
+                        'content_type TEXT, encoding TEXT, size INTEGER, fetched REAL, accessed REAL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+        self.db.commit()
+        self.total_bytes = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def _body_path(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        # Spread the body files over 256 subdirectories to keep directory listings short
+        return '{}/{}/{}'.format(self.cache_dir, key[:2], key[2:])
+
+    def get(self, url):
+        """ Return the cached entry for url as a dictionary (status, etag, last_modified, content_type,
+            encoding, body), or None if the url has not been recorded. """
+        with self.lock:
+            row = self.db.execute('SELECT status, etag, last_modified, content_type, encoding FROM responses '
+                                  'WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self._body_path(url), 'rb') as f:
+                    body = f.read()
+            except FileNotFoundError:
+                # The body file went missing, forget the entry so it gets fetched again
+                self._delete(url)
+                self.db.commit()
+                return None
+            self.db.execute('UPDATE responses SET accessed = ? WHERE url = ?', (time(), url))
+            self.db.commit()
+        return {'status': row[0], 'etag': row[1], 'last_modified': row[2], 'content_type': row[3],
+                'encoding': row[4], 'body': body}
+
+    def put(self, url, response):
+        """ Record a response. The fetcher records successful responses and 404s, so a replayed crawl
+            sees the same end-of-range 404 the recorded crawl did. """
+        body = response.content
+        path = self._body_path(url)
+        with self.lock:
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as f:
+                f.write(body)
+            self._forget_size(url)
+            now = time()
+            self.db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                            (url, response.status_code, response.headers.get('ETag'),
+                             response.headers.get('Last-Modified'), response.headers.get('Content-Type'),
+                             response.encoding, len(body), now, now))
+            self.total_bytes += len(body)
+            self._evict()
+            self.db.commit()
+
+    def touch(self, url):
+        """ Mark an entry as just used (e.g. after a 304 revalidation). """
+        with self.lock:
+            self.db.execute('UPDATE responses SET accessed = ?, fetched = ? WHERE url = ?', (time(), time(), url))
+            self.db.commit()
+
+    def _forget_size(self, url):
+        row = self.db.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+        if row is not None:
+            self.total_bytes -= row[0]
+
+    def _delete(self, url):
+        self._forget_size(url)
+        self.db.execute('DELETE FROM responses WHERE url = ?', (url,))
+        try:
+            os.remove(self._body_path(url))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        # Drop least recently used entries until the stored bodies fit in max_bytes again
+        while self.total_bytes > self.max_bytes:
+            oldest = self.db.execute('SELECT url FROM responses ORDER BY accessed LIMIT 64').fetchall()
+            if len(oldest) == 0:
+                break
+            for row in oldest:
+                self._delete(row[0])
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def conditional_headers(self, entry):
+        """ Request headers to revalidate a cached entry, empty if the server gave no validators. """
+        headers = {}
+        if entry['etag'] is not None:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified'] is not None:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def to_response(self, url, entry):
+        """ Build a requests Response from a cached entry, so callers cannot tell it from a live one. """
+        r = requests.Response()
+        r.url = url
+        r.status_code = entry['status']
+        r._content = entry['body']
+        r.headers = CaseInsensitiveDict()
+        if entry['content_type'] is not None:
+            r.headers['Content-Type'] = entry['content_type']
+        if entry['etag'] is not None:
+            r.headers['ETag'] = entry['etag']
+        if entry['last_modified'] is not None:
+            r.headers['Last-Modified'] = entry['last_modified']
+        r.encoding = entry['encoding']
+        return r
+
+    def not_recorded(self, url):
+        """ The response given in replay mode for a url that was never recorded. """
+        r = requests.Response()
+        r.url = url
+        r.status_code = 404
+        r._content = b''
+        return r
@@ -0,0 +1,91 @@
+""" Tests of the columnar export (analytics_export.py). Run from the top directory with
+    python -m unittest discover tests """
+
+import os
+import json
+import tempfile
+import unittest
+from bill_store import BillStore
+from bill_stats import BillStats
+from analytics_export import ColumnExport, load_columns, load_vocabulary, bill_tallies, check_parity
+
+
+def tree_bytes(top):
+    """ Return a dictionary of path to contents of every file under top. """
+    contents = {}
+    for directory, _, file_names in os.walk(top):
+        for file_name in file_names:
+            with open(os.path.join(directory, file_name), 'rb') as f:
+                contents[os.path.join(directory, file_name)] = f.read()
+    return contents
+
+
+class ExportTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.TemporaryDirectory()
+        os.chdir(self.dir.name)
+        os.makedirs('data/congress_bills_2019')
+        store = BillStore('data/congress_bills_2019/House_bills_2019')
+        store.append({'number': 1, 'title': 'H.R.1', 'status': 'This bill has the status Introduced',
+                      'party': 'Democratic', 'introduced': ' (Introduced 01/03/2019)', 'cosponsors_list': []})
+        store.append({'number': 2, 'title': 'H.R.2', 'status': 'This bill has the status Became Law',
+                      'party': 'Republican', 'introduced': ' (Introduced 01/04/2019)',
+                      'cosponsors_list': [['Rep.', 'Smith, Adam', 'D', 'WA-9']]})
+        store.close()
+        stats = BillStats(2019)
+        stats.rebuild()
+        # A bill being written by a crawl at the time of the export
+        with open('data/congress_bills_2019/House_bills_2019.jsonl', 'ab') as f:
+            f.write(b'{"number": 3, "ti')
+        self.collected = tree_bytes('data/congress_bills_2019')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+
+    def test_export_leaves_collected_bills_alone(self):
+        bills, votes = ColumnExport(2019).export()
+        self.assertEqual((bills, votes), (2, 0))
+        columns = load_columns([2019], 'bills')
+        self.assertEqual(columns['number'].tolist(), [1, 2])
+        self.assertEqual(columns['cosponsors'].tolist(), [[0, 0, 0], [1, 0, 0]])
+        self.assertEqual(bill_tallies(columns)['law'], 1)
+        check_parity(2019, columns, load_columns([2019], 'votes'))
+        self.assertEqual(tree_bytes('data/congress_bills_2019'), self.collected)
+        with open('data/columns_2019/vocabulary.json', 'r') as f:
+            self.assertEqual(json.load(f)['bill_type'], ['House_bills'])
+
+
+class MultiYearTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.TemporaryDirectory()
+        os.chdir(self.dir.name)
+        # The years list their policy areas in a different order, and 2020 has one 2019 does not
+        for year, policy_areas in [(2019, ['Taxation', None, 'Health']), (2020, ['Health', 'Energy', 'Taxation'])]:
+            os.makedirs('data/congress_bills_{}'.format(year))
+            store = BillStore('data/congress_bills_{}/Senate_bills_{}'.format(year, year))
+            for number, policy_area in enumerate(policy_areas, 1):
+                bill = {'number': number, 'title': 'S.{}'.format(number)}
+                if policy_area is not None:
+                    bill['policy_area'] = policy_area
+                store.append(bill)
+            store.close()
+            ColumnExport(year).export()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+
+    def test_codes_mean_the_same_in_every_year(self):
+        columns = load_columns([2019, 2020], 'bills')
+        policy_areas = load_vocabulary([2019, 2020])['policy_area'].values
+        self.assertEqual([policy_areas[code] if code >= 0 else None for code in columns['policy_area']],
+                         ['Taxation', None, 'Health', 'Health', 'Energy', 'Taxation'])
+        self.assertEqual(columns['year'].tolist(), [2019] * 3 + [2020] * 3)
+        self.assertEqual(columns['bill_type'].tolist(), [0] * 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+""" Tests of the bill counts report (bill_counts.py) over several years. Run from the top directory with
+    python -m unittest discover tests """
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+import subprocess
+from bill_store import BillStore
+from test_analytics_export import tree_bytes
+
+BILL_COUNTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bill_counts.py')
+
+
+class MultiYearCountsTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        os.makedirs('{}/data/congress_bills_2019'.format(self.dir.name))
+        os.makedirs('{}/data/congress_bills_2020'.format(self.dir.name))
+        # 2019 collected into a bill store, with a record still being written at the end
+        store = BillStore('{}/data/congress_bills_2019/House_bills_2019'.format(self.dir.name))
+        store.append({'number': 1, 'title': 'H.R.1', 'status': 'This bill has the status Became Law'})
+        store.append({'number': 2, 'title': 'H.R.2', 'status': 'This bill has the status Introduced'})
+        store.close()
+        with open('{}/data/congress_bills_2019/House_bills_2019.jsonl'.format(self.dir.name), 'ab') as f:
+            f.write(b'{"number": 3, "ti')
+        # 2020 collected before the stores existed, in a <Type>_<year>.json file
+        with open('{}/data/congress_bills_2020/Senate_bills_2020.json'.format(self.dir.name), 'w') as f:
+            json.dump({'bill_data': {'last_bill': 3, 'bill': [
+                {'number': number, 'title': 'S.{}'.format(number),
+                 'status': 'This bill has the status Referred to Committee'} for number in range(1, 4)]}}, f)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def collected(self):
+        return dict((path, contents) for path, contents in tree_bytes('{}/data'.format(self.dir.name)).items()
+                    if not path.endswith('bill_stats.json'))
+
+    def test_rebuild_over_several_years(self):
+        collected = self.collected()
+        for arguments in [['2019', '2020', '--rebuild'], ['--all']]:
+            output = subprocess.run([sys.executable, BILL_COUNTS] + arguments, cwd=self.dir.name, check=True,
+                                    stdout=subprocess.PIPE, universal_newlines=True).stdout
+            summary = output.split('==================== 2019-2020 ====================')[1]
+            self.assertIn('2019: 1 became law, 0 confirmed, 0 passed chamber, 0 referred to committee, 0 on '
+                          'calendar, 1 introduced', summary)
+            self.assertIn('2020: 0 became law, 0 confirmed, 0 passed chamber, 3 referred to committee, 0 on '
+                          'calendar, 0 introduced', summary)
+            self.assertIn('Total = 5', summary)
+            self.assertEqual(self.collected(), collected)
+
+
+if __name__ == '__main__':
+    unittest.main()
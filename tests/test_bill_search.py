@@ -0,0 +1,61 @@
+""" Tests of the bill text index (bill_search.py). Run from the top directory with
+    python -m unittest discover tests """
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from bill_search import BillSearch, congress_of
+
+
+def bill(number, title):
+    return {'number': number, 'url': 'https://www.congress.gov/bill/116th-congress/house-bill/{}'.format(number),
+            'title': title, 'policy_area': 'Health'}
+
+
+class BillSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'bill_search.sqlite')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_congress_of(self):
+        self.assertEqual(congress_of(2019), 116)
+        self.assertEqual(congress_of(2020), 116)
+        self.assertEqual(congress_of(2021), 117)
+
+    def test_bill_indexed_once_per_congress(self):
+        search = BillSearch(self.path)
+        self.assertTrue(search.add_bill('House_bills_2019', 2019, bill(1, 'Veterans health care act')))
+        # Collected again in the second year of the Congress, unchanged
+        self.assertFalse(search.add_bill('House_bills_2020', 2020, bill(1, 'Veterans health care act')))
+        self.assertEqual(search.search('"health care"'), [('House_bills_2020', 1, 'Veterans health care act')])
+        self.assertEqual(len(search.search('veterans', years=[2019])), 1)
+        self.assertEqual(search.search('veterans', years=[2021]), [])
+        # The second year's record replaces the first, an older record does not replace it back
+        self.assertTrue(search.add_bill('House_bills_2020', 2020, bill(1, 'Veterans dental care act')))
+        self.assertFalse(search.add_bill('House_bills_2019', 2019, bill(1, 'Veterans health care act')))
+        self.assertEqual(search.search('health'), [])
+        self.assertEqual(search.search('veterans dental'), [('House_bills_2020', 1, 'Veterans dental care act')])
+        # The same number is another bill in another bill type or Congress
+        search.add_bill('Senate_bills_2020', 2020, bill(1, 'Veterans dental care act'))
+        search.add_bill('House_bills_2021', 2021, bill(1, 'Veterans dental care act'))
+        self.assertEqual(len(search.search('dental')), 3)
+        self.assertEqual(len(search.search('dental', years=[2019, 2020])), 2)
+
+    def test_old_index_is_rebuilt(self):
+        db = sqlite3.connect(self.path)
+        db.execute('CREATE TABLE bills (id INTEGER PRIMARY KEY, collection TEXT, number INTEGER, year INTEGER, '
+                   'title TEXT, policy_area TEXT, content_key TEXT, UNIQUE (collection, number))')
+        db.execute("INSERT INTO bills (collection, number, year) VALUES ('House_bills_2019', 1, 2019)")
+        db.commit()
+        db.close()
+        search = BillSearch(self.path)
+        self.assertTrue(search.add_bill('House_bills_2019', 2019, bill(1, 'Veterans health care act')))
+        self.assertEqual(len(search.search('veterans')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
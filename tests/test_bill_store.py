@@ -0,0 +1,127 @@
+""" Tests of the append-only bill store (bill_store.py). Run from the top directory with
+    python -m unittest discover tests """
+
+import os
+import json
+import tempfile
+import unittest
+from bill_store import BillStore, collected_types
+from bill_stats import BillStats
+
+
+def file_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class ReadOnlyStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path_base = '{}/House_bills_2019'.format(self.dir.name)
+        store = BillStore(self.path_base, checkpoint_every=2)
+        for number in range(1, 6):
+            store.append({'number': number, 'title': 'Bill {}'.format(number)})
+        # Bill 3 collected again after a change
+        store.append({'number': 3, 'title': 'Bill 3, amended'})
+        store.close()
+        # A record cut short at the end of the data file, as a crash (or a crawl still writing) leaves it
+        with open(self.path_base + '.jsonl', 'ab') as f:
+            f.write(json.dumps({'number': 6, 'title': 'Bill 6'}).encode('utf-8')[:10])
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_read_only_store_leaves_files_alone(self):
+        data = file_bytes(self.path_base + '.jsonl')
+        index = file_bytes(self.path_base + '.index.json')
+        store = BillStore(self.path_base, read_only=True)
+        self.assertEqual([bill['title'] for bill in store.bills()],
+                         ['Bill 1', 'Bill 2', 'Bill 3, amended', 'Bill 4', 'Bill 5'])
+        self.assertEqual(store.get(3)['title'], 'Bill 3, amended')
+        self.assertNotIn(6, store)
+        store.close()
+        self.assertEqual(file_bytes(self.path_base + '.jsonl'), data)
+        self.assertEqual(file_bytes(self.path_base + '.index.json'), index)
+
+    def test_read_only_store_refuses_writes(self):
+        store = BillStore(self.path_base, read_only=True)
+        self.assertRaises(ValueError, store.append, {'number': 7})
+        self.assertRaises(ValueError, store.checkpoint)
+        self.assertRaises(ValueError, store.reset)
+
+    def test_missing_store_is_not_created(self):
+        store = BillStore('{}/Senate_bills_2019'.format(self.dir.name), read_only=True)
+        self.assertEqual(list(store.bills()), [])
+        self.assertFalse(os.path.exists('{}/Senate_bills_2019.jsonl'.format(self.dir.name)))
+
+    def test_writable_store_drops_cut_short_record(self):
+        store = BillStore(self.path_base)
+        self.assertEqual(len(store), 5)
+        store.append({'number': 6, 'title': 'Bill 6'})
+        store.close()
+        store = BillStore(self.path_base, read_only=True)
+        self.assertEqual(store.get(6)['title'], 'Bill 6')
+
+    def test_collected_types_reads_without_writing(self):
+        data = file_bytes(self.path_base + '.jsonl')
+        os.remove(self.path_base + '.index.json')
+        types = [(name, [bill['number'] for bill in bills]) for name, bills in collected_types(self.dir.name)]
+        self.assertEqual(types, [('House_bills_2019', [1, 2, 3, 4, 5])])
+        self.assertEqual(file_bytes(self.path_base + '.jsonl'), data)
+        self.assertFalse(os.path.exists(self.path_base + '.index.json'))
+
+
+class CompactionTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path_base = '{}/House_bills_2019'.format(self.dir.name)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def refreshed_store(self, refreshes, checkpoint_every=4):
+        """ A store of bills 1 to 4, each collected again refreshes times, as the refresh crawl does. """
+        store = BillStore(self.path_base, checkpoint_every=checkpoint_every)
+        for refresh in range(refreshes + 1):
+            for number in range(1, 5):
+                store.append({'number': number, 'title': 'Bill {} version {}'.format(number, refresh)})
+        return store
+
+    def test_replaced_records_are_dropped(self):
+        store = self.refreshed_store(10)
+        store.close()
+        with open(self.path_base + '.jsonl', 'rb') as f:
+            self.assertLessEqual(len(f.readlines()), 8)
+        store = BillStore(self.path_base)
+        self.assertEqual([bill['title'] for bill in store.bills()],
+                         ['Bill {} version 10'.format(number) for number in range(1, 5)])
+        self.assertEqual(store.get(4)['title'], 'Bill 4 version 10')
+        store.close()
+
+    def test_crash_during_compaction(self):
+        store = self.refreshed_store(1)
+        store.data.flush()
+        # The data file was swapped in but the process stopped before the new index was saved
+        store._save_index(0, {}, 0)
+        store.data.close()
+        store = BillStore(self.path_base)
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store.get(2)['title'], 'Bill 2 version 1')
+        store.close()
+
+    def test_stats_match_compacted_store(self):
+        stats = BillStats(2019, path='{}/bill_stats.json'.format(self.dir.name))
+        # Compacted only when the store is closed
+        store = self.refreshed_store(3, checkpoint_every=100)
+        for bill in store.bills():
+            stats.update('House_bills', None, bill)
+        size = os.path.getsize(self.path_base + '.jsonl')
+        store.close()
+        stats.finish('House_bills', store)
+        self.assertLess(os.path.getsize(self.path_base + '.jsonl'), size)
+        # check compares the size with the store's, a mismatch would have the bills counted again
+        self.assertEqual(stats.types['House_bills']['store_size'], os.path.getsize(self.path_base + '.jsonl'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+""" Tests of the content-addressed blob store (blob_store.py). Run from the top directory with
+    python -m unittest discover tests """
+
+import os
+import tempfile
+import threading
+import unittest
+from blob_store import BlobStore, BlobBill
+
+
+class BlobStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.blobs = BlobStore(self.dir.name)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_same_text_from_several_threads(self):
+        text = '<table class="item_table"></table>'
+        keys = []
+        errors = []
+        start = threading.Barrier(8)
+
+        def put():
+            start.wait()
+            try:
+                for attempt in range(50):
+                    keys.append(self.blobs.put(text + str(attempt)))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=put) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(set(keys)), 50)
+        self.assertEqual(self.blobs.get(self.blobs.put(text + '7')), text + '7')
+        # No temporary files are left behind
+        files = [name for _, _, names in os.walk(self.dir.name) for name in names]
+        self.assertEqual(len(files), 50)
+
+    def test_blob_bill(self):
+        bill = BlobBill({'number': 1, 'text_blob': self.blobs.put('Be it enacted')}, self.blobs)
+        self.assertEqual(bill['text'], 'Be it enacted')
+        self.assertTrue(bill.has_field('text'))
+        self.assertIsNone(bill.get('cosponsors_table'))
+
+
+if __name__ == '__main__':
+    unittest.main()
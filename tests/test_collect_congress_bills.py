@@ -0,0 +1,119 @@
+""" Tests of the bill collector's HTML listings (collect_congress_bills.py). Run from the top directory
+    with python -m unittest discover tests """
+
+import os
+import tempfile
+import threading
+import unittest
+import page_extractor
+from bill_store import BillStore
+from collect_congress_bills import CollectCongressBills, PriorityPool
+
+
+PAGE_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pages')
+
+
+def bill(number, title):
+    return {'number': number, 'url': 'https://www.congress.gov/bill/116th-congress/house-bill/{}'.format(number),
+            'title': title}
+
+
+class PagesTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.TemporaryDirectory()
+        os.chdir(self.dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+
+    def read(self, name):
+        with open('html/{}'.format(name), 'r') as f:
+            return f.read()
+
+    def test_unchanged_pages_carry_no_date(self):
+        collect = CollectCongressBills(2019, page_size=2)
+        store = BillStore(collect.store_path('house_bills'))
+        for number in range(1, 6):
+            store.append(bill(number, 'H.R.{}'.format(number)))
+        collect.write_html_pages('house_bills', store)
+        self.assertEqual(sorted(os.listdir('html')), ['House_bills_2019.html', 'House_bills_2019_1.html',
+                                                      'House_bills_2019_2.html', 'House_bills_2019_3.html'])
+        self.assertIn('Last updated', self.read('House_bills_2019.html'))
+        self.assertIn('H.R.5', self.read('House_bills_2019_3.html'))
+        for page in range(1, 4):
+            self.assertNotIn('Last updated', self.read('House_bills_2019_{}.html'.format(page)))
+        # Only the page of the changed bill is written again
+        with open('html/House_bills_2019_1.html', 'a') as f:
+            f.write('<!-- not rewritten -->')
+        store.append(bill(5, 'H.R.5, amended'))
+        collect.write_html_pages('house_bills', store)
+        self.assertIn('not rewritten', self.read('House_bills_2019_1.html'))
+        self.assertIn('H.R.5, amended', self.read('House_bills_2019_3.html'))
+        store.close()
+
+    def test_page_size(self):
+        self.assertIsNone(CollectCongressBills(2019, page_size=0).page_size)
+        self.assertRaises(ValueError, CollectCongressBills, 2019, page_size=-1)
+
+
+class MembersTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.TemporaryDirectory()
+        os.chdir(self.dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+
+    def test_bill_refers_to_members_by_id(self):
+        with open('{}/bill_hr1.html'.format(PAGE_FIXTURES), 'r') as f:
+            parsed = page_extractor.parse_bill_page(f.read(), 'https://www.congress.gov/bill/116th-congress/'
+                                                              'house-bill/1', 1)
+        # The sub-page fields
+        parsed['subjects'] = ['Voting rights']
+        parsed['cosponsors_list'] = [('Rep.', 'Raskin, Jamie', 'D', 'MD-8'),
+                                     ('Rep.', 'Fitzpatrick, Brian K.', 'R', 'PA-1')]
+        collect = CollectCongressBills(2019)
+        listed = collect.bill_html(parsed, True)
+        bill = dict(parsed)
+        collect.intern_members('house_bills', bill)
+        self.assertNotIn('sponsor', bill.keys())
+        self.assertNotIn('party', bill.keys())
+        self.assertEqual(collect.legislators.member(bill['sponsor_id'])['name'], 'Sarbanes, John P.')
+        self.assertEqual(collect.legislators.party_counts(bill['cosponsor_ids']), {'D': 1, 'R': 1})
+        # The listing shows the same sponsor, in the same party colour, as from the parsed page
+        self.assertEqual(collect.bill_html(bill, True), listed)
+
+
+class PriorityPoolTest(unittest.TestCase):
+    def test_highest_priority_runs_first(self):
+        started = threading.Event()
+        release = threading.Event()
+        ran = []
+
+        def block():
+            started.set()
+            release.wait()
+
+        with PriorityPool(1) as pool:
+            pool.submit(0, block)
+            started.wait()
+            # Queued while the only worker is busy, a lower ranked lane first
+            low, high = pool.lane(1), pool.lane(0)
+            futures = [low.submit(ran.append, 'low 1'), low.submit(ran.append, 'low 2'),
+                       high.submit(ran.append, 'high 1'), high.submit(ran.append, 'high 2')]
+            release.set()
+        self.assertEqual(ran, ['high 1', 'high 2', 'low 1', 'low 2'])
+        self.assertTrue(all(future.done() for future in futures))
+
+    def test_errors_reach_the_future(self):
+        with PriorityPool(2) as pool:
+            future = pool.submit(0, int, 'not a number')
+        self.assertRaises(ValueError, future.result)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+""" Tests of the roll call vote collector (collect_congress_votes.py) against a stand-in server. Run from
+    the top directory with python -m unittest discover tests """
+
+import os
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import http_fetch
+import collect_congress_votes
+from rate_limiter import HostRateLimiter
+from xml2json import Xml2json
+
+XML_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'xml')
+
+
+class VoteServer(BaseHTTPRequestHandler):
+    """ Serves the roll call fixtures under their clerk.house.gov and senate.gov names, and a generated
+        html page for any other roll call, as clerk.house.gov does past the last one. """
+    protocol_version = 'HTTP/1.1'
+    paths = {'/evs/2019/roll010.xml': 'roll010.xml', '/vote_116_1_00001.xml': 'vote_116_1_00001.xml'}
+    # Paths of every GET
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        VoteServer.requests.append(self.path)
+        if self.path in self.paths:
+            with open('{}/{}'.format(XML_FIXTURES, self.paths[self.path]), 'rb') as f:
+                body = f.read()
+        else:
+            body = b'<html><body><p>Roll call not found</p></body></html>'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class CollectTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), VoteServer)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.fetcher = http_fetch._shared_fetcher
+        http_fetch.configure(retries=0, rate_limiter=HostRateLimiter(default={'rate': 500, 'burst': 50,
+                                                                              'max_rate': 1000}))
+        self.cwd = os.getcwd()
+        self.dir = tempfile.TemporaryDirectory()
+        os.chdir(self.dir.name)
+        os.mkdir('data')
+        VoteServer.requests = []
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+        http_fetch._shared_fetcher = self.fetcher
+        self.server.shutdown()
+        self.server.server_close()
+
+    def collector(self):
+        collect = collect_congress_votes.CollectCongressVotes(2019)
+        base = 'http://127.0.0.1:{}'.format(self.server.server_port)
+        collect.rollcall_url_base = base + '/evs/2019/roll'
+        collect.senate_base_url = base + '/vote_116_1_'
+        return collect
+
+    def test_probed_votes_are_not_fetched_again(self):
+        collect = self.collector()
+        self.assertTrue(collect.house_roll_available(10))
+        self.assertFalse(collect.house_roll_available(11))
+        self.assertTrue(collect.senate_vote_available(1))
+        self.assertTrue(collect.fetch_house_roll(10))
+        self.assertTrue(collect.fetch_senate_vote(1))
+        self.assertEqual(VoteServer.requests, ['/evs/2019/roll010.xml', '/evs/2019/roll011.xml',
+                                               '/vote_116_1_00001.xml'])
+        self.assertEqual(collect.probed, {})
+
+    def test_probe_out_of_retries(self):
+        collect = self.collector()
+        self.server.shutdown()
+        self.server.server_close()
+        # Nothing listens there any more, the probe's connection is refused
+        self.assertFalse(collect.house_roll_available(10))
+        self.assertEqual(collect.find_last_senate_vote(), 0)
+
+    def test_fetched_xml_is_kept(self):
+        collect = self.collector()
+        self.assertTrue(collect.fetch_house_roll(10))
+        self.assertTrue(collect.fetch_senate_vote(1))
+        self.assertEqual(os.listdir('xml/house_2019'), ['roll010.xml'])
+        self.assertEqual(os.listdir('xml/senate_2019'), ['vote_116_1_00001.xml'])
+        # The saved XML rebuilds the same JSON files offline
+        for chamber, vote_dir in [('house', collect.house_vote_dir), ('senate', collect.senate_vote_dir)]:
+            self.assertEqual(Xml2json().convertDirectory('xml/{}_2019'.format(chamber), 'rebuilt', workers=1), [])
+            for name in os.listdir(vote_dir):
+                with open('{}/{}'.format(vote_dir, name), 'rb') as collected, open('rebuilt/' + name, 'rb') as rebuilt:
+                    self.assertEqual(rebuilt.read(), collected.read())
+
+    def test_html_page_is_not_kept(self):
+        self.assertFalse(self.collector().fetch_house_roll(11))
+        self.assertEqual(os.listdir('xml/house_2019'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
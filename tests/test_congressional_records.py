@@ -0,0 +1,128 @@
+""" Tests of the Congressional Record index (congressional_records.py) against a stand-in server. Run from
+    the top directory with python -m unittest discover tests """
+
+import os
+import re
+import json
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from datetime import date
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import http_fetch
+import congressional_records
+from rate_limiter import HostRateLimiter
+from response_cache import ResponseCache
+from congressional_records import CongressionalRecords
+
+
+class RecordServer(BaseHTTPRequestHandler):
+    """ Answers HEAD for the days in available with 200, for the days in failing with 503 and for any
+        other day with 404. """
+    protocol_version = 'HTTP/1.1'
+    available = set()
+    failing = set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        day = date(*map(int, re.search(r'CREC-(\d{4})-(\d{2})-(\d{2})\.pdf', self.path).groups()))
+        self.send_response(200 if day in self.available else 503 if day in self.failing else 404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+def days(*numbers):
+    return [date(2019, 1, number) for number in numbers]
+
+
+class UpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), RecordServer)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = congressional_records.BASE_URL
+        congressional_records.BASE_URL = 'http://127.0.0.1:{}/{{}}/crec/{{}}/{{}}/{{}}/CREC-{{}}-{{}}-{{}}.pdf'.format(
+            self.server.server_port)
+        self.fetcher = http_fetch._shared_fetcher
+        http_fetch.configure(retries=0, rate_limiter=HostRateLimiter(default={'rate': 500, 'burst': 50,
+                                                                              'max_rate': 1000}))
+        self.dir = tempfile.TemporaryDirectory()
+        self.index_path = '{}/congressional_records_2019.json'.format(self.dir.name)
+        RecordServer.available = set(days(3, 4, 8))
+        RecordServer.failing = set(days(5))
+
+    def tearDown(self):
+        congressional_records.BASE_URL = self.base_url
+        http_fetch._shared_fetcher = self.fetcher
+        self.server.shutdown()
+        self.server.server_close()
+        self.dir.cleanup()
+
+    def test_failed_days_are_checked_again(self):
+        records = CongressionalRecords(2019, index_path=self.index_path)
+        self.assertEqual(records.update(date(2019, 1, 10)), days(3, 4, 8))
+        self.assertEqual(records.failed, set(days(5)))
+        # The failed day comes before a later available one, it is still checked again
+        records = CongressionalRecords(2019, index_path=self.index_path)
+        self.assertEqual(records.days_to_check(date(2019, 1, 12)), days(5, 9, 10, 11, 12))
+        RecordServer.failing = set()
+        RecordServer.available.add(date(2019, 1, 5))
+        self.assertEqual(records.update(date(2019, 1, 12)), days(5))
+        self.assertEqual(records.available, days(3, 4, 5, 8))
+        self.assertEqual(records.failed, set())
+        with open(self.index_path, 'r') as f:
+            index = json.load(f)
+        self.assertEqual(index['missing'], [day.isoformat() for day in days(1, 2, 6, 7, 9, 10, 11, 12)])
+        self.assertEqual(index['failed'], [])
+
+    def test_index_is_saved_when_interrupted(self):
+        records = CongressionalRecords(2019, index_path=self.index_path)
+        record = records.record
+
+        def record_until_day_6(day, available):
+            if day == date(2019, 1, 6):
+                raise KeyboardInterrupt()
+            record(day, available)
+
+        records.record = record_until_day_6
+        self.assertRaises(KeyboardInterrupt, records.update, date(2019, 1, 10))
+        records = CongressionalRecords(2019, index_path=self.index_path)
+        self.assertEqual(records.available, days(3, 4))
+        self.assertEqual(records.failed, set(days(5)))
+        self.assertEqual(records.days_to_check(date(2019, 1, 10)), days(5, 6, 7, 8, 9, 10))
+
+    def test_index_without_missing_days(self):
+        # An index written before missing days were recorded covers every day up to the last available
+        with open(self.index_path, 'w') as f:
+            json.dump({'year': 2019, 'available': ['2019-01-03', '2019-01-04']}, f)
+        records = CongressionalRecords(2019, index_path=self.index_path)
+        self.assertEqual(records.days_to_check(date(2019, 1, 7)), days(5, 6, 7))
+
+    def test_replay_without_network(self):
+        RecordServer.failing = set()
+        cache = ResponseCache(cache_dir='{}/http_cache'.format(self.dir.name))
+        limiter = HostRateLimiter(default={'rate': 500, 'burst': 50, 'max_rate': 1000})
+        http_fetch.configure(retries=0, cache=cache, rate_limiter=limiter)
+        self.assertEqual(CongressionalRecords(2019, index_path=self.index_path).update(date(2019, 1, 10)),
+                         days(3, 4, 8))
+        os.remove(self.index_path)
+        http_fetch.configure(retries=0, cache=cache, replay=True, rate_limiter=limiter)
+
+        def no_network(*args):
+            raise AssertionError('Network access in replay mode')
+
+        with mock.patch.object(socket.socket, 'connect', no_network):
+            records = CongressionalRecords(2019, index_path=self.index_path)
+            self.assertEqual(records.update(date(2019, 1, 10)), days(3, 4, 8))
+            # A day never recorded is not found either
+            self.assertEqual(records.update(date(2019, 1, 11)), [])
+            # check() counts an error as a failed day, so none may have failed
+            self.assertEqual(records.failed, set())
+        cache.db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
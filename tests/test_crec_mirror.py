@@ -0,0 +1,128 @@
+""" Tests of the resumable Congressional Record mirror (crec_mirror.py) against a stand-in server. Run from
+    the top directory with python -m unittest discover tests """
+
+import os
+import re
+import json
+import socket
+import hashlib
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import http_fetch
+from rate_limiter import HostRateLimiter
+from crec_mirror import CrecMirror, IncompleteDownload
+
+
+def pdf(version):
+    return b'%PDF' + hashlib.sha256(version).digest() * 8000
+
+
+class PdfServer(BaseHTTPRequestHandler):
+    """ Serves one PDF with an ETag and Range support. The first response is cut off half way if cut is
+        set, and a range request gets the wrong bytes if wrong_start is set. """
+    protocol_version = 'HTTP/1.1'
+    body = pdf(b'1')
+    etag = '"1"'
+    cut = False
+    wrong_start = False
+    # Request headers of every GET
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        PdfServer.requests.append(dict(self.headers.items()))
+        start = 0
+        ranged = re.match(r'bytes=(\d+)-', self.headers.get('Range', ''))
+        if ranged is not None and self.headers.get('If-Range') in (None, self.etag):
+            start = int(ranged.group(1))
+            if PdfServer.wrong_start is True:
+                start = 0
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, len(self.body) - 1, len(self.body)))
+        else:
+            self.send_response(200)
+        part = self.body[start:]
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Length', str(len(part)))
+        self.end_headers()
+        if PdfServer.cut is True:
+            PdfServer.cut = False
+            self.wfile.write(part[:len(part) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        self.wfile.write(part)
+
+
+class QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # The mirror drops connections whose response it does not read to the end
+        pass
+
+
+class ResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.server = QuietServer(('127.0.0.1', 0), PdfServer)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:{}/crec/2019/01/03/CREC-2019-01-03.pdf'.format(self.server.server_port)
+        self.fetcher = http_fetch._shared_fetcher
+        http_fetch.configure(retries=0, rate_limiter=HostRateLimiter(default={'rate': 500, 'burst': 50,
+                                                                              'max_rate': 1000}))
+        self.dir = tempfile.TemporaryDirectory()
+        PdfServer.body = pdf(b'1')
+        PdfServer.etag = '"1"'
+        PdfServer.cut = True
+        PdfServer.wrong_start = False
+        PdfServer.requests = []
+
+    def tearDown(self):
+        http_fetch._shared_fetcher = self.fetcher
+        self.server.shutdown()
+        self.server.server_close()
+        self.dir.cleanup()
+
+    def mirrored(self, mirror):
+        with open(mirror.path(self.url), 'rb') as f:
+            return f.read()
+
+    def test_resume_after_cut_off(self):
+        mirror = CrecMirror(2019, retries=0, mirror_dir=self.dir.name)
+        self.assertRaises(IncompleteDownload, mirror.download, self.url)
+        self.assertEqual(os.path.getsize(mirror.path(self.url) + '.part'), len(PdfServer.body) // 2)
+        self.assertEqual(mirror.download(self.url), len(PdfServer.body) - len(PdfServer.body) // 2)
+        self.assertEqual(self.mirrored(mirror), PdfServer.body)
+        self.assertEqual(PdfServer.requests[0]['Accept-Encoding'], 'identity')
+        self.assertEqual(PdfServer.requests[1]['Range'], 'bytes={}-'.format(len(PdfServer.body) // 2))
+        self.assertEqual(PdfServer.requests[1]['If-Range'], '"1"')
+        self.assertFalse(os.path.exists(mirror.path(self.url) + '.part.validator'))
+        with open('{}/manifest.json'.format(self.dir.name), 'r') as f:
+            self.assertEqual(json.load(f)['CREC-2019-01-03.pdf'],
+                             {'size': len(PdfServer.body), 'sha256': hashlib.sha256(PdfServer.body).hexdigest()})
+
+    def test_changed_file_is_downloaded_again(self):
+        mirror = CrecMirror(2019, retries=1, mirror_dir=self.dir.name)
+        self.assertRaises(IncompleteDownload, CrecMirror(2019, retries=0, mirror_dir=self.dir.name).download,
+                          self.url)
+        PdfServer.body = pdf(b'2')
+        PdfServer.etag = '"2"'
+        mirror.download(self.url)
+        self.assertEqual(self.mirrored(mirror), pdf(b'2'))
+
+    def test_wrong_range_starts_again(self):
+        mirror = CrecMirror(2019, retries=1, mirror_dir=self.dir.name)
+        self.assertRaises(IncompleteDownload, CrecMirror(2019, retries=0, mirror_dir=self.dir.name).download,
+                          self.url)
+        PdfServer.wrong_start = True
+        # The range from the start is refused, and the retry asks for the whole file
+        mirror.download(self.url)
+        self.assertNotIn('Range', PdfServer.requests[-1])
+        self.assertEqual(self.mirrored(mirror), PdfServer.body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+""" Tests of the shared fetch layer (http_fetch.py) and its response cache (response_cache.py) against a
+    stand-in server. Run from the top directory with python -m unittest discover tests """
+
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from rate_limiter import HostRateLimiter
+from response_cache import ResponseCache
+from http_fetch import HttpFetcher
+
+
+class PageServer(BaseHTTPRequestHandler):
+    """ Answers every GET with the status and body in response, and with 304 Not Modified when the
+        request's If-None-Match is the page's ETag. """
+    protocol_version = 'HTTP/1.1'
+    response = (200, b'page')
+    etag = '"1"'
+    # Request headers of every request
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        PageServer.requests.append(dict(self.headers.items()))
+        status, body = PageServer.response
+        if status == 200 and self.headers.get('If-None-Match') == self.etag:
+            status, body = 304, b''
+        self.send_response(status)
+        if status in (200, 304):
+            self.send_header('ETag', self.etag)
+            self.send_header('Last-Modified', 'Thu, 03 Jan 2019 17:00:00 GMT')
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def no_network(*args):
+    raise AssertionError('Network access in replay mode')
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), PageServer)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.dir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(cache_dir=self.dir.name)
+        self.fetcher = self.new_fetcher()
+        self.url = 'http://127.0.0.1:{}/bill/116th-congress/house-bill/1'.format(self.server.server_port)
+        PageServer.response = (200, b'page')
+        PageServer.etag = '"1"'
+        PageServer.requests = []
+
+    def tearDown(self):
+        self.cache.db.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.dir.cleanup()
+
+    def new_fetcher(self, replay=False):
+        return HttpFetcher(retries=0, cache=self.cache, replay=replay,
+                           rate_limiter=HostRateLimiter(default={'rate': 500, 'burst': 50, 'max_rate': 1000}))
+
+    def test_errors_are_not_cached(self):
+        for status in (429, 403, 500, 503):
+            PageServer.response = (status, b'slow down')
+            self.assertEqual(self.fetcher.get(self.url).status_code, status)
+            self.assertIsNone(self.cache.get(self.url))
+        PageServer.response = (404, b'not found')
+        self.fetcher.get(self.url)
+        self.assertEqual(self.cache.get(self.url)['status'], 404)
+
+    def test_cached_page_is_kept(self):
+        self.fetcher.get(self.url)
+        for status in (429, 503, 404):
+            PageServer.response = (status, b'error')
+            self.fetcher.get(self.url)
+            self.assertEqual(self.cache.get(self.url)['body'], b'page')
+        PageServer.response = (200, b'new page')
+        PageServer.etag = '"2"'
+        self.fetcher.get(self.url)
+        self.assertEqual(self.cache.get(self.url)['body'], b'new page')
+
+    def test_revalidation(self):
+        self.fetcher.get(self.url)
+        self.assertNotIn('If-None-Match', PageServer.requests[0])
+        with mock.patch.object(self.cache, 'touch', wraps=self.cache.touch) as touch:
+            r = self.fetcher.get(self.url)
+        self.assertEqual(PageServer.requests[1]['If-None-Match'], '"1"')
+        self.assertEqual(PageServer.requests[1]['If-Modified-Since'], 'Thu, 03 Jan 2019 17:00:00 GMT')
+        # The 304 is answered with the cached page
+        self.assertEqual((r.status_code, r.content), (200, b'page'))
+        touch.assert_called_once_with(self.url)
+
+    def test_least_recently_used_are_evicted(self):
+        self.cache.max_bytes = 25
+        PageServer.response = (200, b'0123456789')
+        # The first page is used again after the second one is fetched, the second is then the least
+        # recently used when the third one no longer fits
+        for number in (1, 2, 1, 3):
+            self.fetcher.get('{}{}'.format(self.url, number))
+        self.assertIsNotNone(self.cache.get(self.url + '1'))
+        self.assertIsNone(self.cache.get(self.url + '2'))
+        self.assertIsNotNone(self.cache.get(self.url + '3'))
+        self.assertEqual(self.cache.total_bytes, 20)
+
+    def test_replay(self):
+        self.fetcher.get(self.url)
+        PageServer.response = (404, b'not found')
+        self.fetcher.get(self.url + '/text')
+        replay = self.new_fetcher(replay=True)
+        with mock.patch.object(socket.socket, 'connect', no_network):
+            r = replay.get(self.url)
+            self.assertEqual((r.status_code, r.content, r.headers['ETag']), (200, b'page', '"1"'))
+            self.assertEqual(replay.get(self.url + '/text').status_code, 404)
+            # Never recorded
+            r = replay.get(self.url + '/cosponsors')
+            self.assertEqual((r.status_code, r.content), (404, b''))
+            # Streamed bodies are never recorded either
+            self.assertEqual(replay.get(self.url, stream=True).status_code, 404)
+        self.assertEqual(len(PageServer.requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+""" Tests of the congress.gov page field extraction (page_extractor.py), against the slice-and-search
+    parsing it replaced (kept in benchmark_page_extractor.py). Run from the top directory with
+    python -m unittest discover tests """
+
+import os
+import json
+import unittest
+import page_extractor
+from benchmark_page_extractor import PARSERS, load_pages
+
+PAGE_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pages')
+
+
+def page(name):
+    with open('{}/{}'.format(PAGE_FIXTURES, name), 'r') as f:
+        return f.read()
+
+
+class ParityTest(unittest.TestCase):
+    def test_same_fields_as_sliced_parsers(self):
+        pages = load_pages(PAGE_FIXTURES)
+        self.assertTrue(all(len(documents) > 0 for documents in pages.values()))
+        for kind, documents in pages.items():
+            before, after = PARSERS[kind]
+            for name, text in documents:
+                with self.subTest(page=name):
+                    self.assertEqual(json.dumps(after(text)), json.dumps(before(text)))
+
+
+class FieldTest(unittest.TestCase):
+    def test_bill_page(self):
+        bill = page_extractor.parse_bill_page(page('bill_hr1.html'), 'https://www.congress.gov/bill/116th-congress/'
+                                                                     'house-bill/1', 1)
+        self.assertEqual(bill['status'], 'This bill has the status Passed House')
+        self.assertEqual(bill['sponsor'], 'Rep. Sarbanes, John P. [D-MD-3]')
+        self.assertEqual(bill['party'], 'Democratic')
+        self.assertEqual(bill['committee_reports'], 'H. Rept. 116-15')
+        self.assertEqual(bill['latest_action'], 'Senate - 03/14/2019 Received in the Senate. ')
+        self.assertEqual(bill['policy_area'], 'Government Operations and Politics')
+        self.assertEqual(bill['subjects_url'], 'https://www.congress.gov/bill/116th-congress/house-bill/1/subjects')
+
+    def test_reserved_bill_page(self):
+        bill = page_extractor.parse_bill_page(page('bill_s2.html'), 'url', 2)
+        self.assertTrue(bill['reserved'])
+        self.assertNotIn('sponsor', bill.keys())
+
+    def test_nomination_page(self):
+        nomination = page_extractor.parse_nomination_page(page('nomination_pn17.html'), 'url', 17)
+        self.assertEqual(nomination['organization'], 'The Judiciary')
+        self.assertEqual(nomination['date_received'], '01/16/2019')
+        self.assertTrue(nomination['latest_action'].startswith('03/13/2019 - Confirmed by the Senate'))
+
+    def test_cosponsors_page(self):
+        text = page('cosponsors_hr1.html')
+        table, cosponsors = page_extractor.parse_cosponsors_page(text)
+        self.assertEqual([cosponsor[1:] for cosponsor in cosponsors],
+                         [('Raskin, Jamie', 'D', 'MD-8'), ('Lofgren, Zoe', 'D', 'CA-19'),
+                          ('Fitzpatrick, Brian K.', 'R', 'PA-1'), ('Sablan, Gregorio Kilili Camacho', 'D', 'MP-At Large')])
+        self.assertEqual(page_extractor.parse_cosponsors_page(page('cosponsors_s2.html')), (None, []))
+
+    def test_text_and_subjects_pages(self):
+        self.assertIn('SECTION 1. SHORT TITLE', page_extractor.parse_text_page(page('text_s1.html')))
+        self.assertTrue(page_extractor.parse_text_page(page('text_hres5.html')).startswith('Resolved, That'))
+        self.assertEqual(page_extractor.parse_subjects_page(page('subjects_hr1.html')),
+                         ['Campaign finance', 'Elections, voting, political campaign regulation', 'Voting rights'])
+        self.assertEqual(page_extractor.parse_subjects_page(page('subjects_s2.html')), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
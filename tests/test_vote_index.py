@@ -0,0 +1,112 @@
+""" Tests of the chambers' vote listing parsers (vote_index.py) and of the Senate votes an update
+    collects again. Run from the top directory with python -m unittest discover tests """
+
+import os
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import http_fetch
+import vote_index
+import collect_congress_votes
+from rate_limiter import HostRateLimiter
+from xml2json import Xml2json
+from vote_index import parse_house_index, parse_house_roll_page, parse_senate_vote_menu, house_roll_numbers, \
+    senate_vote_tallies
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def fixture(name):
+    with open('{}/vote_index/{}'.format(FIXTURES, name), 'r') as f:
+        return f.read()
+
+
+class ParseTest(unittest.TestCase):
+    def test_house_index(self):
+        self.assertEqual(parse_house_index(fixture('house_index_2019.html')), 'ROLL_700.asp')
+        self.assertIsNone(parse_house_index('<html><body>No votes yet</body></html>'))
+
+    def test_house_roll_page(self):
+        self.assertEqual(parse_house_roll_page(fixture('house_ROLL_700.html')), [701, 702, 703])
+        self.assertEqual(parse_house_roll_page('<html></html>'), [])
+
+    def test_senate_vote_menu(self):
+        self.assertEqual(parse_senate_vote_menu(fixture('vote_menu_116_1.xml')),
+                         {1: ('56', '44'), 2: ('53', '47'), 3: ('56', '44')})
+
+    def test_senate_vote_menu_with_one_vote(self):
+        menu = fixture('vote_menu_116_1.xml')
+        one_vote = menu[:menu.index('    <vote>', menu.index('</vote>'))] + '  </votes>\n</vote_summary>\n'
+        self.assertEqual(parse_senate_vote_menu(one_vote), {3: ('56', '44')})
+
+    def test_not_a_vote_menu(self):
+        self.assertEqual(parse_senate_vote_menu('<html><body>Page not found</body></html>'), {})
+        self.assertEqual(parse_senate_vote_menu('<vote_summary><votes></votes></vote_summary>'), {})
+
+
+class ListingServer(BaseHTTPRequestHandler):
+    """ Serves the fixtures under their clerk.house.gov and senate.gov names. """
+    protocol_version = 'HTTP/1.1'
+    paths = {'/evs/2019/index.asp': 'house_index_2019.html', '/evs/2019/ROLL_700.asp': 'house_ROLL_700.html',
+             '/vote_menu_116_1.xml': 'vote_menu_116_1.xml'}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = fixture(self.paths[self.path]).encode('utf-8') if self.path in self.paths else b''
+        self.send_response(200 if self.path in self.paths else 404)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ListingTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ListingServer)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.urls = (vote_index.HOUSE_INDEX_URL, vote_index.HOUSE_ROLL_PAGE_URL, vote_index.SENATE_MENU_URL)
+        base = 'http://127.0.0.1:{}'.format(self.server.server_port)
+        vote_index.HOUSE_INDEX_URL = base + '/evs/{}/index.asp'
+        vote_index.HOUSE_ROLL_PAGE_URL = base + '/evs/{}/{}'
+        vote_index.SENATE_MENU_URL = base + '/vote_menu_{}_{}.xml'
+        self.fetcher = http_fetch._shared_fetcher
+        http_fetch.configure(retries=0, rate_limiter=HostRateLimiter(default={'rate': 500, 'burst': 50,
+                                                                              'max_rate': 1000}))
+        self.cwd = os.getcwd()
+        self.dir = tempfile.TemporaryDirectory()
+        os.chdir(self.dir.name)
+        os.mkdir('data')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+        vote_index.HOUSE_INDEX_URL, vote_index.HOUSE_ROLL_PAGE_URL, vote_index.SENATE_MENU_URL = self.urls
+        http_fetch._shared_fetcher = self.fetcher
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_listings(self):
+        self.assertEqual(house_roll_numbers(2019), list(range(1, 704)))
+        self.assertIsNone(house_roll_numbers(2020))
+        self.assertEqual(senate_vote_tallies(116, 1), {1: ('56', '44'), 2: ('53', '47'), 3: ('56', '44')})
+        self.assertIsNone(senate_vote_tallies(116, 2))
+
+    def test_changed_senate_tally_is_collected_again(self):
+        os.makedirs('data/senate_votes_2019')
+        # Vote 1 was saved with a tally the menu no longer has, vote 2 with the menu's tally, vote 3 is new
+        vote = Xml2json().convertFromXmlFile('{}/xml/vote_116_1_00001.xml'.format(FIXTURES))
+        Xml2json().saveToJsonFile(vote, 'data/senate_votes_2019/vote00001.json')
+        vote['roll_call_vote']['vote_number'] = '2'
+        vote['roll_call_vote']['count']['yeas'] = '53'
+        vote['roll_call_vote']['count']['nays'] = '47'
+        Xml2json().saveToJsonFile(vote, 'data/senate_votes_2019/vote00002.json')
+        collect = collect_congress_votes.CollectCongressVotes(2019)
+        self.assertTrue(collect.senate_vote_changed(1, ('56', '44')))
+        self.assertFalse(collect.senate_vote_changed(2, ('53', '47')))
+        self.assertEqual(collect.plan_senate_votes(), [1, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
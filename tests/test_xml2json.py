@@ -0,0 +1,78 @@
+""" Tests of the Xml2json conversion engines (xml2json.py). Run from the top directory with
+    python -m unittest discover tests """
+
+import os
+import json
+import tempfile
+import unittest
+from xml2json import Xml2json
+
+XML_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'xml')
+
+
+class EngineParityTest(unittest.TestCase):
+    def assertSameOutput(self, convert, data):
+        soup = getattr(Xml2json('soup'), convert)(data)
+        stream = getattr(Xml2json('stream'), convert)(data)
+        # Compared as JSON text, so the order of the keys counts as it does in the saved files
+        self.assertEqual(json.dumps(stream, indent=1), json.dumps(soup, indent=1))
+        return stream
+
+    def test_roll_call_fixtures(self):
+        names = sorted(name for name in os.listdir(XML_FIXTURES) if name.endswith('.xml'))
+        self.assertEqual(names, ['roll001.xml', 'roll010.xml', 'vote_116_1_00001.xml'])
+        for name in names:
+            with self.subTest(name=name):
+                path = '{}/{}'.format(XML_FIXTURES, name)
+                with open(path, 'rb') as f:
+                    data = f.read()
+                converted = self.assertSameOutput('convertFromXmlBytes', data)
+                self.assertSameOutput('convertFromXmlText', data.decode('utf-8'))
+                self.assertEqual(Xml2json('stream').convertFromXmlFile(path), converted)
+
+    def test_house_roll_call(self):
+        roll = Xml2json('stream').convertFromXmlFile('{}/roll010.xml'.format(XML_FIXTURES))['rollcall-vote']
+        self.assertEqual(roll['vote-metadata']['vote-question'], 'On Passage')
+        self.assertEqual(roll['vote-metadata']['action-time'], {'attributes': {'time-etz': '20:53'},
+                                                                 'text': '8:53 PM'})
+        self.assertEqual(roll['vote-data'][1]['recorded-vote']['legislator']['attributes']['party'], 'D')
+
+    def test_namespaces(self):
+        self.assertEqual(self.assertSameOutput('convertFromXmlText', '<root xmlns:foo="http://example.com/foo">'
+                                               '<foo:a/><b foo:x="1">t</b></root>'),
+                         {'root': {'a': '', 'b': {'attributes': {'foo:x': '1'}, 'text': 't'}}})
+        self.assertSameOutput('convertFromXmlText', '<r:root xmlns:r="http://example.com/r"><r:a>1</r:a>'
+                                                    '<r:a>2</r:a></r:root>')
+        self.assertSameOutput('convertFromXmlText', '<root xmlns="http://example.com/d"><a><b>1</b></a></root>')
+
+    def test_processing_instructions_and_comments(self):
+        self.assertEqual(self.assertSameOutput('convertFromXmlText', '<root><a><?pi x?></a><b><?pi?></b>'
+                                               '<c><!-- note --></c><d><!----></d></root>'),
+                         {'root': {'a': 'pi x', 'b': 'pi ', 'c': ' note ', 'd': ' '}})
+        self.assertSameOutput('convertFromXmlText', '<?xml version="1.0"?><?xml-stylesheet href="a.xsl"?><!-- top -->'
+                                                    '<root><a>1</a></root>')
+
+    def test_convert_directory(self):
+        with tempfile.TemporaryDirectory() as dst:
+            self.assertEqual(Xml2json('stream').convertDirectory(XML_FIXTURES, dst, workers=2), [])
+            self.assertEqual(sorted(os.listdir(dst)), ['roll1.json', 'roll10.json', 'vote00001.json'])
+            with open('{}/vote00001.json'.format(dst), 'r') as f:
+                self.assertEqual(json.load(f)['roll_call_vote']['count']['yeas'], '3')
+
+    def test_convert_directory_skips_other_documents(self):
+        with tempfile.TemporaryDirectory() as src, tempfile.TemporaryDirectory() as dst:
+            with open('{}/roll010.xml'.format(XML_FIXTURES), 'rb') as f:
+                roll = f.read()
+            with open('{}/roll010.xml'.format(src), 'wb') as f:
+                f.write(roll)
+            # The page clerk.house.gov generates past the last roll call, saved as if it were one
+            with open('{}/roll011.xml'.format(src), 'w') as f:
+                f.write('<html><body><p>Roll call not found</p></body></html>')
+            self.assertEqual(Xml2json('stream').convertDirectory(src, dst, workers=1), ['roll011.xml'])
+            self.assertEqual(os.listdir(dst), ['roll10.json'])
+            self.assertEqual(Xml2json('stream').convertDirectory(src, dst, workers=1, roots=None), [])
+            self.assertEqual(sorted(os.listdir(dst)), ['roll10.json', 'roll11.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,19 @@
 from collect_congress_votes import CollectCongressVotes
 from process_congress_votes import ProcessCongressVotes
+import http_fetch
+from response_cache import ResponseCache
+import sys
+from datetime import datetime as dt
 
-year = 2019
+# The year to update can be given on the command line, the current year is used otherwise.
+# Use backfill.py to collect a range of years.
+year = int(sys.argv[1]) if len(sys.argv) > 1 else dt.now().year
 updates_only = True
 debug_print = True
+# Set replay to True to rerun against the recorded responses in the cache without any network access
+replay = False
+
+http_fetch.configure(cache=ResponseCache(), replay=replay)
 
 collect = CollectCongressVotes(year, updates_only, debug_print)
 collect.collect_votes()
@@ -0,0 +1,87 @@
+""" Read the chambers' own roll call vote listings so an update run knows which votes exist without
+    probing vote URLs one at a time.
+
+    House: clerk.house.gov/evs/<year>/index.asp links to pages of 100 roll calls each (ROLL_000.asp,
+    ROLL_100.asp, ...). The page with the highest start number lists the latest roll call.
+    Senate: the per-session vote menu XML lists every vote of the session with its tally.
+
+    The parse functions take the document text, so saved copies of the index documents can be used in
+    place of live requests. """
+
+import re
+from http_fetch import fetch
+from xml2json import Xml2json
+
+HOUSE_INDEX_URL = 'http://clerk.house.gov/evs/{}/index.asp'
+HOUSE_ROLL_PAGE_URL = 'http://clerk.house.gov/evs/{}/{}'
+SENATE_MENU_URL = 'https://www.senate.gov/legislative/LIS/roll_call_lists/vote_menu_{}_{}.xml'
+
+_house_roll_page = re.compile(r'(ROLL_(\d+)\.asp)', re.IGNORECASE)
+_house_roll_number = re.compile(r'rollnumber=(\d+)', re.IGNORECASE)
+
+
+def parse_house_index(html):
+    """ Return the name of the roll call listing page with the highest start number, or None. """
+    pages = _house_roll_page.findall(html)
+    if len(pages) == 0:
+        return None
+    return max(pages, key=lambda page: int(page[1]))[0]
+
+
+def parse_house_roll_page(html):
+    """ Return the roll call numbers listed on a clerk.house.gov ROLL_###.asp page. """
+    return sorted(set(int(number) for number in _house_roll_number.findall(html)))
+
+
+def parse_senate_vote_menu(xml_text):
+    """ Return a dictionary of vote number to (yeas, nays) for the votes in a Senate vote menu. """
+    menu = Xml2json('stream').convertFromXmlText(xml_text)
+    if 'vote_summary' not in menu.keys() or not isinstance(menu['vote_summary'], dict):
+        return {}
+    votes = menu['vote_summary'].get('votes', '')
+    # A single vote comes back as a dictionary, several as a list of {'vote': ...} entries
+    if isinstance(votes, dict):
+        votes = [votes]
+    elif not isinstance(votes, list):
+        votes = []
+    tallies = {}
+    for entry in votes:
+        vote = entry.get('vote') if isinstance(entry, dict) else None
+        if not isinstance(vote, dict) or 'vote_number' not in vote.keys():
+            continue
+        tally = vote.get('vote_tally')
+        if not isinstance(tally, dict):
+            tally = {}
+        tallies[int(vote['vote_number'])] = (str(tally.get('yeas', '')).strip(), str(tally.get('nays', '')).strip())
+    return tallies
+
+
+def house_roll_numbers(year):
+    """ Return the list of House roll call numbers for the year from the clerk's index, or None if the
+        index could not be read. """
+    r = fetch(HOUSE_INDEX_URL.format(year))
+    if r.status_code != 200:
+        return None
+    page = parse_house_index(r.text)
+    if page is None:
+        return None
+    r = fetch(HOUSE_ROLL_PAGE_URL.format(year, page))
+    if r.status_code != 200:
+        return None
+    listed = parse_house_roll_page(r.text)
+    if len(listed) == 0:
+        return None
+    # Roll calls are numbered without gaps from 1, the newest page gives the last one
+    return list(range(1, max(listed) + 1))
+
+
+def senate_vote_tallies(congress, session):
+    """ Return the vote number to (yeas, nays) dictionary from the Senate vote menu, or None if the menu
+        could not be read. """
+    r = fetch(SENATE_MENU_URL.format(congress, session))
+    if r.status_code != 200:
+        return None
+    tallies = parse_senate_vote_menu(r.text)
+    if len(tallies) == 0:
+        return None
+    return tallies
@@ -1,13 +1,199 @@
-import requests
+from http_fetch import fetch
 import bs4
 from bs4 import BeautifulSoup
+import os
+import re
 import json
-from time import sleep
+from xml.etree import ElementTree
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Characters Beautiful Soup treats as whitespace when collapsing whitespace-only strings
+_XML_SPACES = ' \n\t\f\r'
+
+
+# House and Senate roll call XML file names, used to name the converted JSON files the same way the
+# collectors do
+_HOUSE_XML_NAME = re.compile(r'^roll(\d+)\.xml$')
+_SENATE_XML_NAME = re.compile(r'^vote_\d+_\d+_(\d+)\.xml$')
+
+# Root elements of House and Senate roll call documents, the only documents the collectors keep
+VOTE_ROOTS = ('rollcall-vote', 'roll_call_vote')
+
+
+def json_filename(xml_name):
+    """ Return the JSON file name CollectCongressVotes uses for a roll call XML file name. """
+    house = _HOUSE_XML_NAME.match(xml_name)
+    if house is not None:
+        return 'roll{}.json'.format(int(house.group(1)))
+    senate = _SENATE_XML_NAME.match(xml_name)
+    if senate is not None:
+        return 'vote{}.json'.format(senate.group(1).zfill(5))
+    return os.path.splitext(xml_name)[0] + '.json'
+
+
+def _convert_file(job):
+    """ Process pool worker for Xml2json.convertDirectory. Converts one file and writes its JSON,
+        returning False if the file did not hold a usable XML document (or its root is not in roots). """
+    src, dst, engine, roots = job
+    converter = Xml2json(engine)
+    try:
+        out = converter.convertFromXmlFile(src)
+    except Exception as e:
+        print('Error converting {}: {}'.format(src, e))
+        return False
+    if not out:
+        return False
+    if roots is not None and not any(root in out.keys() for root in roots):
+        # e.g. an error page or a listing saved with the roll calls
+        print('Not a {} document: {}'.format(' or '.join(roots), src))
+        return False
+    converter.saveToJsonFile(out, dst)
+    return True
+
+
+class _StreamFrame:
+    """ Bookkeeping for one open XML element while the streaming engine is parsing. It holds the
+        same dictionary/list pair that _processChild builds, plus what is needed to reproduce the
+        Beautiful Soup .string value of the element without keeping its children around. """
+    __slots__ = ('name', 'attrs', 'dictionary', 'child_list', 'child_count', 'string')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.dictionary = {}
+        self.child_list = []
+        # Number of child nodes (text runs and tags) Beautiful Soup would see for this element
+        self.child_count = 0
+        # The .string of the first child, only meaningful when child_count ends up as 1
+        self.string = None
+
+    def result(self):
+        """ Return the value _processChild would return for this element. """
+        if len(self.child_list) > 0:
+            return self.child_list
+        elif len(self.dictionary) == 0:
+            return ''
+        return self.dictionary
+
+
+class _StreamTarget:
+    """ Parser target for the streaming engine. The C expat parser behind ElementTree.XMLParser calls
+        start/data/end as it reads the document, and each element is folded into its parent as soon as
+        it closes, following the same rules as Xml2json._processChild. No document tree is built. """
+    def __init__(self):
+        self.store = {}
+        self.stack = []
+        self.text = []
+        self.prefixes = {}
+        self.pending_ns = []
+
+    def _name(self, tag):
+        # ElementTree reports namespaced names as {uri}local, Beautiful Soup names tags by their local name
+        if tag[0] != '{':
+            return tag
+        return tag[1:].split('}', 1)[1]
+
+    def _attribute_name(self, key):
+        # Beautiful Soup keeps the prefix of namespaced attributes, prefix:local
+        if key[0] != '{':
+            return key
+        uri, local = key[1:].split('}', 1)
+        prefix = self.prefixes.get(uri)
+        if prefix:
+            return '{}:{}'.format(prefix, local)
+        return local
+
+    def _add_string(self, data):
+        """ Count a text run, comment or processing instruction as a child node of the open element. """
+        if len(self.stack) == 0:
+            return
+        # Beautiful Soup collapses whitespace-only strings to a single newline (or space)
+        if data.strip(_XML_SPACES) == '':
+            data = '\n' if '\n' in data else ' '
+        frame = self.stack[-1]
+        frame.child_count += 1
+        if frame.child_count == 1:
+            frame.string = data
+
+    def _flush_text(self):
+        if len(self.text) == 0:
+            return
+        data = ''.join(self.text)
+        self.text = []
+        self._add_string(data)
+
+    def start_ns(self, prefix, uri):
+        self.prefixes[uri] = prefix
+        self.pending_ns.append((prefix, uri))
+
+    def start(self, tag, attrib):
+        self._flush_text()
+        attrs = {}
+        # Beautiful Soup keeps namespace declarations as xmlns attributes of the element
+        for prefix, uri in self.pending_ns:
+            attrs['xmlns:{}'.format(prefix) if prefix else 'xmlns'] = uri
+        self.pending_ns = []
+        for key, value in attrib.items():
+            attrs[self._attribute_name(key)] = value
+        self.stack.append(_StreamFrame(self._name(tag), attrs))
+
+    def data(self, text):
+        self.text.append(text)
+
+    def comment(self, text):
+        self._flush_text()
+        self._add_string(text)
+
+    def pi(self, target, data):
+        # Beautiful Soup's string for <?target data?> is 'target data'
+        self._flush_text()
+        self._add_string('{} {}'.format(target, data))
+
+    def end(self, tag):
+        self._flush_text()
+        item = self.stack.pop()
+        string = item.string if item.child_count == 1 else None
+        if len(self.stack) == 0:
+            # The root element is always unfolded, the same as the top level of convertFromXmlUrl
+            self.store[item.name] = item.result()
+            return
+        parent = self.stack[-1]
+        parent.child_count += 1
+        if parent.child_count == 1:
+            parent.string = string
+        if len(item.attrs) > 0:
+            parent.dictionary[item.name] = {'attributes': item.attrs, 'text': string}
+        elif string is not None:
+            parent.dictionary[item.name] = string
+        else:
+            result = item.result()
+            if (item.name in parent.dictionary.keys()) and (len(parent.child_list) == 0):
+                parent.child_list = [{item.name: parent.dictionary.pop(item.name)}]
+            if len(parent.child_list) > 0:
+                parent.child_list.append({item.name: result})
+            else:
+                parent.dictionary[item.name] = result
+
+    def close(self):
+        return self.store
+
 
 class Xml2json:
     """ A class wrapper to take a url to an xml file, convert it to a JSON-style format, and optionally write
         the file to disk. This class depends on the prior installation of requests, bs4 (Beautiful Soup),
-        and json. """
+        and json.
+
+        Two conversion engines are available. The default 'soup' engine builds a Beautiful Soup tree and
+        walks it with _processChild. The 'stream' engine feeds the document through the C expat parser
+        and builds the same dictionary/list structure while parsing, without building a tree first. """
+    ENGINES = ('soup', 'stream')
+
+    def __init__(self, engine='soup'):
+        if engine not in self.ENGINES:
+            raise ValueError('Unknown Xml2json engine: {}'.format(engine))
+        self.engine = engine
+
     def _processChild(self, child):
         """ This function is called recursively to unfold all layers of the XML tree into
             dictionaries and lists. """
@@ -58,19 +244,68 @@ class Xml2json:
             the root tag to walk the XML tree from the url. Line returns and child items with no names
             are skipped. If there was a url read error, None is returned, otherwise a JSON-style
             dictionary of dictionaries and lists form of the XML file is returned."""
-        r = requests.get(url)
-        # Delay in attempt to resolve Senate vote scraping issues where data does not come through right
-        sleep(0.5)
+        # Request pacing per host (including the slower pace senate.gov needs) is handled by the
+        # rate limiter in the shared fetcher
+        r = fetch(url)
         if r.status_code != 200:
             # If the return code was not 200, something is not right, return a None object
             print('Status: {}'.format(r.status_code))
             return None
-        data = r.text
+        return self.convertFromXmlText(r.text)
+
+    def convertFromXmlText(self, data):
+        """ Convert an XML document held in a string with the selected engine and return the JSON-style
+            dictionary of dictionaries and lists. """
         # Compensate for sloppy format...
         if data[0] != '<':
             start = data.find('<')
             if start >= 0:
                 data = data[start:]
+        if self.engine == 'stream':
+            return self._convertStream(data)
+        return self._convertSoup(data)
+
+    def convertFromXmlBytes(self, data):
+        """ Convert an XML document held in bytes (as read from disk or a saved response body). The
+            parser works out the character encoding from the XML declaration. """
+        # Compensate for sloppy format...
+        if data[:1] != b'<':
+            start = data.find(b'<')
+            if start >= 0:
+                data = data[start:]
+        if self.engine == 'stream':
+            return self._convertStream(data)
+        return self._convertSoup(data)
+
+    def convertFromXmlFile(self, filename):
+        """ Convert a saved XML file, no network access is needed. """
+        with open(filename, 'rb') as f:
+            return self.convertFromXmlBytes(f.read())
+
+    def convertDirectory(self, src, dst, workers=None, roots=VOTE_ROOTS):
+        """ Convert every .xml file in the src directory and write the JSON files to the dst directory,
+            spreading the files over a pool of worker processes (workers=None uses one per core). The
+            output file names follow CollectCongressVotes, so House roll###.xml files become
+            roll<number>.json and Senate vote_<congress>_<session>_#####.xml files become vote#####.json.
+            Like the collectors, only documents with one of the roots as their root element are converted
+            (roots=None converts any document). Returns the list of source file names that could not be
+            converted. """
+        if not os.path.isdir(dst):
+            os.makedirs(dst)
+        jobs = [('{}/{}'.format(src, name), '{}/{}'.format(dst, json_filename(name)), self.engine, roots)
+                for name in sorted(os.listdir(src)) if name.endswith('.xml')]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        # Larger chunks keep the inter-process overhead small relative to each conversion
+        chunksize = max(1, len(jobs) // (4 * workers))
+        failed = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for job, converted in zip(jobs, pool.map(_convert_file, jobs, chunksize=chunksize)):
+                if converted is False:
+                    failed.append(os.path.basename(job[0]))
+        return failed
+
+    def _convertSoup(self, data):
         # Use Beautiful Soup 4 to process the XML file into tags in a structure to parse and repackage
         soup = BeautifulSoup(data, 'xml')
         # Set the return value (store) to an empty dictionary
@@ -86,6 +321,17 @@ class Xml2json:
             store[child.name] = self._processChild(child)
         return store
 
+    def _convertStream(self, data):
+        target = _StreamTarget()
+        parser = ElementTree.XMLParser(target=target)
+        try:
+            parser.feed(data)
+            return parser.close()
+        except ElementTree.ParseError:
+            # Not well formed XML (e.g. an HTML error page), return whatever was completed so the
+            # callers' root tag checks detect it
+            return target.store
+
     def saveToJsonFile(self, outJson, filename):
         """ Save the JSON-style data structure to a file. Generally, the 'store' returned by the
             convertFromXmlUrl function will be passed to this function as the outJson input, but
@@ -94,3 +340,21 @@ class Xml2json:
             # Use indent=1 to balance readability of the output file with the extra space used up by
             # space characters
             f.write(json.dumps(outJson, indent=1))
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Convert a directory of saved XML files to JSON files')
+    parser.add_argument('src', help='directory of .xml files')
+    parser.add_argument('dst', help='directory for the .json files, e.g. data/house_votes_2019')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--engine', choices=Xml2json.ENGINES, default='stream')
+    parser.add_argument('--root', action='append', default=None,
+                        help='root element of the documents to convert, may be repeated (default: the House '
+                             'and Senate roll call roots)')
+    parser.add_argument('--any-root', action='store_true', help='convert documents with any root element')
+    args = parser.parse_args()
+    roots = None if args.any_root is True else args.root if args.root is not None else VOTE_ROOTS
+    failures = Xml2json(args.engine).convertDirectory(args.src, args.dst, args.workers, roots)
+    for name in failures:
+        print('Not converted: {}'.format(name))